@@ -61,7 +61,7 @@ def _parse_json(text):
 
 # ─── Resume Analyzer ──────────────────────────────────────────────────────────
 
-def analyze_resume(resume_text, target_role="Software Engineer"):
+def analyze_resume(resume_text, target_role="Software Engineer", registry=None):
     prompt = f"""Analyze the following resume for the target role of {target_role}.
 
 Resume:
@@ -84,12 +84,12 @@ Respond in valid JSON format only:
         parsed = _parse_json(result)
         if parsed:
             return parsed
-    return _fallback_resume_analysis(resume_text, target_role)
+    return _fallback_resume_analysis(resume_text, target_role, registry)
 
 
 # ─── Skill Gap Analysis ───────────────────────────────────────────────────────
 
-def skill_gap_analysis(student_skills, target_role, student_info=None):
+def skill_gap_analysis(student_skills, target_role, student_info=None, registry=None):
     info_str = ""
     if student_info:
         info_str = f"\nStudent CGPA: {student_info.get('cgpa', 'N/A')}, Projects: {student_info.get('projects', 0)}, Internships: {student_info.get('internships', 0)}, Branch: {student_info.get('branch', 'N/A')}"
@@ -115,7 +115,7 @@ Respond in valid JSON format only:
         parsed = _parse_json(result)
         if parsed:
             return parsed
-    return _fallback_skill_gap(student_skills, target_role)
+    return _fallback_skill_gap(student_skills, target_role, registry)
 
 
 # ─── Salary Predictor ─────────────────────────────────────────────────────────
@@ -308,11 +308,15 @@ def _fallback_mock_test(difficulty, subject):
     }
 
 
-def _fallback_resume_analysis(resume_text, target_role):
-    words = resume_text.lower().split()
-    common_skills = ['python', 'java', 'javascript', 'react', 'node', 'sql', 'html', 'css',
-                     'c++', 'machine learning', 'flask', 'django', 'aws', 'docker', 'git']
-    found_skills = [s for s in common_skills if s in words]
+def _fallback_resume_analysis(resume_text, target_role, registry=None):
+    if registry is not None:
+        # Every registered skill and alias, multi-word names included
+        found_skills = registry.find_in_text(resume_text)
+    else:
+        words = resume_text.lower().split()
+        common_skills = ['python', 'java', 'javascript', 'react', 'node', 'sql', 'html', 'css',
+                         'c++', 'machine learning', 'flask', 'django', 'aws', 'docker', 'git']
+        found_skills = [s for s in common_skills if s in words]
     return {
         "skills_found": found_skills,
         "experience_years": 0,
@@ -325,7 +329,7 @@ def _fallback_resume_analysis(resume_text, target_role):
     }
 
 
-def _fallback_skill_gap(skills, target_role):
+def _fallback_skill_gap(skills, target_role, registry=None):
     role_requirements = {
         "Software Engineer": ["DSA", "System Design", "Python", "Java", "Git", "SQL", "REST APIs"],
         "Data Scientist": ["Python", "Machine Learning", "Statistics", "SQL", "TensorFlow", "Pandas"],
@@ -333,11 +337,13 @@ def _fallback_skill_gap(skills, target_role):
         "DevOps Engineer": ["Docker", "Kubernetes", "AWS", "CI/CD", "Linux", "Terraform"],
     }
     required = role_requirements.get(target_role, role_requirements["Software Engineer"])
-    skills_lower = [s.lower() for s in skills]
-    missing = [r for r in required if r.lower() not in skills_lower]
+    # Compared by skill id, so 'nodejs' covers 'Node.js'
+    identity = registry.identity if registry is not None else str.lower
+    have = {identity(s) for s in skills}
+    missing = [r for r in required if identity(r) not in have]
     return {
         "missing_skills": missing,
-        "skills_to_improve": skills[:3],
+        "skills_to_improve": [registry.canonical(s) for s in skills[:3]] if registry is not None else skills[:3],
         "learning_path": [{"skill": s, "resource": f"Learn {s} online", "duration": "2-4 weeks", "priority": "high"} for s in missing[:5]],
         "estimated_time_to_ready": "3-6 months",
         "match_percentage": max(0, 100 - len(missing) * 15),
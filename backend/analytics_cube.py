@@ -0,0 +1,154 @@
+"""
+In-process columnar cube for ad-hoc slice-and-dice analytics.
+
+One row per student, stored as NumPy columns: CGPA, branch code, gender code,
+placed flag and the package of the student's first confirmed placement (NaN
+when unplaced). Categorical columns are dictionary encoded. Any combination
+of dimensions is answered with a single np.bincount per measure over a
+combined group index, so grouped counts/means take microseconds instead of a
+collection scan.
+
+The cube is rebuilt lazily when the students/placements generations from
+response_cache change (or after Config.ANALYTICS_CACHE_TTL seconds, to pick up
+writes made by other processes).
+"""
+import threading
+import time
+from datetime import datetime
+from config import Config
+from response_cache import get_generations
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+DIMENSIONS = ('branch', 'gender', 'placed', 'cgpa_band')
+# cgpa_band bounds: the narrowest band and the most bands one query may produce
+MIN_CGPA_BAND_WIDTH = 0.1
+MAX_CGPA_BANDS = 100
+
+_SOURCES = ('students', 'placements')
+
+
+class AnalyticsCube:
+    def __init__(self, students, first_packages):
+        branches = sorted({s.get('branch') for s in students}, key=lambda b: (b is not None, b or ''))
+        genders = sorted({s.get('gender') or 'Other' for s in students})
+        branch_codes = {b: i for i, b in enumerate(branches)}
+        gender_codes = {g: i for i, g in enumerate(genders)}
+
+        n = len(students)
+        self.size = n
+        self.dictionaries = {'branch': branches, 'gender': genders, 'placed': [False, True]}
+        self.cgpa = np.fromiter(
+            (s['cgpa'] if isinstance(s.get('cgpa'), (int, float)) else np.nan for s in students),
+            dtype=np.float32, count=n
+        )
+        self.branch = np.fromiter((branch_codes[s.get('branch')] for s in students), dtype=np.int16, count=n)
+        self.gender = np.fromiter((gender_codes[s.get('gender') or 'Other'] for s in students), dtype=np.int16, count=n)
+        self.placed = np.fromiter((s.get('placed') is True for s in students), dtype=np.bool_, count=n)
+        self.package = np.fromiter(
+            (first_packages.get(s['_id'], np.nan) for s in students), dtype=np.float32, count=n
+        )
+        self.built_at = datetime.utcnow()
+
+    @classmethod
+    def build(cls, db):
+        students = list(db.students.find({}, {'cgpa': 1, 'branch': 1, 'gender': 1, 'placed': 1}))
+        first_packages = {
+            r['_id']: r['package']
+            for r in db.placements.aggregate([
+                {'$match': {'status': 'confirmed', 'package': {'$type': 'number'}}},
+                {'$sort': {'_id': 1}},
+                {'$group': {'_id': '$student_id', 'package': {'$first': '$package'}}}
+            ])
+        }
+        return cls(students, first_packages)
+
+    def memory(self):
+        columns = {name: getattr(self, name).nbytes for name in ('cgpa', 'branch', 'gender', 'placed', 'package')}
+        return {'rows': self.size, 'columns': columns, 'total_bytes': sum(columns.values())}
+
+    def _codes(self, dimension, band_width):
+        """(integer codes, labels) for one dimension."""
+        if dimension == 'cgpa_band':
+            # Clipped as floats so out-of-scale CGPAs cannot overflow the codes;
+            # the last band is open-ended
+            bands = np.floor(np.nan_to_num(self.cgpa, nan=0) / band_width)
+            bands = np.clip(bands, 0, MAX_CGPA_BANDS - 1).astype(np.int32)
+            count = int(bands.max()) + 1 if self.size else 0
+            labels = [f'{i * band_width:g}-{(i + 1) * band_width:g}' for i in range(count)]
+            if count == MAX_CGPA_BANDS:
+                labels[-1] = f'{(count - 1) * band_width:g}+'
+            return bands, labels
+        codes = getattr(self, dimension).astype(np.int32)
+        return codes, self.dictionaries[dimension]
+
+    def query(self, group_by=(), filters=None, band_width=1.0):
+        """Grouped count / avg_cgpa / avg_package / placement_rate over the filtered rows."""
+        filters = filters or {}
+        mask = np.ones(self.size, dtype=np.bool_)
+        for dimension in ('branch', 'gender'):
+            if dimension in filters:
+                allowed = [self.dictionaries[dimension].index(v)
+                           for v in filters[dimension] if v in self.dictionaries[dimension]]
+                mask &= np.isin(getattr(self, dimension), allowed)
+        if 'placed' in filters:
+            mask &= self.placed == filters['placed']
+        if 'cgpa_min' in filters:
+            mask &= self.cgpa >= filters['cgpa_min']
+        if 'cgpa_max' in filters:
+            mask &= self.cgpa <= filters['cgpa_max']
+
+        group_index = np.zeros(self.size, dtype=np.int64)
+        axes = []
+        stride = 1
+        for dimension in reversed(group_by):
+            codes, labels = self._codes(dimension, band_width)
+            group_index += codes.astype(np.int64) * stride
+            axes.insert(0, (dimension, labels, stride))
+            stride *= max(len(labels), 1)
+
+        idx = group_index[mask]
+        cgpa = self.cgpa[mask]
+        package = self.package[mask]
+        cgpa_valid = ~np.isnan(cgpa)
+        package_valid = ~np.isnan(package)
+
+        counts = np.bincount(idx, minlength=stride)
+        placed = np.bincount(idx, weights=self.placed[mask], minlength=stride)
+        cgpa_n = np.bincount(idx, weights=cgpa_valid, minlength=stride)
+        cgpa_sum = np.bincount(idx, weights=np.where(cgpa_valid, cgpa, 0), minlength=stride)
+        package_n = np.bincount(idx, weights=package_valid, minlength=stride)
+        package_sum = np.bincount(idx, weights=np.where(package_valid, package, 0), minlength=stride)
+
+        rows = []
+        for group in np.nonzero(counts)[0]:
+            row = {}
+            for dimension, labels, axis_stride in axes:
+                row[dimension] = labels[(group // axis_stride) % len(labels)]
+            count = int(counts[group])
+            row['count'] = count
+            row['avg_cgpa'] = round(float(cgpa_sum[group] / cgpa_n[group]), 2) if cgpa_n[group] else None
+            row['avg_package'] = round(float(package_sum[group] / package_n[group]), 2) if package_n[group] else None
+            row['placement_rate'] = round(float(placed[group]) / count * 100, 1)
+            rows.append(row)
+        return rows
+
+
+_lock = threading.Lock()
+_cube = None
+_cube_key = None
+
+
+def get_cube(db):
+    """The current cube, rebuilt when the source generations or TTL epoch move on."""
+    global _cube, _cube_key
+    key = (get_generations(_SOURCES), int(time.time() // max(Config.ANALYTICS_CACHE_TTL, 1)))
+    with _lock:
+        if _cube is None or _cube_key != key:
+            _cube = AnalyticsCube.build(db)
+            _cube_key = key
+        return _cube
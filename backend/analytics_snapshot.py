@@ -0,0 +1,248 @@
+"""
+Incrementally maintained analytics snapshot.
+
+A single document in the `analytics_snapshot` collection keeps running counts,
+sums and min/max values so /api/analytics/stats is one _id lookup instead of
+four count_documents calls and two full-collection aggregations.
+The write paths in routes/students.py, routes/placements.py and
+routes/companies.py call the apply_* helpers below; rebuild_snapshot()
+recomputes everything from scratch (see rebuild_analytics.py).
+
+CGPA and package sums are kept as integers in millionths (SUM_SCALE), so
+adding and removing the same value with $inc cancels exactly instead of
+accumulating float rounding error; they are divided back on read.
+"""
+from datetime import datetime
+
+SNAPSHOT_ID = 'global'
+SUM_SCALE = 10 ** 6
+# Bumped when the stored fields change; an older snapshot is rebuilt on read
+SNAPSHOT_FORMAT = 2
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_confirmed(placement):
+    return placement.get('status') == 'confirmed'
+
+
+def _scaled(value):
+    return round(value * SUM_SCALE)
+
+
+def rebuild_snapshot(db):
+    """Recompute the snapshot from the raw collections and store it."""
+    package_stats = list(db.placements.aggregate([
+        {'$match': {'status': 'confirmed'}},
+        {'$group': {
+            '_id': None,
+            'count': {'$sum': {'$cond': [{'$isNumber': '$package'}, 1, 0]}},
+            'sum': {'$sum': '$package'},
+            'max': {'$max': '$package'},
+            'min': {'$min': '$package'}
+        }}
+    ]))
+    cgpa_stats = list(db.students.aggregate([
+        {'$group': {
+            '_id': None,
+            'count': {'$sum': {'$cond': [{'$isNumber': '$cgpa'}, 1, 0]}},
+            'sum': {'$sum': '$cgpa'}
+        }}
+    ]))
+
+    package = package_stats[0] if package_stats else {}
+    cgpa = cgpa_stats[0] if cgpa_stats else {}
+
+    snapshot = {
+        '_id': SNAPSHOT_ID,
+        'total_students': db.students.count_documents({}),
+        'placed_students': db.students.count_documents({'placed': True}),
+        'total_companies': db.companies.count_documents({}),
+        'total_placements': db.placements.count_documents({'status': 'confirmed'}),
+        'package_count': package.get('count', 0),
+        'package_sum_scaled': _scaled(package.get('sum', 0)),
+        'package_max': package.get('max'),
+        'package_min': package.get('min'),
+        'cgpa_count': cgpa.get('count', 0),
+        'cgpa_sum_scaled': _scaled(cgpa.get('sum', 0)),
+        'format': SNAPSHOT_FORMAT,
+        'rebuilt_at': datetime.utcnow()
+    }
+    db.analytics_snapshot.replace_one({'_id': SNAPSHOT_ID}, snapshot, upsert=True)
+    return snapshot
+
+
+def get_snapshot(db):
+    """Return the snapshot document, building it on first use."""
+    snapshot = db.analytics_snapshot.find_one({'_id': SNAPSHOT_ID})
+    if snapshot is None or snapshot.get('format') != SNAPSHOT_FORMAT:
+        snapshot = rebuild_snapshot(db)
+    return snapshot
+
+
+def snapshot_to_stats(snapshot):
+    """Shape a snapshot exactly like the historical /api/analytics/stats payload."""
+    total_students = snapshot.get('total_students', 0)
+    placed_students = snapshot.get('placed_students', 0)
+    package_count = snapshot.get('package_count', 0)
+    cgpa_count = snapshot.get('cgpa_count', 0)
+
+    if package_count > 0:
+        avg_package = snapshot.get('package_sum_scaled', 0) / SUM_SCALE / package_count
+        highest_package = snapshot.get('package_max') or 0
+        lowest_package = snapshot.get('package_min') or 0
+    else:
+        avg_package = highest_package = lowest_package = 0
+
+    placement_rate = (placed_students / total_students * 100) if total_students > 0 else 0
+    avg_cgpa = round(snapshot.get('cgpa_sum_scaled', 0) / SUM_SCALE / cgpa_count, 2) if cgpa_count else 0
+
+    return {
+        'total_students': total_students,
+        'placed_students': placed_students,
+        'placement_rate': round(placement_rate, 1),
+        'avg_package': round(avg_package, 2),
+        'highest_package': round(highest_package, 2),
+        'lowest_package': round(lowest_package, 2),
+        'total_companies': snapshot.get('total_companies', 0),
+        'total_placements': snapshot.get('total_placements', 0),
+        'avg_cgpa': avg_cgpa
+    }
+
+
+def _apply(db, inc=None, extra=None):
+    update = dict(extra or {})
+    if inc:
+        update['$inc'] = inc
+    if not update:
+        return
+    # Only touch an existing snapshot; a missing one is rebuilt lazily on read
+    db.analytics_snapshot.update_one({'_id': SNAPSHOT_ID}, update)
+
+
+# ─── Student writes ───────────────────────────────────────────────────────────
+
+def _student_delta(student, sign):
+    inc = {'total_students': sign}
+    if student.get('placed') is True:
+        inc['placed_students'] = sign
+    if _is_number(student.get('cgpa')):
+        inc['cgpa_count'] = sign
+        inc['cgpa_sum_scaled'] = sign * _scaled(student['cgpa'])
+    return inc
+
+
+def apply_student_created(db, student):
+    _apply(db, _student_delta(student, 1))
+
+
+def apply_student_updated(db, before, after):
+    inc = {}
+    for key, value in _student_delta(after, 1).items():
+        inc[key] = inc.get(key, 0) + value
+    for key, value in _student_delta(before, -1).items():
+        inc[key] = inc.get(key, 0) + value
+    _apply(db, {k: v for k, v in inc.items() if v})
+
+
+def apply_students_batch(db, created=(), updated=()):
+    """One combined delta for bulk writes: new students and (before, after) pairs."""
+    inc = {}
+    deltas = [_student_delta(s, 1) for s in created]
+    for before, after in updated:
+        deltas.append(_student_delta(after, 1))
+        deltas.append(_student_delta(before, -1))
+    for delta in deltas:
+        for key, value in delta.items():
+            inc[key] = inc.get(key, 0) + value
+    _apply(db, {k: v for k, v in inc.items() if v})
+
+
+def apply_student_deleted(db, student, placements=()):
+    _apply(db, _student_delta(student, -1))
+    apply_placements_deleted(db, placements)
+
+
+def apply_student_marked_placed(db, count=1):
+    if count:
+        _apply(db, {'placed_students': count})
+
+
+# ─── Company writes ───────────────────────────────────────────────────────────
+
+def apply_company_created(db):
+    _apply(db, {'total_companies': 1})
+
+
+def apply_company_deleted(db, placements=()):
+    _apply(db, {'total_companies': -1})
+    apply_placements_deleted(db, placements)
+
+
+# ─── Placement writes ─────────────────────────────────────────────────────────
+
+def apply_placement_created(db, placement):
+    if not _is_confirmed(placement):
+        return
+    inc = {'total_placements': 1}
+    extra = {}
+    package = placement.get('package')
+    if _is_number(package):
+        inc['package_count'] = 1
+        inc['package_sum_scaled'] = _scaled(package)
+        extra = {'$max': {'package_max': package}, '$min': {'package_min': package}}
+    _apply(db, inc, extra)
+
+
+def apply_placements_created(db, placements):
+    """One combined delta for bulk-created placements."""
+    confirmed = [p for p in placements if _is_confirmed(p)]
+    if not confirmed:
+        return
+    packages = [p['package'] for p in confirmed if _is_number(p.get('package'))]
+    inc = {'total_placements': len(confirmed)}
+    extra = {}
+    if packages:
+        inc['package_count'] = len(packages)
+        inc['package_sum_scaled'] = sum(_scaled(p) for p in packages)
+        extra = {'$max': {'package_max': max(packages)}, '$min': {'package_min': min(packages)}}
+    _apply(db, inc, extra)
+
+
+def apply_placements_deleted(db, placements):
+    """Subtract removed placements; min/max are re-derived only when an extreme leaves."""
+    confirmed = [p for p in placements if _is_confirmed(p)]
+    if not confirmed:
+        return
+    packages = [p['package'] for p in confirmed if _is_number(p.get('package'))]
+    inc = {'total_placements': -len(confirmed)}
+    if packages:
+        inc['package_count'] = -len(packages)
+        inc['package_sum_scaled'] = -sum(_scaled(p) for p in packages)
+    _apply(db, inc)
+
+    if not packages:
+        return
+    snapshot = db.analytics_snapshot.find_one(
+        {'_id': SNAPSHOT_ID}, {'package_max': 1, 'package_min': 1}
+    )
+    if not snapshot:
+        return
+    stale = {}
+    if snapshot.get('package_max') is not None and max(packages) >= snapshot['package_max']:
+        stale['package_max'] = -1
+    if snapshot.get('package_min') is not None and min(packages) <= snapshot['package_min']:
+        stale['package_min'] = 1
+    if not stale:
+        return
+    refreshed = {}
+    for field, direction in stale.items():
+        top = db.placements.find_one(
+            {'status': 'confirmed', 'package': {'$type': 'number'}},
+            {'package': 1},
+            sort=[('package', direction)]
+        )
+        refreshed[field] = top['package'] if top else None
+    _apply(db, extra={'$set': refreshed})
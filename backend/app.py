@@ -14,6 +14,10 @@ _OLD_FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '
 FRONTEND_DIR = _REACT_DIST if os.path.isdir(_REACT_DIST) else _OLD_FRONTEND
 
 from db import get_db
+from indexes import start_background_index_build, ensure_collection_indexes
+from student_search import start_background_backfill
+from placement_names import start_background_name_backfill
+from skill_registry import ensure_builtin_skills, start_background_skill_migration
 
 def create_app():
     app = Flask(__name__, static_folder=None)
@@ -34,6 +38,7 @@ def create_app():
     from routes.admin import admin_bp
     from routes.config import config_bp
     from routes.jobs import jobs_bp
+    from routes.skills import skills_bp
     from routes.auth import auth_bp, ensure_admin_user
 
     app.register_blueprint(students_bp)
@@ -44,6 +49,7 @@ def create_app():
     app.register_blueprint(admin_bp)
     app.register_blueprint(config_bp)
     app.register_blueprint(jobs_bp)
+    app.register_blueprint(skills_bp)
     app.register_blueprint(auth_bp)
 
     # Create collections if they don't exist (optional in MongoDB)
@@ -54,6 +60,14 @@ def create_app():
             db_instance.command('ping')
             print("MongoDB connection successful.")
             ensure_admin_user()
+            # Unique skill keys must exist before anything interns skills concurrently
+            ensure_collection_indexes(db_instance, 'skills')
+            # Before serving, so a request interning 'node' cannot claim a built-in alias
+            ensure_builtin_skills(db_instance)
+            start_background_index_build(db_instance)
+            start_background_backfill(db_instance)
+            start_background_name_backfill(db_instance)
+            start_background_skill_migration(db_instance)
         except Exception as e:
             print(f"MongoDB connection failed: {str(e)}")
 
@@ -86,7 +100,8 @@ def create_app():
 
     return app
 
-app = create_app()
-
+# No module-level app: importing app.py (seed/migration scripts, spawned batch
+# workers) must not connect to MongoDB or start the background jobs.
+# gunicorn builds it with 'app:create_app()'.
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,91 @@
+"""
+Microbenchmark: per-company set intersection vs the vectorized skill matrix.
+Run: python bench_skill_matching.py
+     python bench_skill_matching.py --companies 10000 --students 50000 --sample 2000
+"""
+import sys
+import os
+import argparse
+import random
+import time
+
+# Add parent dir to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import skill_matcher
+
+
+def synthetic(companies, students, vocabulary, seed):
+    rnd = random.Random(seed)
+    skills = list(range(vocabulary))
+    company_docs = [{
+        '_id': f'company-{i}',
+        'name': f'Company {i}',
+        'industry': 'Technology',
+        'requirement_ids': rnd.sample(skills, rnd.randint(0, 12)),
+        'min_package': 4,
+        'max_package': 30
+    } for i in range(companies)]
+    student_docs = [{
+        '_id': f'student-{i}',
+        'skill_ids': rnd.sample(skills, rnd.randint(3, 15)),
+        'cgpa': round(rnd.uniform(5, 10), 2)
+    } for i in range(students)]
+    return company_docs, student_docs
+
+
+def bench(args):
+    companies, students = synthetic(args.companies, args.students, args.vocabulary, args.seed)
+    sample = students[:args.sample]
+    print(f"{args.companies} companies, {args.students} students "
+          f"({args.vocabulary} skills), timing {len(sample)} students")
+
+    started = time.perf_counter()
+    matrix = skill_matcher.SkillMatrix(companies)
+    build = time.perf_counter() - started
+    print(f"   Matrix build: {build * 1000:.1f} ms ({len(matrix.indices)} non-zeros)")
+
+    # Overlap counts and scores must agree with the set intersection before timing anything
+    for student in sample[:200]:
+        skills = set(student['skill_ids'])
+        expected = [len(skills & skill_matcher._requirements(c)) for c in companies]
+        assert matrix.overlap_counts(skills).tolist() == expected
+        key = skill_matcher.id_key(student['_id'])
+        assert matrix.scores(skills, student['cgpa'], key).tolist() == \
+            skill_matcher._python_scores(companies, skills, student['cgpa'], key)
+
+    started = time.perf_counter()
+    for student in sample:
+        skills = set(student['skill_ids'])
+        key = skill_matcher.id_key(student['_id'])
+        scores = skill_matcher._python_scores(companies, skills, student['cgpa'], key)
+        sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:skill_matcher.TOP_K]
+    legacy = (time.perf_counter() - started) / len(sample)
+
+    started = time.perf_counter()
+    for student in sample:
+        skills = set(student['skill_ids'])
+        key = skill_matcher.id_key(student['_id'])
+        matrix.top_k(matrix.scores(skills, student['cgpa'], key))
+    vectorized = (time.perf_counter() - started) / len(sample)
+
+    print(f"   Set intersection: {legacy * 1000:.3f} ms/student "
+          f"(~{legacy * args.students:.1f} s for all students)")
+    print(f"   Vectorized:       {vectorized * 1000:.3f} ms/student "
+          f"(~{vectorized * args.students:.1f} s for all students)")
+    print(f"   Speedup: {legacy / vectorized:.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--companies', type=int, default=10000)
+    parser.add_argument('--students', type=int, default=50000)
+    parser.add_argument('--vocabulary', type=int, default=2000)
+    parser.add_argument('--sample', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if not skill_matcher.NUMPY_AVAILABLE:
+        print("NumPy is not installed: pip install numpy")
+        sys.exit(1)
+    bench(args)
@@ -0,0 +1,105 @@
+"""
+Materialized per-branch placement rollup behind /api/analytics/branch-stats.
+
+The rollup is computed placement-first: confirmed placements are grouped by
+student once (keeping the earliest one, which is what the old per-student
+correlated $lookup picked up as `placement_info.0`), the student's branch is
+joined in by _id, and the result is merged with per-branch student counts.
+One document per branch is kept in `branch_rollup`, so reads are O(#branches);
+write paths call refresh_branches() for the branches they touched.
+"""
+from datetime import datetime
+
+
+def _student_counts(db, student_match):
+    return db.students.aggregate([
+        {'$match': student_match},
+        {'$group': {
+            '_id': '$branch',
+            'total': {'$sum': 1},
+            'placed': {'$sum': {'$cond': [{'$eq': ['$placed', True]}, 1, 0]}}
+        }}
+    ])
+
+
+def _first_package_averages(db, placement_match):
+    return db.placements.aggregate([
+        {'$match': placement_match},
+        {'$sort': {'_id': 1}},
+        {'$group': {'_id': '$student_id', 'package': {'$first': '$package'}}},
+        {'$lookup': {
+            'from': 'students',
+            'localField': '_id',
+            'foreignField': '_id',
+            'as': 'student'
+        }},
+        {'$unwind': '$student'},
+        {'$group': {'_id': '$student.branch', 'avg_package': {'$avg': '$package'}}}
+    ])
+
+
+def _compute_rows(db, branches=None):
+    """Rollup rows keyed by branch, for every branch or only the given ones."""
+    student_match = {}
+    placement_match = {'status': 'confirmed'}
+    if branches is not None:
+        student_match = {'branch': {'$in': list(branches)}}
+        student_ids = [s['_id'] for s in db.students.find(student_match, {'_id': 1})]
+        placement_match['student_id'] = {'$in': student_ids}
+
+    rows = {}
+    for r in _student_counts(db, student_match):
+        rows[r['_id']] = {'_id': r['_id'], 'total': r['total'], 'placed': r['placed'], 'avg_package': None}
+    for r in _first_package_averages(db, placement_match):
+        if r['_id'] in rows:
+            rows[r['_id']]['avg_package'] = r['avg_package']
+    return rows
+
+
+def _store_rows(db, rows, branches):
+    now = datetime.utcnow()
+    for branch, row in rows.items():
+        db.branch_rollup.replace_one({'_id': branch}, {**row, 'refreshed_at': now}, upsert=True)
+    # Branches that no longer have any students disappear from the payload
+    stale = [b for b in branches if b not in rows]
+    if stale:
+        db.branch_rollup.delete_many({'_id': {'$in': stale}})
+
+
+def rebuild_branch_rollup(db):
+    """Recompute every branch row from scratch."""
+    rows = _compute_rows(db)
+    existing = [r['_id'] for r in db.branch_rollup.find({}, {'_id': 1})]
+    _store_rows(db, rows, existing)
+    return len(rows)
+
+
+def refresh_branches(db, branches):
+    """Recompute the rows of the given branches after a student or placement write."""
+    branches = list(dict.fromkeys(branches))
+    if not branches:
+        return
+    _store_rows(db, _compute_rows(db, branches), branches)
+
+
+def get_branch_stats(db):
+    """The /api/analytics/branch-stats payload, built from the rollup."""
+    rows = list(db.branch_rollup.find({}).sort('_id', 1))
+    if not rows and db.students.estimated_document_count():
+        rebuild_branch_rollup(db)
+        rows = list(db.branch_rollup.find({}).sort('_id', 1))
+
+    data = []
+    for r in rows:
+        total = r['total']
+        placed = r['placed']
+        avg_pkg = r.get('avg_package') or 0
+
+        data.append({
+            'branch': r['_id'],
+            'total': total,
+            'placed': placed,
+            'not_placed': total - placed,
+            'avg_package': round(avg_pkg, 2)
+        })
+    return data
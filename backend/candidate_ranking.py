@@ -0,0 +1,69 @@
+"""
+Reverse matching: the students who best fit one company.
+
+Each student carries `skill_ids`, its canonical skill ids (skill_registry.py).
+The multikey (skill_ids, branch, cgpa) index makes it an inverted index from
+skill to students. A company's candidates are read with
+{'skill_ids': {'$in': requirement_ids}} plus the branch and minimum CGPA
+filters, so only students who share at least one required skill are fetched,
+and only their skill ids and CGPA.
+They are scored with the same function as /api/jobs/recommendations and
+reduced to the top k with a bounded heap. Names are read for the top k alone.
+"""
+import heapq
+from config import Config
+from skill_matcher import match_score, pair_seed
+
+DEFAULT_K = 50
+MAX_K = 500
+
+
+def rank_candidates(db, company, names, k=DEFAULT_K, branch=None, min_cgpa=None):
+    """Top k students for a company document, best match first; `names` maps skill ids to names."""
+    requirements = sorted(set(company.get('requirement_ids') or []))
+    if not requirements:
+        return []
+
+    query = {'skill_ids': {'$in': requirements}}
+    if branch:
+        query['branch'] = branch
+    if min_cgpa is not None:
+        query['cgpa'] = {'$gte': min_cgpa}
+
+    required = set(requirements)
+    jitter = Config.RECOMMENDATION_JITTER
+
+    def scored(cursor):
+        for s in cursor:
+            # The 7.0 fallback only scores a missing CGPA; the response reports the stored value
+            cgpa = s.get('cgpa') if isinstance(s.get('cgpa'), (int, float)) else 7.0
+            keys = set(s.get('skill_ids') or [])
+            score = match_score(required, keys, cgpa, pair_seed(s['_id'], company['_id']), jitter)
+            yield (score, cgpa, str(s['_id'])), s, keys
+
+    cursor = db.students.find(query, {'skill_ids': 1, 'cgpa': 1}).batch_size(5000)
+    top = heapq.nlargest(k, scored(cursor), key=lambda item: item[0])
+
+    details = {
+        s['_id']: s for s in db.students.find(
+            {'_id': {'$in': [s['_id'] for _, s, _ in top]}},
+            {'name': 1, 'email': 1, 'branch': 1, 'placed': 1}
+        )
+    }
+    candidates = []
+    for (score, _, _), s, keys in top:
+        student_id = s['_id']
+        student = details.get(student_id)
+        if student is None:  # Deleted mid-request
+            continue
+        candidates.append({
+            'id': str(student_id),
+            'name': student.get('name'),
+            'email': student.get('email'),
+            'branch': student.get('branch'),
+            'cgpa': s.get('cgpa'),
+            'placed': student.get('placed', False),
+            'match_score': int(score),
+            'matched_skills': sorted(names.get(i, str(i)) for i in keys & required)
+        })
+    return candidates
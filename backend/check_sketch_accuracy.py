@@ -0,0 +1,79 @@
+"""
+Deterministic accuracy check for the package quantile sketches.
+Builds sketches from fixed seeded package lists (including merged and
+subtracted sketches, as the $inc write paths produce) and compares every
+quantile with the exact numpy.percentile(method='lower') value, the rank
+floor(q * (n - 1)) element the sketch estimates. Exits non-zero on failure.
+Run: python check_sketch_accuracy.py
+"""
+import sys
+import os
+import random
+
+# Add parent dir to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from package_sketches import PackageSketch, RELATIVE_ACCURACY
+
+QUANTILES = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0)
+# Small slack for floating point at bucket boundaries
+BOUND = RELATIVE_ACCURACY * 1.0001
+
+
+def datasets(seed=42):
+    rnd = random.Random(seed)
+    yield 'lognormal', [round(rnd.lognormvariate(2.2, 0.6), 2) for _ in range(20000)]
+    yield 'uniform', [round(rnd.uniform(3, 45), 2) for _ in range(5000)]
+    yield 'heavy tail', [round(rnd.paretovariate(1.5) * 4, 2) for _ in range(5000)]
+    yield 'tiny', [12.5, 4.0, 7.25]
+    yield 'repeated', [6.0] * 500 + [60.0] * 5
+
+
+def sketch_of(values):
+    sketch = PackageSketch()
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def variants(values, seed=42):
+    """The same distribution built directly, by merging halves, and after removals."""
+    yield 'direct', sketch_of(values), values
+
+    half = len(values) // 2
+    yield 'merged', sketch_of(values[:half]).merge(sketch_of(values[half:])), values
+
+    rnd = random.Random(seed)
+    removed = [round(rnd.uniform(1, 80), 2) for _ in range(len(values) // 4)]
+    sketch = sketch_of(values + removed)
+    for value in removed:
+        sketch.add(value, -1)
+    yield 'with removals', sketch, values
+
+
+def check():
+    failures = 0
+    worst = 0.0
+    for name, values in datasets():
+        for variant, sketch, expected in variants(values):
+            if sketch.count != len(expected):
+                print(f"FAIL {name}/{variant}: count {sketch.count} != {len(expected)}")
+                failures += 1
+                continue
+            for q in QUANTILES:
+                truth = float(np.percentile(expected, q * 100, method='lower'))
+                estimate = sketch.quantile(q)
+                error = abs(estimate - truth) / abs(truth) if truth else abs(estimate)
+                worst = max(worst, error)
+                if error > BOUND:
+                    print(f"FAIL {name}/{variant} p{q * 100:g}: exact {truth}, "
+                          f"estimate {estimate:.4f}, error {error:.4%}")
+                    failures += 1
+
+    print(f"Max relative error {worst:.4%} (bound {RELATIVE_ACCURACY:.2%}), {failures} failures")
+    return failures == 0
+
+
+if __name__ == '__main__':
+    sys.exit(0 if check() else 1)
@@ -0,0 +1,194 @@
+"""
+Typed columnar exports (Parquet and Arrow IPC stream) for offline analysis.
+
+Record batches are built straight from Mongo cursors, CHUNK_SIZE documents at
+a time, with real column types (float64 CGPA/package, timestamp dates, bool
+flags) and dictionary-encoded categorical columns (branch, gender, industry,
+status, skills). Each batch is written to an in-memory sink that is drained
+after every write, so iter_columnar() yields bytes incrementally for a
+streaming response, and export_data.py uses the same generator to write
+files.
+"""
+import io
+from company_catalog import get_catalog
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+CHUNK_SIZE = 10000
+CURSOR_BATCH_SIZE = 2000
+
+DATASETS = ('students', 'placements')
+FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow')
+}
+
+# (column, arrow type factory, dictionary encoded)
+_STUDENT_COLUMNS = [
+    ('id', lambda: pa.string(), False),
+    ('name', lambda: pa.string(), False),
+    ('email', lambda: pa.string(), False),
+    ('branch', lambda: pa.string(), True),
+    ('cgpa', lambda: pa.float64(), False),
+    ('skills', lambda: pa.list_(pa.string()), True),
+    ('projects', lambda: pa.int32(), False),
+    ('internships', lambda: pa.int32(), False),
+    ('placed', lambda: pa.bool_(), False),
+    ('gender', lambda: pa.string(), True),
+    ('created_at', lambda: pa.timestamp('ms'), False)
+]
+
+_PLACEMENT_COLUMNS = [
+    ('id', lambda: pa.string(), False),
+    ('student_id', lambda: pa.string(), False),
+    ('company_id', lambda: pa.string(), False),
+    ('student_name', lambda: pa.string(), False),
+    ('student_branch', lambda: pa.string(), True),
+    ('company_name', lambda: pa.string(), True),
+    ('industry', lambda: pa.string(), True),
+    ('role', lambda: pa.string(), True),
+    ('package', lambda: pa.float64(), False),
+    ('placement_date', lambda: pa.timestamp('ms'), False),
+    ('status', lambda: pa.string(), True)
+]
+
+
+def _number(value):
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _integer(value):
+    return int(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _student_record(s, _):
+    return {
+        'id': str(s['_id']),
+        'name': s.get('name'),
+        'email': s.get('email'),
+        'branch': s.get('branch'),
+        'cgpa': _number(s.get('cgpa')),
+        'skills': [str(k) for k in s.get('skills') or []],
+        'projects': _integer(s.get('projects')),
+        'internships': _integer(s.get('internships')),
+        'placed': s.get('placed') is True,
+        'gender': s.get('gender'),
+        'created_at': s.get('created_at')
+    }
+
+
+def _placement_record(p, companies):
+    company = companies.get(p.get('company_id')) or {}
+    return {
+        'id': str(p['_id']),
+        'student_id': str(p['student_id']) if p.get('student_id') else None,
+        'company_id': str(p['company_id']) if p.get('company_id') else None,
+        'student_name': p.get('student_name'),
+        'student_branch': p.get('student_branch'),
+        'company_name': p.get('company_name'),
+        'industry': company.get('industry'),
+        'role': p.get('role'),
+        'package': _number(p.get('package')),
+        'placement_date': p.get('placement_date'),
+        'status': p.get('status')
+    }
+
+
+def _dataset(db, name):
+    """(columns, cursor, record builder, lookup context) for a dataset name."""
+    if name == 'students':
+        cursor = db.students.find({}, {'search_tokens': 0, 'skill_ids': 0, 'resume_text': 0})
+        return _STUDENT_COLUMNS, cursor, _student_record, None
+    if name == 'placements':
+        return _PLACEMENT_COLUMNS, db.placements.find({}), _placement_record, get_catalog(db).by_id
+    raise ValueError(f'Unknown dataset: {name}')
+
+
+def _schema(columns):
+    fields = []
+    for column, arrow_type, dictionary in columns:
+        value_type = arrow_type()
+        if dictionary and pa.types.is_list(value_type):
+            value_type = pa.list_(pa.dictionary(pa.int32(), value_type.value_type))
+        elif dictionary:
+            value_type = pa.dictionary(pa.int32(), value_type)
+        fields.append(pa.field(column, value_type))
+    return pa.schema(fields)
+
+
+def _record_batch(columns, schema, records):
+    arrays = []
+    for (column, arrow_type, dictionary), field in zip(columns, schema):
+        values = pa.array([r[column] for r in records], type=arrow_type())
+        if dictionary and pa.types.is_list(values.type):
+            offsets = values.offsets
+            encoded = values.flatten().dictionary_encode()
+            values = pa.ListArray.from_arrays(offsets, encoded, mask=values.is_null())
+        elif dictionary:
+            values = values.dictionary_encode()
+        arrays.append(values.cast(field.type) if values.type != field.type else values)
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _DrainingSink(io.RawIOBase):
+    """Write-only file object whose buffered bytes are taken with drain()."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_columnar(db, dataset, fmt, chunk_size=CHUNK_SIZE, on_rows=None):
+    """
+    Yield a Parquet file or Arrow IPC stream of `dataset` as byte chunks;
+    on_rows(n) is called with the running row count after every batch.
+    """
+    columns, cursor, to_record, context = _dataset(db, dataset)
+    schema = _schema(columns)
+    sink = _DrainingSink()
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    elif fmt == 'arrow':
+        writer = pa.ipc.new_stream(sink, schema)
+    else:
+        raise ValueError(f'Unknown format: {fmt}')
+
+    records = []
+    written = 0
+    for doc in cursor.batch_size(CURSOR_BATCH_SIZE):
+        records.append(to_record(doc, context))
+        if len(records) >= chunk_size:
+            writer.write_batch(_record_batch(columns, schema, records))
+            written += len(records)
+            records = []
+            if on_rows:
+                on_rows(written)
+            yield sink.drain()
+    if records:
+        writer.write_batch(_record_batch(columns, schema, records))
+        written += len(records)
+        if on_rows:
+            on_rows(written)
+    writer.close()
+    yield sink.drain()
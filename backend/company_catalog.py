@@ -0,0 +1,95 @@
+"""
+Versioned in-process snapshot of the company catalog.
+
+The catalog is small and rarely written, so the companies list, the industry
+list and the pre-serialized JSON for every industry filter are built once and
+served from memory. Company writes call bump_catalog_version(), which
+increments a version document in `catalog_versions`; readers compare their
+snapshot's version against it at most once per CHECK_INTERVAL seconds, which
+keeps separate worker processes (and scripts like seed_data.py) in sync with
+a single _id lookup instead of a collection read. The version doubles as the
+ETag for the catalog endpoints.
+"""
+import hashlib
+import json
+import threading
+import time
+from pymongo import ReturnDocument
+from models import Company
+
+VERSION_ID = 'companies'
+CHECK_INTERVAL = 1.0
+
+
+def _dumps(payload):
+    return json.dumps(payload, sort_keys=True, separators=(',', ':')).encode() + b'\n'
+
+
+class CompanyCatalog:
+    def __init__(self, docs, version):
+        self.version = version
+        self.docs = docs
+        self.by_id = {doc['_id']: doc for doc in docs}
+        self.industries = sorted({doc['industry'] for doc in docs if doc.get('industry') is not None})
+
+        serialized = [Company.to_dict(dict(doc)) for doc in docs]
+        self.payloads = {None: _dumps(serialized)}
+        for industry in self.industries:
+            self.payloads[industry] = _dumps([c for c in serialized if c.get('industry') == industry])
+        self.industries_payload = _dumps(self.industries)
+
+    def payload(self, industry=None):
+        """Pre-serialized company list, optionally for one industry."""
+        return self.payloads.get(industry, b'[]\n')
+
+    def etag(self, key=''):
+        digest = hashlib.sha1(str(key).encode()).hexdigest()[:8]
+        return f'catalog-{self.version}-{digest}'
+
+
+_lock = threading.Lock()
+_catalog = None
+_checked_at = 0.0
+_local_bumps = 0
+
+
+def current_version(db):
+    doc = db.catalog_versions.find_one({'_id': VERSION_ID})
+    return doc['version'] if doc else 0
+
+
+def bump_catalog_version(db):
+    """Mark the catalog stale in every process; call after any company write."""
+    global _catalog, _local_bumps
+    doc = db.catalog_versions.find_one_and_update(
+        {'_id': VERSION_ID},
+        {'$inc': {'version': 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    with _lock:
+        _catalog = None
+        _local_bumps += 1
+    return doc['version']
+
+
+def get_catalog(db):
+    """The current catalog, rebuilt when the stored version moves on."""
+    global _catalog, _checked_at
+    now = time.monotonic()
+    with _lock:
+        catalog = _catalog
+        bumps = _local_bumps
+        if catalog is not None and now - _checked_at < CHECK_INTERVAL:
+            return catalog
+
+    version = current_version(db)
+    if catalog is None or catalog.version != version:
+        # Read the version before the documents so a concurrent write is caught next check
+        catalog = CompanyCatalog(list(db.companies.find({}).sort('name', 1)), version)
+
+    with _lock:
+        # A write in this process while we were building forces a recheck next time
+        _catalog = catalog
+        _checked_at = now if bumps == _local_bumps else 0.0
+    return catalog
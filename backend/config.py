@@ -15,3 +15,21 @@ class Config:
     MONGO_DB_NAME = os.getenv('MONGO_DB_NAME', 'student_analyzer').strip("'\" ")
     GROQ_API_KEY = os.getenv('GROQ_API_KEY', '').strip("'\" ")
     GROQ_MODEL = os.getenv('GROQ_MODEL', 'llama-3.3-70b-versatile').strip("'\" ")
+
+    # Upper bound on how long a cached analytics response (and its ETag) survives
+    # without an in-process write; covers writes made by other processes/scripts
+    ANALYTICS_CACHE_TTL = int(os.getenv('ANALYTICS_CACHE_TTL', '300'))
+
+    # Background export jobs: output directory, worker threads, and how long a
+    # finished export is reused for an identical request while its data is unchanged
+    EXPORT_DIR = os.getenv('EXPORT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exports'))
+    EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', '1'))
+    EXPORT_FRESH_SECONDS = int(os.getenv('EXPORT_FRESH_SECONDS', '600'))
+    EXPORT_RETENTION_HOURS = int(os.getenv('EXPORT_RETENTION_HOURS', '24'))
+
+    # Job recommendations: seeded per (student, company) score jitter, and how many
+    # students' results each process memoizes
+    RECOMMENDATION_JITTER = os.getenv('RECOMMENDATION_JITTER', '1') == '1'
+    RECOMMENDATION_CACHE_SIZE = int(os.getenv('RECOMMENDATION_CACHE_SIZE', '10000'))
+    # Worker processes for the campus-wide batch run (0 = one per CPU)
+    RECOMMENDATION_WORKERS = int(os.getenv('RECOMMENDATION_WORKERS', '0')) or os.cpu_count() or 1
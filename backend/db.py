@@ -1,4 +1,5 @@
 from pymongo import MongoClient
+from pymongo.topology_description import TOPOLOGY_TYPE
 from config import Config
 
 # Global db client
@@ -9,3 +10,11 @@ def get_db():
     if mongo_client is None:
         mongo_client = MongoClient(Config.MONGO_URI)
     return mongo_client[Config.MONGO_DB_NAME]
+
+
+def supports_transactions(client):
+    """True when connected to a replica set or sharded cluster (multi-document transactions)."""
+    topology = getattr(client, 'topology_description', None)
+    if topology is None:
+        return False
+    return topology.topology_type in (TOPOLOGY_TYPE.ReplicaSetWithPrimary, TOPOLOGY_TYPE.Sharded)
@@ -0,0 +1,41 @@
+"""
+Export students or placements as Parquet or an Arrow IPC stream.
+Run: python export_data.py students
+     python export_data.py placements --format arrow --output placements.arrow
+"""
+import sys
+import os
+import argparse
+
+# Add parent dir to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from db import get_db
+import columnar_export
+
+
+def export(dataset, fmt, output):
+    app = create_app()
+    with app.app_context():
+        db = get_db()
+        written = 0
+        with open(output, 'wb') as f:
+            for chunk in columnar_export.iter_columnar(db, dataset, fmt):
+                f.write(chunk)
+                written += len(chunk)
+        print(f"Wrote {dataset} to {output} ({written / 1024:.1f} KiB)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('dataset', choices=columnar_export.DATASETS)
+    parser.add_argument('--format', choices=sorted(columnar_export.FORMATS), default='parquet')
+    parser.add_argument('--output', help='Defaults to <dataset>_export.<format>')
+    args = parser.parse_args()
+
+    if not columnar_export.PYARROW_AVAILABLE:
+        print("pyarrow is not installed: pip install pyarrow")
+        sys.exit(1)
+    extension = columnar_export.FORMATS[args.format][1]
+    export(args.dataset, args.format, args.output or f'{args.dataset}_export.{extension}')
@@ -0,0 +1,241 @@
+"""
+Background export jobs.
+
+POST /api/admin/exports records a job in `export_jobs` and hands it to a
+small in-process thread pool, so a long export never holds a request (or the
+single gunicorn worker) past its timeout. The worker writes the file under
+Config.EXPORT_DIR (to a .part file renamed on success) and records progress on
+the job document, which any process can poll.
+
+Requests are deduplicated: an identical (dataset, format) job that is still
+queued/running, or finished less than Config.EXPORT_FRESH_SECONDS ago with
+unchanged source collections, is returned instead of starting a new one.
+"Unchanged" compares the persisted data_version() counters, so writes from
+any process count. Active jobs hold a unique `active_key`, so two processes
+cannot start the same export, and a job whose heartbeat is older than
+STALE_AFTER (its process died) is marked failed. Running exports also
+heartbeat the jobs queued behind them in the same process, so a long export
+does not get the rest of the queue failed.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from config import Config
+from response_cache import data_version
+from indexes import ensure_collection_indexes
+from exports import iter_csv, gzip_chunks, student_rows, placement_rows, STUDENT_HEADER, PLACEMENT_HEADER
+import columnar_export
+
+# Dataset -> collections whose writes make an existing export stale
+DATASETS = {
+    'students': ('students',),
+    'placements': ('placements', 'companies')
+}
+
+# Format -> (file extension, mimetype)
+FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'csv.gz': ('csv.gz', 'application/gzip'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrow', 'application/vnd.apache.arrow.stream')
+}
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+PROGRESS_EVERY = 5000
+# A queued/running job without a heartbeat for this long is treated as dead
+STALE_AFTER = timedelta(minutes=10)
+
+ACTIVE_STATUSES = ['queued', 'running']
+
+_lock = threading.Lock()
+_executor = None
+_indexed = False
+# Ids of jobs submitted by this process that no worker has picked up yet
+_waiting = set()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(Config.EXPORT_WORKERS, 1), thread_name_prefix='export')
+        return _executor
+
+
+def job_to_dict(job):
+    return {
+        'id': str(job['_id']),
+        'dataset': job['dataset'],
+        'format': job['format'],
+        'status': job['status'],
+        'rows': job.get('rows', 0),
+        'total_rows': job.get('total_rows'),
+        'size': job.get('size'),
+        'error': job.get('error'),
+        'created_at': job['created_at'].isoformat(),
+        'started_at': job['started_at'].isoformat() if job.get('started_at') else None,
+        'finished_at': job['finished_at'].isoformat() if job.get('finished_at') else None,
+        'download_url': f"/api/admin/exports/{job['_id']}/download" if job['status'] == 'done' else None
+    }
+
+
+def _chunks(db, dataset, fmt, progress):
+    if fmt in COLUMNAR_FORMATS:
+        return columnar_export.iter_columnar(db, dataset, fmt, on_rows=progress)
+
+    header, rows = (STUDENT_HEADER, student_rows(db)) if dataset == 'students' else (PLACEMENT_HEADER, placement_rows(db))
+
+    def counted(rows):
+        count = 0
+        for row in rows:
+            yield row
+            count += 1
+            if count % PROGRESS_EVERY == 0:
+                progress(count)
+        progress(count)
+
+    chunks = iter_csv(header, counted(rows))
+    return gzip_chunks(chunks) if fmt == 'csv.gz' else chunks
+
+
+def _heartbeat_waiting(db, now):
+    with _lock:
+        waiting = list(_waiting)
+    if waiting:
+        db.export_jobs.update_many(
+            {'_id': {'$in': waiting}, 'status': 'queued'},
+            {'$set': {'heartbeat_at': now}}
+        )
+
+
+def _run(db, job_id):
+    with _lock:
+        _waiting.discard(job_id)
+    job = db.export_jobs.find_one_and_update(
+        {'_id': job_id, 'status': 'queued'},
+        {'$set': {'status': 'running', 'started_at': datetime.utcnow(), 'heartbeat_at': datetime.utcnow()}}
+    )
+    if job is None:
+        return
+
+    path = os.path.join(Config.EXPORT_DIR, f"{job_id}.{FORMATS[job['format']][0]}")
+    partial = path + '.part'
+
+    def progress(rows):
+        now = datetime.utcnow()
+        db.export_jobs.update_one(
+            {'_id': job_id},
+            {'$set': {'rows': rows, 'heartbeat_at': now}}
+        )
+        _heartbeat_waiting(db, now)
+
+    try:
+        os.makedirs(Config.EXPORT_DIR, exist_ok=True)
+        with open(partial, 'wb') as f:
+            for chunk in _chunks(db, job['dataset'], job['format'], progress):
+                f.write(chunk)
+        os.replace(partial, path)
+        db.export_jobs.update_one({'_id': job_id}, {'$set': {
+            'status': 'done',
+            'path': path,
+            'size': os.path.getsize(path),
+            'finished_at': datetime.utcnow()
+        }, '$unset': {'active_key': ''}})
+    except Exception as e:
+        print(f"Export {job_id} failed: {str(e)}")
+        if os.path.exists(partial):
+            os.remove(partial)
+        db.export_jobs.update_one({'_id': job_id}, {'$set': {
+            'status': 'failed',
+            'error': str(e),
+            'finished_at': datetime.utcnow()
+        }, '$unset': {'active_key': ''}})
+
+
+def _fail_stale(db, now):
+    """Mark failed the queued/running jobs whose process stopped heartbeating."""
+    db.export_jobs.update_many(
+        {'status': {'$in': ACTIVE_STATUSES}, 'heartbeat_at': {'$lt': now - STALE_AFTER}},
+        {'$set': {'status': 'failed', 'error': 'Export stopped responding', 'finished_at': now},
+         '$unset': {'active_key': ''}}
+    )
+
+
+def _sweep(db, now):
+    """Delete files and records of finished exports past the retention window."""
+    cutoff = now - timedelta(hours=Config.EXPORT_RETENTION_HOURS)
+    expired = list(db.export_jobs.find(
+        {'created_at': {'$lt': cutoff}, 'status': {'$nin': ACTIVE_STATUSES}}, {'path': 1}
+    ))
+    for job in expired:
+        if job.get('path') and os.path.exists(job['path']):
+            os.remove(job['path'])
+    if expired:
+        db.export_jobs.delete_many({'_id': {'$in': [job['_id'] for job in expired]}})
+
+
+def enqueue_export(db, dataset, fmt):
+    """Start (or reuse) an export job. Returns (job document, created)."""
+    global _indexed
+    if dataset not in DATASETS or fmt not in FORMATS:
+        raise ValueError(f'Unknown export {dataset}/{fmt}')
+    if not _indexed:
+        ensure_collection_indexes(db, 'export_jobs')
+        _indexed = True
+
+    now = datetime.utcnow()
+    active_key = f'{dataset}/{fmt}'
+    source_version = data_version(db, DATASETS[dataset])
+    _fail_stale(db, now)
+    _sweep(db, now)
+
+    active = db.export_jobs.find_one({'active_key': active_key})
+    if active:
+        return active, False
+
+    fresh = db.export_jobs.find_one({
+        'dataset': dataset,
+        'format': fmt,
+        'status': 'done',
+        'source_version': source_version,
+        'finished_at': {'$gte': now - timedelta(seconds=Config.EXPORT_FRESH_SECONDS)}
+    }, sort=[('finished_at', -1)])
+    if fresh and os.path.exists(fresh['path']):
+        return fresh, False
+
+    job = {
+        '_id': ObjectId(),
+        'dataset': dataset,
+        'format': fmt,
+        'status': 'queued',
+        'active_key': active_key,
+        'rows': 0,
+        'total_rows': db[dataset].estimated_document_count(),
+        'source_version': source_version,
+        'created_at': now,
+        'heartbeat_at': now
+    }
+    try:
+        db.export_jobs.insert_one(job)
+    except DuplicateKeyError:
+        # Another process started the same export first
+        active = db.export_jobs.find_one({'active_key': active_key})
+        return (active, False) if active else enqueue_export(db, dataset, fmt)
+
+    with _lock:
+        _waiting.add(job['_id'])
+    _get_executor().submit(_run, db, job['_id'])
+    return job, True
+
+
+def list_jobs(db, limit=20):
+    _fail_stale(db, datetime.utcnow())
+    return list(db.export_jobs.find({}).sort('created_at', -1).limit(limit))
+
+
+def get_job(db, job_id):
+    _fail_stale(db, datetime.utcnow())
+    return db.export_jobs.find_one({'_id': job_id})
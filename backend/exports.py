@@ -0,0 +1,68 @@
+"""
+Streaming data exports.
+
+Each export is a header plus a row generator reading a projected cursor, so a
+large export is produced a chunk at a time: iter_csv() renders rows through a
+small reused buffer, and gzip_chunks() compresses the chunks on the fly.
+"""
+import csv
+import io
+import zlib
+
+CURSOR_BATCH_SIZE = 2000
+CHUNK_ROWS = 500
+
+STUDENT_HEADER = ['ID', 'Name', 'Email', 'Branch', 'CGPA', 'Skills', 'Projects', 'Internships', 'Placed', 'Gender']
+STUDENT_PROJECTION = {
+    'name': 1, 'email': 1, 'branch': 1, 'cgpa': 1, 'skills': 1,
+    'projects': 1, 'internships': 1, 'placed': 1, 'gender': 1
+}
+
+PLACEMENT_HEADER = ['ID', 'Student', 'Company', 'Role', 'Package (LPA)', 'Date', 'Status']
+PLACEMENT_PROJECTION = {
+    'student_name': 1, 'company_name': 1, 'role': 1, 'package': 1, 'placement_date': 1, 'status': 1
+}
+
+
+def student_rows(db):
+    for s in db.students.find({}, STUDENT_PROJECTION).batch_size(CURSOR_BATCH_SIZE):
+        skills = s.get('skills', [])
+        yield [str(s['_id']), s.get('name'), s.get('email'), s.get('branch'), s.get('cgpa'),
+               ', '.join(skills), s.get('projects'), s.get('internships'),
+               'Yes' if s.get('placed') else 'No', s.get('gender')]
+
+
+def placement_rows(db):
+    # Names are denormalized onto placements, so this is a plain scan
+    for p in db.placements.find({}, PLACEMENT_PROJECTION).batch_size(CURSOR_BATCH_SIZE):
+        date_str = p.get('placement_date').strftime('%Y-%m-%d') if p.get('placement_date') else ''
+        yield [str(p['_id']), p.get('student_name') or '', p.get('company_name') or '',
+               p.get('role'), p.get('package'), date_str, p.get('status')]
+
+
+def iter_csv(header, rows, chunk_rows=CHUNK_ROWS):
+    """Yield the CSV as UTF-8 chunks of about `chunk_rows` rows each."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    pending = 1
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks, level=6):
+    """Gzip a byte-chunk stream incrementally."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,194 @@
+"""
+Secondary index declarations for every query shape used by the routes.
+
+All indexes are declared here in one place. ensure_indexes() creates whatever
+is missing (idempotently), rebuilds indexes whose options no longer match the
+declaration and drops RETIRED_INDEXES. index_report() compares the
+declarations with what the server has, using $indexStats to flag indexes
+that are never used.
+"""
+import threading
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+# (collection, keys, options)
+DECLARED_INDEXES = [
+    # $lookup / cascade deletes / per-student and per-company placement reads
+    ('placements', [('student_id', ASCENDING)], {}),
+    ('placements', [('company_id', ASCENDING)], {}),
+    # Confirmed-placement scans, (placement_date, _id)-sorted listings and keyset
+    # pages in get_placements, and min/max package lookups
+    ('placements', [('placement_date', DESCENDING), ('_id', DESCENDING)], {}),
+    ('placements', [('status', ASCENDING), ('placement_date', DESCENDING), ('_id', DESCENDING)], {}),
+    ('placements', [('status', ASCENDING), ('package', ASCENDING)], {}),
+
+    # Filtered, (name, _id)-sorted student list and keyset pages in get_students
+    ('students', [('name', ASCENDING), ('_id', ASCENDING)], {}),
+    ('students', [('branch', ASCENDING), ('name', ASCENDING), ('_id', ASCENDING)], {}),
+    ('students', [('placed', ASCENDING), ('name', ASCENDING), ('_id', ASCENDING)], {}),
+    ('students', [('email', ASCENDING)], {}),
+    # Anchored prefix search / autocomplete over normalized name and email tokens
+    ('students', [('search_tokens', ASCENDING)], {}),
+    # Skill id -> students inverted index for company candidate ranking, with
+    # the branch / minimum CGPA filters applied inside the index
+    ('students', [('skill_ids', ASCENDING), ('branch', ASCENDING), ('cgpa', DESCENDING)], {}),
+
+    # Login and registration lookups
+    ('users', [('email', ASCENDING), ('role', ASCENDING)], {}),
+    ('users', [('username', ASCENDING), ('role', ASCENDING)], {}),
+
+    # Skill registry lookups by any normalized spelling; unique so two writers
+    # cannot register the same spelling twice
+    ('skills', [('keys', ASCENDING)], {'unique': True}),
+
+    # At most one queued/running job per key; the field is unset once a job ends
+    ('export_jobs', [('active_key', ASCENDING)], {'unique': True, 'sparse': True}),
+    ('recommendation_runs', [('active_key', ASCENDING)], {'unique': True, 'sparse': True}),
+
+    # Test history for a student, newest first
+    ('test_history', [('student_id', ASCENDING), ('completed_at', DESCENDING)], {}),
+
+    # Day buckets of the placement time-series rollup, range-scanned by date
+    ('placement_timeseries', [('dim', ASCENDING), ('key', ASCENDING), ('date', ASCENDING)], {'unique': True}),
+
+    # One package quantile sketch per scope
+    ('package_sketches', [('dim', ASCENDING), ('key', ASCENDING)], {'unique': True}),
+]
+
+# Indexes an earlier release created that no query uses any more; ensure_indexes()
+# drops them so writes stop maintaining them
+RETIRED_INDEXES = [
+    # Lowercased skill strings for candidate ranking, superseded by skill_ids
+    ('students', 'skill_keys_1_branch_1_cgpa_-1'),
+]
+
+
+def index_name(keys):
+    """Default MongoDB index name for a key list, e.g. 'branch_1_name_1'."""
+    return '_'.join(f'{field}_{direction}' for field, direction in keys)
+
+
+# Index options that change what an index enforces or holds
+COMPARED_OPTIONS = ('unique', 'sparse', 'partialFilterExpression', 'expireAfterSeconds')
+
+
+def _options(info):
+    return {option: info[option] for option in COMPARED_OPTIONS if info.get(option)}
+
+
+def _existing(collection):
+    """Map of key tuple -> (index name, compared options) for the indexes on a collection."""
+    existing = {}
+    for name, info in collection.index_information().items():
+        existing[tuple((field, direction) for field, direction in info['key'])] = (name, _options(info))
+    return existing
+
+
+def _existing_keys(collection):
+    """Map of key tuple -> index name for the indexes present on a collection."""
+    return {keys: name for keys, (name, _) in _existing(collection).items()}
+
+
+def ensure_indexes(db):
+    """
+    Create every declared index that is missing and rebuild the ones whose
+    options differ from the declaration. A failed build is logged and skipped
+    so it does not hold up the rest. Returns the created names.
+    """
+    created = []
+    existing_by_collection = {}
+    for collection_name, keys, options in DECLARED_INDEXES:
+        collection = db[collection_name]
+        try:
+            if collection_name not in existing_by_collection:
+                existing_by_collection[collection_name] = _existing(collection)
+            existing = existing_by_collection[collection_name]
+
+            current = existing.get(tuple(keys))
+            if current is not None:
+                name, current_options = current
+                if current_options == _options(options):
+                    continue
+                # Same keys with other options: MongoDB will not hold both, so replace it
+                print(f"Rebuilding index {collection_name}.{name}: {current_options} -> {_options(options)}")
+                collection.drop_index(name)
+                try:
+                    name = collection.create_index(keys, name=index_name(keys), background=True, **options)
+                except Exception:
+                    collection.create_index(keys, name=name, background=True, **current_options)
+                    raise
+            else:
+                name = collection.create_index(keys, name=index_name(keys), background=True, **options)
+            existing[tuple(keys)] = (name, _options(options))
+            created.append(f'{collection_name}.{name}')
+        except Exception as e:
+            print(f"Index build {collection_name}.{index_name(keys)} failed: {str(e)}")
+
+    for collection_name, name in RETIRED_INDEXES:
+        try:
+            if name in db[collection_name].index_information():
+                db[collection_name].drop_index(name)
+                print(f"Dropped retired index {collection_name}.{name}")
+        except Exception as e:
+            print(f"Dropping index {collection_name}.{name} failed: {str(e)}")
+    return created
+
+
+def ensure_collection_indexes(db, collection_name):
+    """Create one collection's declared indexes now, for code that relies on a unique one."""
+    for name, keys, options in DECLARED_INDEXES:
+        if name == collection_name:
+            db[name].create_index(keys, name=index_name(keys), **options)
+
+
+def start_background_index_build(db):
+    """Run ensure_indexes() on a daemon thread so startup is not blocked by builds."""
+    def build():
+        try:
+            created = ensure_indexes(db)
+            if created:
+                print(f"Created indexes: {', '.join(created)}")
+        except Exception as e:
+            print(f"Index build failed: {str(e)}")
+
+    thread = threading.Thread(target=build, name='index-bootstrap', daemon=True)
+    thread.start()
+    return thread
+
+
+def _usage_by_name(collection):
+    """Map of index name -> access count since server start, or {} when unsupported."""
+    try:
+        stats = collection.aggregate([{'$indexStats': {}}])
+        return {s['name']: s.get('accesses', {}).get('ops', 0) for s in stats}
+    except OperationFailure:
+        return {}
+
+
+def index_report(db):
+    """Declared indexes with presence and usage, plus the absent and unused subsets."""
+    indexes = []
+    existing_by_collection = {}
+    usage_by_collection = {}
+
+    for collection_name, keys, _ in DECLARED_INDEXES:
+        collection = db[collection_name]
+        if collection_name not in existing_by_collection:
+            existing_by_collection[collection_name] = _existing_keys(collection)
+            usage_by_collection[collection_name] = _usage_by_name(collection)
+
+        actual_name = existing_by_collection[collection_name].get(tuple(keys))
+        ops = usage_by_collection[collection_name].get(actual_name) if actual_name else None
+        indexes.append({
+            'collection': collection_name,
+            'name': actual_name or index_name(keys),
+            'keys': [[field, direction] for field, direction in keys],
+            'present': actual_name is not None,
+            'ops': ops
+        })
+
+    return {
+        'indexes': indexes,
+        'missing': [f"{i['collection']}.{i['name']}" for i in indexes if not i['present']],
+        'unused': [f"{i['collection']}.{i['name']}" for i in indexes if i['present'] and i['ops'] == 0]
+    }
@@ -7,6 +7,11 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app
 from db import get_db
+from analytics_snapshot import apply_student_created
+from branch_rollup import refresh_branches
+from student_search import search_tokens
+from skill_registry import intern_skill_ids
+from response_cache import bump_generation
 
 def insert_test_student():
     app = create_app()
@@ -33,7 +38,13 @@ def insert_test_student():
             print(f"Student with email {test_student['email']} already exists.")
             return
             
+        test_student['search_tokens'] = search_tokens(test_student)
+        test_student['skill_ids'] = intern_skill_ids(db, test_student['skills'])
         result = db.students.insert_one(test_student)
+        test_student['_id'] = result.inserted_id
+        apply_student_created(db, test_student)
+        refresh_branches(db, [test_student['branch']])
+        bump_generation('students')
         print(f"Successfully inserted test student with ID: {result.inserted_id}")
         print(f"Email: {test_student['email']}")
 
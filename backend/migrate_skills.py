@@ -0,0 +1,31 @@
+"""
+One-off migration to the canonical skill registry: registers the built-in
+skills and aliases, then stores skill_ids on students and requirement_ids on
+companies that do not have them yet. Safe to re-run.
+Run: python migrate_skills.py
+"""
+import sys
+import os
+
+# Add parent dir to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from db import get_db
+from skill_registry import migrate_skills, get_registry
+
+
+def migrate():
+    app = create_app()
+    with app.app_context():
+        db = get_db()
+        print("Canonicalizing skills...")
+        students, companies = migrate_skills(db)
+        print(f"   Students: {students}")
+        print(f"   Companies: {companies}")
+        print(f"   Registry: {len(get_registry(db).names)} skills")
+        print("\nMigration complete!")
+
+
+if __name__ == '__main__':
+    migrate()
@@ -16,6 +16,8 @@ class Student:
         if not doc:
             return None
         doc = serialize_object_id(doc)
+        doc.pop('search_tokens', None)
+        doc.pop('skill_ids', None)
         # Ensure dates are serialized
         if 'created_at' in doc and isinstance(doc['created_at'], datetime):
             doc['created_at'] = doc['created_at'].isoformat()
@@ -37,6 +39,7 @@ class Company:
             
         if 'requirements' not in doc:
             doc['requirements'] = []
+        doc.pop('requirement_ids', None)
             
         return doc
 
@@ -0,0 +1,252 @@
+"""
+Mergeable quantile sketches of confirmed placement packages.
+
+Each sketch is a DDSketch-style log-bucket histogram: a positive package x
+lands in bucket ceil(log_gamma(x)) with gamma = (1 + a) / (1 - a), so every
+quantile estimate is within a relative error `a` of the exact value. Unlike
+t-digest or KLL the buckets are plain counters, which means a deleted
+placement can be subtracted exactly and two sketches merge by adding counts.
+
+One sketch per scope ('all', 'branch', 'company') lives in `package_sketches`
+and is maintained with $inc on every placement write; rebuild_package_sketches()
+recomputes them from scratch and check_sketch_accuracy() compares them with
+exact percentiles.
+"""
+import math
+from pymongo import UpdateOne
+
+RELATIVE_ACCURACY = 0.01
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class PackageSketch:
+    def __init__(self, alpha=RELATIVE_ACCURACY, bins=None, zero_count=0):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = math.log(self.gamma)
+        self.bins = dict(bins or {})
+        self.zero_count = zero_count
+
+    @classmethod
+    def from_doc(cls, doc):
+        bins = {int(k): v for k, v in (doc.get('bins') or {}).items() if v > 0}
+        return cls(doc.get('alpha', RELATIVE_ACCURACY), bins, max(doc.get('zero_count', 0), 0))
+
+    @property
+    def count(self):
+        return self.zero_count + sum(self.bins.values())
+
+    def key(self, value):
+        """Bucket index for a value, or None for the zero/negative bucket."""
+        if value <= 0:
+            return None
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def value(self, key):
+        """Representative value of a bucket (relative error <= alpha)."""
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value, count=1):
+        key = self.key(value)
+        if key is None:
+            self.zero_count += count
+        else:
+            self.bins[key] = self.bins.get(key, 0) + count
+
+    def merge(self, other):
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        return self
+
+    def quantile(self, q):
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        running = self.zero_count
+        if running > rank:
+            return 0
+        for key in sorted(self.bins):
+            running += self.bins[key]
+            if running > rank:
+                return self.value(key)
+        return self.value(max(self.bins))
+
+    def to_doc(self):
+        return {
+            'alpha': self.alpha,
+            'zero_count': self.zero_count,
+            'bins': {str(k): v for k, v in self.bins.items()}
+        }
+
+
+# ─── Persistence ──────────────────────────────────────────────────────────────
+
+_SKETCH = PackageSketch()
+
+
+def _scopes(placement, branch):
+    return [('all', None), ('branch', branch), ('company', placement.get('company_id'))]
+
+
+def _sketch_ops(placement, scopes, sign):
+    package = placement.get('package')
+    if placement.get('status') != 'confirmed' or not _is_number(package):
+        return []
+    key = _SKETCH.key(package)
+    field = 'zero_count' if key is None else f'bins.{key}'
+    return [
+        UpdateOne({'dim': dim, 'key': scope_key}, {'$inc': {field: sign}}, upsert=True)
+        for dim, scope_key in scopes
+    ]
+
+
+def record_package(db, placement, branch, sign=1):
+    """Add (sign=1) or subtract (sign=-1) one placement's package."""
+    ops = _sketch_ops(placement, _scopes(placement, branch), sign)
+    if ops:
+        db.package_sketches.bulk_write(ops, ordered=False)
+
+
+def _record_many(db, placements, branch_by_student, sign):
+    ops = []
+    for placement in placements:
+        branch = branch_by_student.get(placement.get('student_id'))
+        ops.extend(_sketch_ops(placement, _scopes(placement, branch), sign))
+    if ops:
+        db.package_sketches.bulk_write(ops, ordered=False)
+
+
+def record_packages(db, placements, branch_by_student):
+    """Add bulk-created placements; branch_by_student maps student _id -> branch."""
+    _record_many(db, placements, branch_by_student, 1)
+
+
+def remove_packages(db, placements, branch_by_student):
+    """Subtract cascaded placements; branch_by_student maps student _id -> branch."""
+    _record_many(db, placements, branch_by_student, -1)
+
+
+def move_branch_packages(db, student_id, old_branch, new_branch):
+    """Move a student's confirmed packages to their new branch's sketch."""
+    if old_branch == new_branch:
+        return
+    ops = []
+    for placement in db.placements.find({'student_id': student_id, 'status': 'confirmed'}, {'package': 1, 'status': 1}):
+        ops.extend(_sketch_ops(placement, [('branch', old_branch)], -1))
+        ops.extend(_sketch_ops(placement, [('branch', new_branch)], 1))
+    if ops:
+        db.package_sketches.bulk_write(ops, ordered=False)
+
+
+def _exact_packages(db):
+    """(branch, company_id, package) for every confirmed placement with a numeric package."""
+    pipeline = [
+        {'$match': {'status': 'confirmed', 'package': {'$type': 'number'}}},
+        {'$lookup': {
+            'from': 'students',
+            'localField': 'student_id',
+            'foreignField': '_id',
+            'as': 'student'
+        }},
+        {'$project': {
+            '_id': 0,
+            'company_id': 1,
+            'package': 1,
+            'branch': {'$arrayElemAt': ['$student.branch', 0]}
+        }}
+    ]
+    for r in db.placements.aggregate(pipeline):
+        yield r.get('branch'), r.get('company_id'), r['package']
+
+
+def rebuild_package_sketches(db):
+    """Recompute every sketch from the confirmed placements."""
+    sketches = {}
+    for branch, company_id, package in _exact_packages(db):
+        for scope in (('all', None), ('branch', branch), ('company', company_id)):
+            sketches.setdefault(scope, PackageSketch()).add(package)
+
+    db.package_sketches.delete_many({})
+    if sketches:
+        db.package_sketches.insert_many([
+            {'dim': dim, 'key': key, **sketch.to_doc()}
+            for (dim, key), sketch in sketches.items()
+        ])
+    return len(sketches)
+
+
+def _ensure_built(db):
+    if db.package_sketches.estimated_document_count():
+        return
+    if db.placements.count_documents({'status': 'confirmed'}, limit=1):
+        rebuild_package_sketches(db)
+
+
+def _percentiles(sketch, quantiles):
+    row = {'count': sketch.count}
+    for q in quantiles:
+        estimate = sketch.quantile(q)
+        row[f'p{q * 100:g}'] = round(estimate, 2) if estimate is not None else None
+    return row
+
+
+def get_package_percentiles(db, quantiles=DEFAULT_QUANTILES):
+    """Percentiles globally, per branch and per company from the stored sketches."""
+    _ensure_built(db)
+    result = {'global': None, 'branches': [], 'companies': []}
+    for doc in db.package_sketches.find({}):
+        sketch = PackageSketch.from_doc(doc)
+        if sketch.count == 0:
+            continue
+        row = _percentiles(sketch, quantiles)
+        if doc['dim'] == 'all':
+            result['global'] = row
+        elif doc['dim'] == 'branch':
+            result['branches'].append({'branch': doc['key'], **row})
+        else:
+            result['companies'].append({'company_id': doc['key'], **row})
+
+    if result['global'] is None:
+        result['global'] = _percentiles(PackageSketch(), quantiles)
+    result['branches'].sort(key=lambda r: (r['branch'] is not None, r['branch'] or ''))
+    result['companies'].sort(key=lambda r: r['count'], reverse=True)
+    return result
+
+
+def check_sketch_accuracy(db, quantiles=DEFAULT_QUANTILES):
+    """
+    Compare stored sketches with exact percentiles (the rank floor(q * (n - 1))
+    element) over the current data. Returns (max relative error, per-scope rows).
+    """
+    _ensure_built(db)
+    exact = {}
+    for branch, company_id, package in _exact_packages(db):
+        for scope in (('all', None), ('branch', branch), ('company', company_id)):
+            exact.setdefault(scope, []).append(package)
+
+    rows = []
+    worst = 0.0
+    for doc in db.package_sketches.find({}):
+        values = sorted(exact.get((doc['dim'], doc['key']), []))
+        sketch = PackageSketch.from_doc(doc)
+        if sketch.count != len(values):
+            rows.append({'dim': doc['dim'], 'key': doc['key'], 'error': 'count mismatch',
+                         'sketch_count': sketch.count, 'exact_count': len(values)})
+            worst = math.inf
+            continue
+        if not values:
+            continue
+        for q in quantiles:
+            truth = values[int(math.floor(q * (len(values) - 1)))]
+            estimate = sketch.quantile(q)
+            error = abs(estimate - truth) / abs(truth) if truth else abs(estimate)
+            worst = max(worst, error)
+            rows.append({'dim': doc['dim'], 'key': doc['key'], 'q': q,
+                         'exact': truth, 'estimate': estimate, 'relative_error': error})
+    return worst, rows
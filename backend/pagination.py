@@ -0,0 +1,56 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is the sort key of the last row on a page, serialized with
+bson.json_util (so ObjectIds and datetimes round-trip) and base64url encoded
+so clients treat it as opaque. keyset_filter() turns it into an index-backed
+range predicate for the same sort order.
+"""
+import base64
+import binascii
+from bson import json_util
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(doc, sort):
+    """Opaque continuation token for the row `doc` under the `sort` key list."""
+    values = [doc.get(field) for field, _ in sort]
+    raw = json_util.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, sort):
+    """Sort key values stored in a token; raises InvalidCursor on garbage."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json_util.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise InvalidCursor('Invalid cursor')
+    return values
+
+
+def keyset_filter(sort, values):
+    """
+    Rows strictly after `values` in `sort` order, e.g. for [(name, 1), (_id, 1)]:
+    name > n OR (name == n AND _id > i).
+
+    A null (or missing) value sorts lowest, and MongoDB compares by type first,
+    so {'$gt': None} would match no strings: after a null every non-null value
+    follows ascending, and nothing follows it descending.
+    """
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {f: v for (f, _), v in zip(sort[:i], values[:i])}
+        if values[i] is None:
+            if direction < 0:
+                continue
+            clause[field] = {'$ne': None}
+        else:
+            clause[field] = {'$gt' if direction > 0 else '$lt': values[i]}
+        clauses.append(clause)
+    return {'$or': clauses}
@@ -0,0 +1,115 @@
+"""
+Student and company names denormalized onto placements.
+
+Every placement stores `student_name`, `student_branch` and `company_name`,
+written by create_placement, so placement listings, exports and top-company
+analytics never join. Student and company writes fan the new values out with
+update_many (served by the student_id / company_id indexes), and
+check_placement_names() compares the stored copies with the source documents
+to report and optionally repair drift.
+"""
+import threading
+from pymongo import UpdateMany, UpdateOne
+
+NAME_FIELDS = ('student_name', 'student_branch', 'company_name')
+
+
+def placement_name_fields(student, company):
+    """The denormalized fields for a placement of `student` at `company`."""
+    return {
+        'student_name': student.get('name') if student else None,
+        'student_branch': student.get('branch') if student else None,
+        'company_name': company.get('name') if company else None
+    }
+
+
+def fan_out_students(db, pairs):
+    """Push name/branch changes from (before, after) student pairs to their placements."""
+    ops = []
+    for before, after in pairs:
+        change = {}
+        if before.get('name') != after.get('name'):
+            change['student_name'] = after.get('name')
+        if before.get('branch') != after.get('branch'):
+            change['student_branch'] = after.get('branch')
+        if change:
+            ops.append(UpdateMany({'student_id': before['_id']}, {'$set': change}))
+    if not ops:
+        return 0
+    return db.placements.bulk_write(ops, ordered=False).modified_count
+
+
+def fan_out_companies(db, renames):
+    """Push new company names to their placements; renames is [(company _id, name)]."""
+    ops = [UpdateMany({'company_id': company_id}, {'$set': {'company_name': name}})
+           for company_id, name in renames]
+    if not ops:
+        return 0
+    return db.placements.bulk_write(ops, ordered=False).modified_count
+
+
+def check_placement_names(db, repair=False, query=None, sample_size=20, batch_size=1000):
+    """
+    Compare each placement's stored names with its student and company.
+    Returns {checked, drifted, repaired, samples}; with repair=True the stored
+    copies are overwritten from the source documents.
+    """
+    pipeline = [
+        {'$match': query or {}},
+        {'$lookup': {
+            'from': 'students',
+            'localField': 'student_id',
+            'foreignField': '_id',
+            'as': 'student'
+        }},
+        {'$lookup': {
+            'from': 'companies',
+            'localField': 'company_id',
+            'foreignField': '_id',
+            'as': 'company'
+        }},
+        {'$project': {
+            **{field: 1 for field in NAME_FIELDS},
+            'student': {'$arrayElemAt': ['$student', 0]},
+            'company': {'$arrayElemAt': ['$company', 0]}
+        }}
+    ]
+
+    report = {'checked': 0, 'drifted': 0, 'repaired': 0, 'samples': []}
+    ops = []
+    for doc in db.placements.aggregate(pipeline):
+        report['checked'] += 1
+        expected = placement_name_fields(doc.get('student'), doc.get('company'))
+        drift = {field: value for field, value in expected.items()
+                 if field not in doc or doc.get(field) != value}
+        if not drift:
+            continue
+        report['drifted'] += 1
+        if len(report['samples']) < sample_size:
+            report['samples'].append({
+                'id': str(doc['_id']),
+                'fields': {field: {'stored': doc.get(field), 'expected': value} for field, value in drift.items()}
+            })
+        if repair:
+            ops.append(UpdateOne({'_id': doc['_id']}, {'$set': drift}))
+            if len(ops) >= batch_size:
+                report['repaired'] += db.placements.bulk_write(ops, ordered=False).modified_count
+                ops = []
+    if ops:
+        report['repaired'] += db.placements.bulk_write(ops, ordered=False).modified_count
+    return report
+
+
+def start_background_name_backfill(db):
+    """Denormalize names onto placements written before the fields existed."""
+    def backfill():
+        try:
+            report = check_placement_names(db, repair=True, query={'student_name': {'$exists': False}})
+            if report['repaired']:
+                print(f"Denormalized names onto {report['repaired']} placements")
+        except Exception as e:
+            print(f"Placement name backfill failed: {str(e)}")
+
+    thread = threading.Thread(target=backfill, name='placement-name-backfill', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,241 @@
+"""
+Year-aware placement time-series rollup.
+
+`placement_timeseries` holds one bucket per (dimension, key, day) with the
+confirmed placement count and package sum for that day. Dimensions are the
+whole campus ('all', key None), a branch ('branch', branch name) and a
+company ('company', company ObjectId). Day buckets are rolled up into weeks,
+months or quarters at read time, so a range query only touches the buckets
+inside the range instead of the raw placements.
+"""
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+
+DIMENSIONS = ('all', 'branch', 'company')
+GRANULARITIES = ('week', 'month', 'quarter')
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _day(value):
+    return datetime(value.year, value.month, value.day)
+
+
+def _dimension_keys(placement, branch):
+    return [('all', None), ('branch', branch), ('company', placement.get('company_id'))]
+
+
+def _bucket_ops(placement, keys, sign):
+    if placement.get('status') != 'confirmed' or not isinstance(placement.get('placement_date'), datetime):
+        return []
+    package = placement.get('package')
+    inc = {'count': sign}
+    if _is_number(package):
+        inc['package_count'] = sign
+        inc['package_sum'] = sign * package
+
+    day = _day(placement['placement_date'])
+    return [
+        UpdateOne({'dim': dim, 'key': key, 'date': day}, {'$inc': inc}, upsert=True)
+        for dim, key in keys
+    ]
+
+
+def apply_placement(db, placement, branch, sign=1):
+    """Add (sign=1) or remove (sign=-1) one placement from its day buckets."""
+    ops = _bucket_ops(placement, _dimension_keys(placement, branch), sign)
+    if ops:
+        db.placement_timeseries.bulk_write(ops, ordered=False)
+
+
+def _apply_many(db, placements, branch_by_student, sign):
+    ops = []
+    for placement in placements:
+        branch = branch_by_student.get(placement.get('student_id'))
+        ops.extend(_bucket_ops(placement, _dimension_keys(placement, branch), sign))
+    if ops:
+        db.placement_timeseries.bulk_write(ops, ordered=False)
+
+
+def apply_placements_added(db, placements, branch_by_student):
+    """Add bulk-created placements; branch_by_student maps student _id -> branch."""
+    _apply_many(db, placements, branch_by_student, 1)
+
+
+def apply_placements_removed(db, placements, branch_by_student):
+    """Remove cascaded placements; branch_by_student maps student _id -> branch."""
+    _apply_many(db, placements, branch_by_student, -1)
+
+
+def move_student_branch(db, student_id, old_branch, new_branch):
+    """Re-key a student's confirmed placements after their branch changes."""
+    if old_branch == new_branch:
+        return
+    ops = []
+    for placement in db.placements.find({'student_id': student_id, 'status': 'confirmed'}):
+        ops.extend(_bucket_ops(placement, [('branch', old_branch)], -1))
+        ops.extend(_bucket_ops(placement, [('branch', new_branch)], 1))
+    if ops:
+        db.placement_timeseries.bulk_write(ops, ordered=False)
+
+
+def _ensure_built(db):
+    """Build the rollup lazily the first time it is read on an existing dataset."""
+    if db.placement_timeseries.estimated_document_count():
+        return
+    if db.placements.count_documents({'status': 'confirmed'}, limit=1):
+        rebuild_timeseries(db)
+
+
+def rebuild_timeseries(db):
+    """Recompute every bucket from the confirmed placements."""
+    pipeline = [
+        {'$match': {'status': 'confirmed', 'placement_date': {'$type': 'date'}}},
+        {'$lookup': {
+            'from': 'students',
+            'localField': 'student_id',
+            'foreignField': '_id',
+            'as': 'student'
+        }},
+        {'$group': {
+            '_id': {
+                'day': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$placement_date'}},
+                'branch': {'$arrayElemAt': ['$student.branch', 0]},
+                'company_id': '$company_id'
+            },
+            'count': {'$sum': 1},
+            'package_count': {'$sum': {'$cond': [{'$isNumber': '$package'}, 1, 0]}},
+            'package_sum': {'$sum': '$package'}
+        }}
+    ]
+
+    buckets = {}
+    for r in db.placements.aggregate(pipeline):
+        day = datetime.strptime(r['_id']['day'], '%Y-%m-%d')
+        keys = [('all', None), ('branch', r['_id'].get('branch')), ('company', r['_id'].get('company_id'))]
+        for dim, key in keys:
+            bucket = buckets.setdefault((dim, key, day), {'count': 0, 'package_count': 0, 'package_sum': 0})
+            bucket['count'] += r['count']
+            bucket['package_count'] += r['package_count']
+            bucket['package_sum'] += r['package_sum']
+
+    db.placement_timeseries.delete_many({})
+    if buckets:
+        db.placement_timeseries.insert_many([
+            {'dim': dim, 'key': key, 'date': day, **values}
+            for (dim, key, day), values in buckets.items()
+        ])
+    return len(buckets)
+
+
+# ─── Reads ────────────────────────────────────────────────────────────────────
+
+def _period_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'quarter':
+        return datetime(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+    return datetime(day.year, day.month, 1)
+
+
+def _next_period(start, granularity):
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    months = 3 if granularity == 'quarter' else 1
+    month_index = start.month - 1 + months
+    return datetime(start.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def _period_label(start, granularity):
+    if granularity == 'week':
+        year, week, _ = start.isocalendar()
+        return f'{year}-W{week:02d}'
+    if granularity == 'quarter':
+        return f'{start.year}-Q{(start.month - 1) // 3 + 1}'
+    return start.strftime('%Y-%m')
+
+
+def query_timeseries(db, start=None, end=None, granularity='month', dim='all', key=None):
+    """
+    Series over [start, end) rolled up to `granularity`, with every period of
+    the range filled in (zeros when empty) and a cumulative total of
+    placements that includes those before `start`.
+    """
+    _ensure_built(db)
+    query = {'dim': dim, 'key': key, 'count': {'$gt': 0}}
+    date_range = {}
+    if start is not None:
+        date_range['$gte'] = start
+    if end is not None:
+        date_range['$lt'] = end
+    if date_range:
+        query['date'] = date_range
+
+    periods = {}
+    for bucket in db.placement_timeseries.find(query, {'_id': 0, 'dim': 0, 'key': 0}).sort('date', 1):
+        period = periods.setdefault(_period_start(bucket['date'], granularity), [0, 0, 0])
+        period[0] += bucket['count']
+        period[1] += bucket.get('package_count', 0)
+        period[2] += bucket.get('package_sum', 0)
+
+    # Placements before the range, so the running total is campus-to-date
+    running = 0
+    if start is not None:
+        before = db.placement_timeseries.aggregate([
+            {'$match': {'dim': dim, 'key': key, 'date': {'$lt': start}}},
+            {'$group': {'_id': None, 'count': {'$sum': '$count'}}}
+        ])
+        running = next(before, {}).get('count', 0)
+
+    labels, placements, avg_packages, cumulative = [], [], [], []
+    first = _period_start(start, granularity) if start is not None else min(periods, default=None)
+    last = max(periods, default=first)
+    if end is not None and first is not None:
+        last = _period_start(end - timedelta(days=1), granularity)
+    current = first
+    while current is not None and current <= last:
+        count, package_count, package_sum = periods.get(current, (0, 0, 0))
+        running += count
+        labels.append(_period_label(current, granularity))
+        placements.append(count)
+        avg_packages.append(round(package_sum / package_count, 2) if package_count else 0)
+        cumulative.append(running)
+        current = _next_period(current, granularity)
+
+    return {
+        'granularity': granularity,
+        'labels': labels,
+        'placements': placements,
+        'avg_packages': avg_packages,
+        'cumulative': cumulative
+    }
+
+
+def month_of_year_trends(db):
+    """The historical /api/analytics/monthly-trends payload (all years folded into Jan-Dec)."""
+    months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+              'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+    _ensure_built(db)
+    totals = {}
+    for bucket in db.placement_timeseries.find({'dim': 'all', 'count': {'$gt': 0}}):
+        month = totals.setdefault(bucket['date'].month, [0, 0, 0])
+        month[0] += bucket['count']
+        month[1] += bucket.get('package_count', 0)
+        month[2] += bucket.get('package_sum', 0)
+
+    labels = []
+    placements = []
+    avg_packages = []
+    for month in sorted(totals):
+        count, package_count, package_sum = totals[month]
+        labels.append(months[month - 1])
+        placements.append(count)
+        avg_packages.append(round(package_sum / package_count, 2) if package_count else 0)
+
+    return {
+        'labels': labels,
+        'placements': placements,
+        'avg_packages': avg_packages
+    }
@@ -0,0 +1,46 @@
+"""
+Precompute job recommendations for every student into `recommendations`.
+Run: python precompute_recommendations.py
+     python precompute_recommendations.py --workers 8 --chunk-size 2000
+"""
+import sys
+import os
+import argparse
+import time
+
+# Add parent dir to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from db import get_db
+import recommendation_batch
+
+
+def precompute(workers, chunk_size):
+    # Imported here: spawned workers re-import this script and must not build the app
+    from app import create_app
+    app = create_app()
+    with app.app_context():
+        db = get_db()
+        run, created = recommendation_batch.create_run(db)
+        if not created:
+            print(f"Run {run['_id']} is already {run['status']}")
+            sys.exit(1)
+
+        print(f"Scoring {run['total_students']} students...")
+        started = time.time()
+        run = recommendation_batch.execute_run(
+            db, run['_id'], workers=workers, chunk_size=chunk_size, verbose=True
+        )
+        if run['status'] != 'done':
+            print(f"Run failed: {run.get('error')}")
+            sys.exit(1)
+        print(f"Stored recommendations for {run['students']} students "
+              f"(catalog version {run['catalog_version']}) in {time.time() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, help='Worker processes (default RECOMMENDATION_WORKERS)')
+    parser.add_argument('--chunk-size', type=int, default=recommendation_batch.CHUNK_SIZE)
+    args = parser.parse_args()
+    precompute(args.workers, args.chunk_size)
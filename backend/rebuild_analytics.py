@@ -0,0 +1,84 @@
+"""
+Recompute the materialized analytics documents from the raw collections.
+Run: python rebuild_analytics.py
+     python rebuild_analytics.py --check-percentiles   (verify sketch accuracy only)
+     python check_sketch_accuracy.py                  (offline check on fixed seeded data)
+     python rebuild_analytics.py --check-placements    (report denormalized name drift)
+     python rebuild_analytics.py --repair-placements   (report and repair it)
+"""
+import sys
+import os
+
+# Add parent dir to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from db import get_db
+from analytics_snapshot import rebuild_snapshot
+from branch_rollup import rebuild_branch_rollup
+from placement_timeseries import rebuild_timeseries
+from package_sketches import rebuild_package_sketches, check_sketch_accuracy, RELATIVE_ACCURACY
+from placement_names import check_placement_names
+
+
+def rebuild():
+    app = create_app()
+    with app.app_context():
+        db = get_db()
+
+        print("Rebuilding analytics snapshot...")
+        snapshot = rebuild_snapshot(db)
+        print(f"   Students: {snapshot['total_students']} ({snapshot['placed_students']} placed)")
+        print(f"   Companies: {snapshot['total_companies']}")
+        print(f"   Confirmed placements: {snapshot['total_placements']}")
+
+        print("Rebuilding branch rollup...")
+        print(f"   Branches: {rebuild_branch_rollup(db)}")
+
+        print("Rebuilding placement time series...")
+        print(f"   Buckets: {rebuild_timeseries(db)}")
+
+        print("Rebuilding package percentile sketches...")
+        print(f"   Sketches: {rebuild_package_sketches(db)}")
+
+        print("Repairing names denormalized onto placements...")
+        print(f"   Repaired: {check_placement_names(db, repair=True)['repaired']}")
+
+        print("\nRebuild complete!")
+
+
+def check_percentiles():
+    """Exit non-zero if any stored sketch is off by more than its relative accuracy."""
+    app = create_app()
+    with app.app_context():
+        db = get_db()
+        worst, rows = check_sketch_accuracy(db)
+        for row in rows:
+            if 'error' in row:
+                print(f"   {row['dim']}:{row['key']} {row['error']} "
+                      f"(sketch {row['sketch_count']}, exact {row['exact_count']})")
+        print(f"Checked {len(rows)} percentiles, max relative error {worst:.4%} "
+              f"(bound {RELATIVE_ACCURACY:.2%})")
+        # Small slack for floating point at bucket boundaries
+        return worst <= RELATIVE_ACCURACY * 1.0001
+
+
+def check_placements(repair=False):
+    """Exit non-zero if placements carry stale student/company names and were not repaired."""
+    app = create_app()
+    with app.app_context():
+        db = get_db()
+        report = check_placement_names(db, repair=repair)
+        for sample in report['samples']:
+            print(f"   {sample['id']}: {sample['fields']}")
+        print(f"Checked {report['checked']} placements, {report['drifted']} drifted, "
+              f"{report['repaired']} repaired")
+        return report['drifted'] == report['repaired']
+
+
+if __name__ == '__main__':
+    if '--check-percentiles' in sys.argv:
+        sys.exit(0 if check_percentiles() else 1)
+    if '--check-placements' in sys.argv or '--repair-placements' in sys.argv:
+        sys.exit(0 if check_placements(repair='--repair-placements' in sys.argv) else 1)
+    rebuild()
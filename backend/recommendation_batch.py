@@ -0,0 +1,264 @@
+"""
+Campus-wide batch job recommendations.
+
+A run streams every student in chunks and scores them on a ProcessPoolExecutor.
+The pool initializer hands each worker the company catalog and the skill names
+once, and each worker builds its own SkillMatrix from it. The top k per student
+are written to `recommendations` with bulk_write, tagged with the catalog
+version, the student's skills/CGPA fingerprint and the jitter setting.
+GET /api/jobs/recommendations/<id> serves that document while all three still
+match. Scores are deterministic, so a stored result stays valid until the
+student or any company changes.
+
+Runs are recorded in `recommendation_runs`. POST /api/admin/recommendations/run
+starts one on a background thread and precompute_recommendations.py runs one
+in the foreground. The active run holds a unique `active_key`, so at most one
+is queued or running across all processes, and a run whose heartbeat is older
+than STALE_AFTER (its process died) is marked failed.
+
+Workers are spawned, so they import this module but never app.py: keep
+worker-side imports free of the Flask app and of startup side effects.
+"""
+import hashlib
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReplaceOne
+from pymongo.errors import DuplicateKeyError
+from config import Config
+from indexes import ensure_collection_indexes
+from company_catalog import get_catalog
+from skill_registry import get_registry
+from skill_matcher import recommend, student_fingerprint, TOP_K
+
+CHUNK_SIZE = 1000
+# A queued/running run without a heartbeat for this long is treated as dead
+STALE_AFTER = timedelta(minutes=10)
+ACTIVE_KEY = 'recommendations'
+ACTIVE_STATUSES = ['queued', 'running']
+
+_lock = threading.Lock()
+_executor = None
+_indexed = False
+
+
+def fingerprint_digest(student):
+    return hashlib.sha1(repr(student_fingerprint(student)).encode()).hexdigest()
+
+
+def stored_matches(db, catalog, student, k=TOP_K):
+    """The precomputed matches for a student, or None if missing or stale."""
+    doc = db.recommendations.find_one({'_id': student['_id']})
+    if (doc is None
+            or doc.get('catalog_version') != catalog.version
+            or doc.get('fingerprint') != fingerprint_digest(student)
+            or doc.get('jitter') != Config.RECOMMENDATION_JITTER
+            or doc.get('k') != k):
+        return None
+    return doc['matches']
+
+
+# ─── Worker processes ─────────────────────────────────────────────────────────
+
+class _Snapshot:
+    """The parts of a CompanyCatalog the matcher reads, rebuilt in each worker."""
+
+    def __init__(self, docs, version):
+        self.docs = docs
+        self.version = version
+
+
+_worker_catalog = None
+_worker_names = None
+
+
+def _init_worker(docs, version, names):
+    global _worker_catalog, _worker_names
+    _worker_catalog = _Snapshot(docs, version)
+    _worker_names = names
+
+
+def _score_chunk(students, k, jitter):
+    return [
+        (s['_id'], fingerprint_digest(s), recommend(_worker_catalog, s, _worker_names, k, jitter))
+        for s in students
+    ]
+
+
+# ─── Runs ─────────────────────────────────────────────────────────────────────
+
+def _chunks(cursor, size):
+    chunk = []
+    for doc in cursor:
+        chunk.append(doc)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write(db, results, tags):
+    ops = [
+        ReplaceOne({'_id': student_id}, {'matches': matches, 'fingerprint': fingerprint, **tags}, upsert=True)
+        for student_id, fingerprint, matches in results
+    ]
+    if ops:
+        db.recommendations.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+def run_batch(db, run_id, workers=None, chunk_size=CHUNK_SIZE, k=TOP_K, progress=None):
+    """
+    Score every student against the current catalog and store the top k.
+    progress(n) is called with the running count after every chunk. Returns
+    (students written, catalog version).
+    """
+    catalog = get_catalog(db)
+    workers = workers or Config.RECOMMENDATION_WORKERS
+    tags = {
+        'catalog_version': catalog.version,
+        'jitter': Config.RECOMMENDATION_JITTER,
+        'k': k,
+        'run_id': run_id,
+        'computed_at': datetime.utcnow()
+    }
+
+    written = 0
+    pending = set()
+    names = get_registry(db).names
+    cursor = db.students.find({}, {'skill_ids': 1, 'cgpa': 1}).batch_size(chunk_size)
+    # spawn, not fork: the parent is a threaded web worker holding a MongoClient
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(catalog.docs, catalog.version, names)
+    ) as pool:
+        for chunk in _chunks(cursor, chunk_size):
+            # Keep a couple of chunks per worker in flight so memory stays bounded
+            while len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    written += _write(db, future.result(), tags)
+                    if progress:
+                        progress(written)
+            pending.add(pool.submit(_score_chunk, chunk, k, Config.RECOMMENDATION_JITTER))
+        for future in pending:
+            written += _write(db, future.result(), tags)
+            if progress:
+                progress(written)
+
+    # Students deleted since the previous run
+    db.recommendations.delete_many({'run_id': {'$ne': run_id}})
+    return written, catalog.version
+
+
+def run_to_dict(run):
+    return {
+        'id': str(run['_id']),
+        'status': run['status'],
+        'students': run.get('students', 0),
+        'total_students': run.get('total_students'),
+        'catalog_version': run.get('catalog_version'),
+        'error': run.get('error'),
+        'created_at': run['created_at'].isoformat(),
+        'started_at': run['started_at'].isoformat() if run.get('started_at') else None,
+        'finished_at': run['finished_at'].isoformat() if run.get('finished_at') else None
+    }
+
+
+def _fail_stale(db, now):
+    """Mark failed the queued/running runs whose process stopped heartbeating."""
+    db.recommendation_runs.update_many(
+        {'status': {'$in': ACTIVE_STATUSES}, 'heartbeat_at': {'$lt': now - STALE_AFTER}},
+        {'$set': {'status': 'failed', 'error': 'Run stopped responding', 'finished_at': now},
+         '$unset': {'active_key': ''}}
+    )
+
+
+def create_run(db):
+    """Record a queued run, or return the active one. Returns (run document, created)."""
+    global _indexed
+    if not _indexed:
+        ensure_collection_indexes(db, 'recommendation_runs')
+        _indexed = True
+
+    now = datetime.utcnow()
+    _fail_stale(db, now)
+    run = {
+        '_id': ObjectId(),
+        'status': 'queued',
+        'active_key': ACTIVE_KEY,
+        'students': 0,
+        'total_students': db.students.estimated_document_count(),
+        'created_at': now,
+        'heartbeat_at': now
+    }
+    try:
+        db.recommendation_runs.insert_one(run)
+    except DuplicateKeyError:
+        active = db.recommendation_runs.find_one({'active_key': ACTIVE_KEY})
+        return (active, False) if active else create_run(db)
+    return run, True
+
+
+def execute_run(db, run_id, **options):
+    """Run a recorded batch to completion, keeping its status document current."""
+    db.recommendation_runs.update_one({'_id': run_id}, {'$set': {
+        'status': 'running', 'started_at': datetime.utcnow(), 'heartbeat_at': datetime.utcnow()
+    }})
+
+    def progress(students):
+        db.recommendation_runs.update_one(
+            {'_id': run_id},
+            {'$set': {'students': students, 'heartbeat_at': datetime.utcnow()}}
+        )
+        if options.get('verbose'):
+            print(f"   Scored {students} students")
+
+    try:
+        students, version = run_batch(
+            db, run_id,
+            workers=options.get('workers'),
+            chunk_size=options.get('chunk_size', CHUNK_SIZE),
+            progress=progress
+        )
+        db.recommendation_runs.update_one({'_id': run_id}, {'$set': {
+            'status': 'done',
+            'students': students,
+            'catalog_version': version,
+            'finished_at': datetime.utcnow()
+        }, '$unset': {'active_key': ''}})
+    except Exception as e:
+        print(f"Recommendation run {run_id} failed: {str(e)}")
+        db.recommendation_runs.update_one({'_id': run_id}, {'$set': {
+            'status': 'failed',
+            'error': str(e),
+            'finished_at': datetime.utcnow()
+        }, '$unset': {'active_key': ''}})
+    return db.recommendation_runs.find_one({'_id': run_id})
+
+
+def enqueue_run(db):
+    """Start a background run unless one is already active. Returns (run document, created)."""
+    global _executor
+    run, created = create_run(db)
+    if created:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='recommendations')
+        _executor.submit(execute_run, db, run['_id'])
+    return run, created
+
+
+def list_runs(db, limit=20):
+    _fail_stale(db, datetime.utcnow())
+    return list(db.recommendation_runs.find({}).sort('created_at', -1).limit(limit))
+
+
+def get_run(db, run_id):
+    _fail_stale(db, datetime.utcnow())
+    return db.recommendation_runs.find_one({'_id': run_id})
@@ -0,0 +1,121 @@
+"""
+In-process response cache with write-driven invalidation.
+
+Every collection has a generation counter that the create/update/delete
+handlers bump via bump_generation(). Cached responses are tagged with the
+collections they read; an entry is valid while those generations are
+unchanged. The strong ETag is derived from the same generations, so a
+polling client that sends If-None-Match gets 304 Not Modified without any
+database work.
+
+Generations live in process memory (we run a single gunicorn worker). A boot
+id and a time epoch of Config.ANALYTICS_CACHE_TTL seconds are folded into the
+ETag so restarts and writes made by other processes (seed_data.py, the
+rebuild scripts) are picked up within one TTL.
+
+bump_generation() also increments a persisted per-collection counter in
+`catalog_versions` (data_version()), for consumers such as export jobs that
+must see writes from every process and survive restarts.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, make_response, Response
+from config import Config
+from db import get_db
+
+MAX_ENTRIES = 256
+# Headers recomputed on every replay or meaningless once cached
+UNCACHED_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te', 'trailer',
+    'transfer-encoding', 'upgrade', 'etag', 'content-length', 'content-type', 'cache-control'
+}
+
+_BOOT_ID = os.urandom(4).hex()
+_lock = threading.Lock()
+_generations = {}
+_entries = OrderedDict()
+
+
+def _data_version_id(name):
+    return f'data:{name}'
+
+
+def bump_generation(*collections):
+    """Invalidate every cached response that depends on any of the collections."""
+    with _lock:
+        for name in collections:
+            _generations[name] = _generations.get(name, 0) + 1
+    db = get_db()
+    for name in collections:
+        db.catalog_versions.update_one({'_id': _data_version_id(name)}, {'$inc': {'version': 1}}, upsert=True)
+
+
+def data_version(db, collections):
+    """Persisted write counters of the collections, the same in every process."""
+    ids = [_data_version_id(name) for name in collections]
+    versions = {doc['_id']: doc['version'] for doc in db.catalog_versions.find({'_id': {'$in': ids}})}
+    return '.'.join(str(versions.get(i, 0)) for i in ids)
+
+
+def get_generations(collections):
+    with _lock:
+        return tuple(_generations.get(name, 0) for name in collections)
+
+
+def generation_token(collections):
+    """Opaque token that changes whenever any of the collections is written (or on restart)."""
+    return f"{_BOOT_ID}-{'.'.join(str(g) for g in get_generations(collections))}"
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def _etag_for(key, collections):
+    epoch = int(time.time() // max(Config.ANALYTICS_CACHE_TTL, 1))
+    digest = hashlib.sha1(f'{key}|{epoch}'.encode()).hexdigest()[:12]
+    return f'{generation_token(collections)}-{digest}'
+
+
+def cached_response(*collections):
+    """
+    Cache a GET view's 200 responses until one of `collections` is written.
+    Replays carry the cached body and the headers the view set (e.g. X-Total-Points).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.full_path
+            etag = _etag_for(key, collections)
+
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                with _lock:
+                    entry = _entries.get(key)
+                    if entry is not None:
+                        _entries.move_to_end(key)
+
+                if entry is not None and entry[0] == etag:
+                    response = Response(entry[1], status=200, mimetype=entry[2], headers=entry[3])
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    with _lock:
+                        headers = [(k, v) for k, v in response.headers if k.lower() not in UNCACHED_HEADERS]
+                        _entries[key] = (etag, response.get_data(), response.mimetype, headers)
+                        _entries.move_to_end(key)
+                        while len(_entries) > MAX_ENTRIES:
+                            _entries.popitem(last=False)
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -1,81 +1,148 @@
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request, jsonify, Response, stream_with_context, send_file
+from bson import ObjectId
 from db import get_db
 from models import Student, Company, Placement
-import csv
-import io
+from analytics_snapshot import rebuild_snapshot
+from branch_rollup import rebuild_branch_rollup
+from response_cache import bump_generation
+from placement_timeseries import rebuild_timeseries
+from package_sketches import rebuild_package_sketches
+from indexes import index_report
+from company_catalog import bump_catalog_version
+from placement_names import check_placement_names
+import columnar_export
+import export_jobs
+import recommendation_batch
+import os
+from exports import iter_csv, gzip_chunks, student_rows, placement_rows, STUDENT_HEADER, PLACEMENT_HEADER
 
 admin_bp = Blueprint('admin', __name__)
 
 
+def _csv_download(chunks, filename):
+    """Stream CSV chunks as a download, gzip-compressed when the client accepts it."""
+    headers = {'Content-Disposition': f'attachment; filename={filename}', 'Vary': 'Accept-Encoding'}
+    if 'gzip' in request.accept_encodings:
+        chunks = gzip_chunks(chunks)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(stream_with_context(chunks), mimetype='text/csv', headers=headers)
+
+
 @admin_bp.route('/api/admin/export/students', methods=['GET'])
 def export_students():
     db = get_db()
-    students_cursor = db.students.find({})
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['ID', 'Name', 'Email', 'Branch', 'CGPA', 'Skills', 'Projects', 'Internships', 'Placed', 'Gender'])
-
-    for s in students_cursor:
-        skills = s.get('skills', [])
-        writer.writerow([str(s['_id']), s.get('name'), s.get('email'), s.get('branch'), s.get('cgpa'),
-                         ', '.join(skills), s.get('projects'), s.get('internships'),
-                         'Yes' if s.get('placed') else 'No', s.get('gender')])
-
-    output.seek(0)
-    return Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={'Content-Disposition': 'attachment; filename=students_export.csv'}
-    )
+    return _csv_download(iter_csv(STUDENT_HEADER, student_rows(db)), 'students_export.csv')
 
 
 @admin_bp.route('/api/admin/export/placements', methods=['GET'])
 def export_placements():
     db = get_db()
-    
-    pipeline = [
-        {
-            '$lookup': {
-                'from': 'students',
-                'localField': 'student_id',
-                'foreignField': '_id',
-                'as': 'student'
-            }
-        },
-        {
-            '$lookup': {
-                'from': 'companies',
-                'localField': 'company_id',
-                'foreignField': '_id',
-                'as': 'company'
-            }
-        },
-        {'$unwind': {'path': '$student', 'preserveNullAndEmptyArrays': True}},
-        {'$unwind': {'path': '$company', 'preserveNullAndEmptyArrays': True}}
-    ]
-    
-    placements_cursor = db.placements.aggregate(pipeline)
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['ID', 'Student', 'Company', 'Role', 'Package (LPA)', 'Date', 'Status'])
-
-    for p in placements_cursor:
-        s_name = p.get('student', {}).get('name', '')
-        c_name = p.get('company', {}).get('name', '')
-        date_str = p.get('placement_date').strftime('%Y-%m-%d') if p.get('placement_date') else ''
-        
-        writer.writerow([str(p['_id']), s_name, c_name, p.get('role'), p.get('package'), date_str, p.get('status')])
-
-    output.seek(0)
+    return _csv_download(iter_csv(PLACEMENT_HEADER, placement_rows(db)), 'placements_export.csv')
+
+
+@admin_bp.route('/api/admin/export/<dataset>.parquet', methods=['GET'])
+@admin_bp.route('/api/admin/export/<dataset>.arrow', methods=['GET'])
+def export_columnar(dataset):
+    """Typed Parquet / Arrow IPC stream snapshot of students or placements."""
+    if not columnar_export.PYARROW_AVAILABLE:
+        return jsonify({'error': 'pyarrow is not installed on this server'}), 503
+    if dataset not in columnar_export.DATASETS:
+        return jsonify({'error': f'Unknown dataset: {dataset}'}), 404
+
+    fmt = request.path.rsplit('.', 1)[1]
+    mimetype, extension = columnar_export.FORMATS[fmt]
+    db = get_db()
     return Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={'Content-Disposition': 'attachment; filename=placements_export.csv'}
+        stream_with_context(columnar_export.iter_columnar(db, dataset, fmt)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={dataset}_export.{extension}'}
     )
 
 
+@admin_bp.route('/api/admin/exports', methods=['POST'])
+def create_export():
+    """Queue a background export ({dataset, format}); identical fresh or running jobs are reused."""
+    db = get_db()
+    try:
+        data = request.get_json() or {}
+        dataset = data.get('dataset')
+        fmt = data.get('format', 'csv')
+        if dataset not in export_jobs.DATASETS:
+            return jsonify({'error': f"dataset must be one of {', '.join(export_jobs.DATASETS)}"}), 400
+        if fmt not in export_jobs.FORMATS:
+            return jsonify({'error': f"format must be one of {', '.join(export_jobs.FORMATS)}"}), 400
+        if fmt in export_jobs.COLUMNAR_FORMATS and not columnar_export.PYARROW_AVAILABLE:
+            return jsonify({'error': 'pyarrow is not installed on this server'}), 503
+
+        job, created = export_jobs.enqueue_export(db, dataset, fmt)
+        return jsonify({**export_jobs.job_to_dict(job), 'deduplicated': not created}), 202 if created else 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/api/admin/exports', methods=['GET'])
+def list_exports():
+    db = get_db()
+    return jsonify([export_jobs.job_to_dict(job) for job in export_jobs.list_jobs(db)])
+
+
+@admin_bp.route('/api/admin/exports/<job_id>', methods=['GET'])
+def get_export(job_id):
+    db = get_db()
+    if not ObjectId.is_valid(job_id):
+        return jsonify({'error': 'Invalid export ID format'}), 400
+    job = export_jobs.get_job(db, ObjectId(job_id))
+    if not job:
+        return jsonify({'error': 'Export not found'}), 404
+    return jsonify(export_jobs.job_to_dict(job))
+
+
+@admin_bp.route('/api/admin/exports/<job_id>/download', methods=['GET'])
+def download_export(job_id):
+    db = get_db()
+    if not ObjectId.is_valid(job_id):
+        return jsonify({'error': 'Invalid export ID format'}), 400
+    job = export_jobs.get_job(db, ObjectId(job_id))
+    if not job:
+        return jsonify({'error': 'Export not found'}), 404
+    if job['status'] != 'done':
+        return jsonify({'error': f"Export is {job['status']}"}), 409
+    if not os.path.exists(job['path']):
+        return jsonify({'error': 'Export file has expired'}), 410
+
+    extension, mimetype = export_jobs.FORMATS[job['format']]
+    return send_file(job['path'], mimetype=mimetype, as_attachment=True,
+                     download_name=f"{job['dataset']}_export.{extension}")
+
+
+@admin_bp.route('/api/admin/recommendations/run', methods=['POST'])
+def run_recommendations():
+    """Start a campus-wide recommendation run; an active run is returned instead."""
+    db = get_db()
+    try:
+        run, created = recommendation_batch.enqueue_run(db)
+        return jsonify({**recommendation_batch.run_to_dict(run), 'deduplicated': not created}), 202 if created else 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/api/admin/recommendations/runs', methods=['GET'])
+def list_recommendation_runs():
+    db = get_db()
+    return jsonify([recommendation_batch.run_to_dict(run) for run in recommendation_batch.list_runs(db)])
+
+
+@admin_bp.route('/api/admin/recommendations/runs/<run_id>', methods=['GET'])
+def get_recommendation_run(run_id):
+    db = get_db()
+    if not ObjectId.is_valid(run_id):
+        return jsonify({'error': 'Invalid run ID format'}), 400
+    run = recommendation_batch.get_run(db, ObjectId(run_id))
+    if not run:
+        return jsonify({'error': 'Run not found'}), 404
+    return jsonify(recommendation_batch.run_to_dict(run))
+
+
 @admin_bp.route('/api/admin/stats', methods=['GET'])
 def admin_stats():
     db = get_db()
@@ -88,6 +155,15 @@ def admin_stats():
     })
 
 
+@admin_bp.route('/api/admin/indexes', methods=['GET'])
+def admin_indexes():
+    db = get_db()
+    try:
+        return jsonify(index_report(db))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @admin_bp.route('/api/admin/reset-database', methods=['POST'])
 def reset_database():
     data = request.get_json()
@@ -99,5 +175,26 @@ def reset_database():
     db.placements.delete_many({})
     db.companies.delete_many({})
     db.students.delete_many({})
+    db.recommendations.delete_many({})
+    rebuild_snapshot(db)
+    rebuild_branch_rollup(db)
+    rebuild_timeseries(db)
+    rebuild_package_sketches(db)
+    bump_catalog_version(db)
+    bump_generation('students', 'placements', 'companies')
     
     return jsonify({'message': 'Database reset successful'})
+
+
+@admin_bp.route('/api/admin/consistency/placements', methods=['GET', 'POST'])
+def placement_name_consistency():
+    """Report drift in the names denormalized onto placements; POST repairs it."""
+    db = get_db()
+    try:
+        repair = request.method == 'POST'
+        report = check_placement_names(db, repair=repair)
+        if report['repaired']:
+            bump_generation('placements')
+        return jsonify(report)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
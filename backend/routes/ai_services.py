@@ -3,6 +3,7 @@ from flask import Blueprint, request, jsonify
 from db import get_db
 from bson import ObjectId
 from ai_engine import analyze_resume, skill_gap_analysis, predict_salary, generate_roadmap, chat_with_ai, generate_mock_test
+from skill_registry import get_registry
 
 ai_bp = Blueprint('ai_services', __name__)
 
@@ -16,7 +17,7 @@ def ai_analyze_resume():
     if not resume_text:
         return jsonify({'error': 'Resume text is required'}), 400
 
-    result = analyze_resume(resume_text, target_role)
+    result = analyze_resume(resume_text, target_role, registry=get_registry(get_db()))
     return jsonify(result)
 
 
@@ -43,7 +44,7 @@ def ai_skill_gap():
     if not skills:
         return jsonify({'error': 'Skills are required'}), 400
 
-    result = skill_gap_analysis(skills, target_role, student_info)
+    result = skill_gap_analysis(skills, target_role, student_info, registry=get_registry(db))
     return jsonify(result)
 
 
@@ -1,58 +1,30 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify
 from db import get_db
+from bson import ObjectId
+from datetime import datetime, timedelta
+from analytics_snapshot import get_snapshot, snapshot_to_stats
+from branch_rollup import get_branch_stats
+from response_cache import cached_response
+from placement_timeseries import GRANULARITIES, query_timeseries, month_of_year_trends
+from package_sketches import DEFAULT_QUANTILES, get_package_percentiles
+from skill_registry import get_registry
+import analytics_cube
+import math
+import time
 
 analytics_bp = Blueprint('analytics', __name__)
 
 
 @analytics_bp.route('/api/analytics/stats', methods=['GET'])
+@cached_response('students', 'placements', 'companies')
 def get_stats():
     db = get_db()
-    
-    total_students = db.students.count_documents({})
-    placed_students = db.students.count_documents({'placed': True})
-    total_companies = db.companies.count_documents({})
-    total_placements = db.placements.count_documents({'status': 'confirmed'})
-    
-    # Aggregation for package stats
-    pipeline = [
-        {'$match': {'status': 'confirmed'}},
-        {'$group': {
-            '_id': None,
-            'avg': {'$avg': '$package'},
-            'max': {'$max': '$package'},
-            'min': {'$min': '$package'}
-        }}
-    ]
-    
-    stats_result = list(db.placements.aggregate(pipeline))
-    if stats_result:
-        stats = stats_result[0]
-        avg_package = stats.get('avg', 0)
-        highest_package = stats.get('max', 0)
-        lowest_package = stats.get('min', 0)
-    else:
-        avg_package = highest_package = lowest_package = 0
-
-    placement_rate = (placed_students / total_students * 100) if total_students > 0 else 0
-
-    # Average CGPA across all students
-    cgpa_result = list(db.students.aggregate([{'$group': {'_id': None, 'avg_cgpa': {'$avg': '$cgpa'}}}]))
-    avg_cgpa = round(cgpa_result[0]['avg_cgpa'], 2) if cgpa_result else 0
-
-    return jsonify({
-        'total_students': total_students,
-        'placed_students': placed_students,
-        'placement_rate': round(placement_rate, 1),
-        'avg_package': round(avg_package, 2),
-        'highest_package': round(highest_package, 2),
-        'lowest_package': round(lowest_package, 2),
-        'total_companies': total_companies,
-        'total_placements': total_placements,
-        'avg_cgpa': avg_cgpa
-    })
+    # Served from the incrementally maintained snapshot (see analytics_snapshot.py)
+    return jsonify(snapshot_to_stats(get_snapshot(db)))
 
 
 @analytics_bp.route('/api/analytics/placement-overview', methods=['GET'])
+@cached_response('students')
 def placement_overview():
     db = get_db()
     placed = db.students.count_documents({'placed': True})
@@ -60,26 +32,38 @@ def placement_overview():
     return jsonify({'placed': placed, 'not_placed': not_placed})
 
 
-@analytics_bp.route('/api/analytics/salary-distribution', methods=['GET'])
-def salary_distribution():
-    db = get_db()
-    
-    # We can do this via aggregation or just pull and sort
-    # Aggregation is cleaner for large datasets
-    pipeline = [
-        {'$match': {'status': 'confirmed'}},
-        {'$bucket': {
-            'groupBy': '$package',
-            'boundaries': [0, 3, 5, 8, 12, 20, 1000],
-            'default': '20+ LPA',
-            'output': {
-                'count': {'$sum': 1}
-            }
-        }}
-    ]
-    
-    results = db.placements.aggregate(pipeline)
-    
+_PLACED_GROUP_PIPELINE = [
+    {'$group': {'_id': '$placed', 'count': {'$sum': 1}}}
+]
+
+
+def _placement_overview_payload(results):
+    counts = {True: 0, False: 0}
+    for r in results:
+        if isinstance(r['_id'], bool):
+            counts[r['_id']] = r['count']
+    return {'placed': counts[True], 'not_placed': counts[False]}
+
+
+# Placement pipelines below omit the shared confirmed-status $match so they can
+# be reused verbatim as $facet branches in /api/analytics/dashboard.
+_CONFIRMED_MATCH = {'$match': {'status': 'confirmed'}}
+
+_SALARY_BOUNDARIES = [0, 3, 5, 8, 12, 20, 1000]
+
+_SALARY_PIPELINE = [
+    {'$bucket': {
+        'groupBy': '$package',
+        'boundaries': _SALARY_BOUNDARIES,
+        'default': '20+ LPA',
+        'output': {
+            'count': {'$sum': 1}
+        }
+    }}
+]
+
+
+def _salary_payload(results):
     # Map bucket IDs to ranges
     bucket_map = {
         0: '0-3 LPA', 3: '3-5 LPA', 5: '5-8 LPA',
@@ -93,217 +77,477 @@ def salary_distribution():
         label = bucket_map.get(b_id, '20+ LPA')
         ranges[label] = r['count']
         
-    return jsonify({'labels': list(ranges.keys()), 'values': list(ranges.values())})
+    return {'labels': list(ranges.keys()), 'values': list(ranges.values())}
+
+
+@analytics_bp.route('/api/analytics/salary-distribution', methods=['GET'])
+@cached_response('placements')
+def salary_distribution():
+    db = get_db()
+    
+    # We can do this via aggregation or just pull and sort
+    # Aggregation is cleaner for large datasets
+    results = db.placements.aggregate([_CONFIRMED_MATCH] + _SALARY_PIPELINE)
+    return jsonify(_salary_payload(results))
 
 
 @analytics_bp.route('/api/analytics/branch-stats', methods=['GET'])
+@cached_response('students', 'placements')
 def branch_stats():
     db = get_db()
-    
-    # Complex aggregation to get all branch stats in one go
-    pipeline = [
-        {
-            '$lookup': {
-                'from': 'placements',
-                'let': {'student_id': '$_id'},
-                'pipeline': [
-                    {'$match': {
-                        '$expr': {'$eq': ['$student_id', '$$student_id']},
-                        'status': 'confirmed'
-                    }}
-                ],
-                'as': 'placement_info'
-            }
-        },
-        {
-            '$group': {
-                '_id': '$branch',
-                'total': {'$sum': 1},
-                'placed': {'$sum': {'$cond': [{'$eq': ['$placed', True]}, 1, 0]}},
-                'avg_package': {'$avg': {'$arrayElemAt': ['$placement_info.package', 0]}}
-            }
-        },
-        {'$sort': {'_id': 1}}
-    ]
-    
-    results = db.students.aggregate(pipeline)
-    
-    data = []
-    for r in results:
-        branch = r['_id']
-        total = r['total']
-        placed = r['placed']
-        avg_pkg = r.get('avg_package') or 0
-        
-        data.append({
-            'branch': branch,
-            'total': total,
-            'placed': placed,
-            'not_placed': total - placed,
-            'avg_package': round(avg_pkg, 2)
-        })
-        
-    return jsonify(data)
+    # Read from the materialized placement-first rollup (see branch_rollup.py)
+    return jsonify(get_branch_stats(db))
+
+
+# Company names are denormalized onto placements, so no join is needed
+_TOP_COMPANIES_PIPELINE = [
+    {'$match': {'company_name': {'$type': 'string'}}},
+    {
+        '$group': {
+            '_id': '$company_id',
+            'name': {'$first': '$company_name'},
+            'hires': {'$sum': 1},
+            'avg_package': {'$avg': '$package'}
+        }
+    },
+    {'$sort': {'hires': -1}},
+    {'$limit': 10}
+]
+
+
+def _top_companies_payload(results):
+    return [{
+        'company': r['name'],
+        'hires': r['hires'],
+        'avg_package': round(r['avg_package'], 2)
+    } for r in results]
 
 
 @analytics_bp.route('/api/analytics/top-companies', methods=['GET'])
+@cached_response('placements', 'companies')
 def top_companies():
     db = get_db()
-    
-    pipeline = [
-        {'$match': {'status': 'confirmed'}},
-        {
-            '$lookup': {
-                'from': 'companies',
-                'localField': 'company_id',
-                'foreignField': '_id',
-                'as': 'company'
-            }
-        },
-        {'$unwind': '$company'},
-        {
-            '$group': {
-                '_id': '$company_id',
-                'name': {'$first': '$company.name'},
-                'hires': {'$sum': 1},
-                'avg_package': {'$avg': '$package'}
-            }
-        },
-        {'$sort': {'hires': -1}},
-        {'$limit': 10}
+    results = db.placements.aggregate([_CONFIRMED_MATCH] + _TOP_COMPANIES_PIPELINE)
+    return jsonify(_top_companies_payload(results))
+
+
+_CGPA_PACKAGE_PIPELINE = [
+    {
+        '$lookup': {
+            'from': 'students',
+            'localField': 'student_id',
+            'foreignField': '_id',
+            'as': 'student'
+        }
+    },
+    {'$unwind': '$student'},
+    {
+        '$project': {
+            '_id': 0,
+            'cgpa': '$student.cgpa',
+            'package': '$package',
+            'branch': '$student.branch'
+        }
+    }
+]
+
+
+def _bin_expr(field, low, width, bins):
+    """Clamp floor((field - low) / width) into [0, bins - 1]."""
+    return {'$min': [bins - 1, {'$max': [0, {'$floor': {
+        '$divide': [{'$subtract': [field, low]}, width]
+    }}]}]}
+
+
+def _edges(low, high, bins):
+    width = (high - low) / bins if high > low else 1
+    return width, [round(low + i * width, 4) for i in range(bins + 1)]
+
+
+def _binned_cgpa_vs_package(db, cgpa_bins, package_bins, by_branch):
+    """Counts and per-bin means over a CGPA x package grid, optionally per branch."""
+    snapshot = get_snapshot(db)
+    package_low = snapshot.get('package_min')
+    package_high = snapshot.get('package_max')
+    cgpa_width, cgpa_edges = _edges(0, 10, cgpa_bins)
+    if package_low is None or package_high is None:
+        return {'cgpa_edges': cgpa_edges, 'package_edges': [], 'bins': []}
+    package_width, package_edges = _edges(package_low, package_high, package_bins)
+
+    group_id = {
+        'cgpa_bin': _bin_expr('$student.cgpa', 0, cgpa_width, cgpa_bins),
+        'package_bin': _bin_expr('$package', package_low, package_width, package_bins)
+    }
+    if by_branch:
+        group_id['branch'] = '$student.branch'
+
+    pipeline = [_CONFIRMED_MATCH, {'$project': {'student_id': 1, 'package': 1}}] + _CGPA_PACKAGE_PIPELINE[:2] + [
+        {'$match': {'student.cgpa': {'$type': 'number'}, 'package': {'$type': 'number'}}},
+        {'$group': {
+            '_id': group_id,
+            'count': {'$sum': 1},
+            'mean_cgpa': {'$avg': '$student.cgpa'},
+            'mean_package': {'$avg': '$package'}
+        }},
+        {'$sort': {'_id.branch': 1, '_id.cgpa_bin': 1, '_id.package_bin': 1}}
     ]
-    
-    results = db.placements.aggregate(pipeline)
-    
-    return jsonify([{
-        'company': r['name'],
-        'hires': r['hires'],
-        'avg_package': round(r['avg_package'], 2)
-    } for r in results])
+
+    bins = []
+    for r in db.placements.aggregate(pipeline):
+        row = {
+            'cgpa_bin': int(r['_id']['cgpa_bin']),
+            'package_bin': int(r['_id']['package_bin']),
+            'count': r['count'],
+            'mean_cgpa': round(r['mean_cgpa'], 2),
+            'mean_package': round(r['mean_package'], 2)
+        }
+        if by_branch:
+            row['branch'] = r['_id'].get('branch')
+        bins.append(row)
+
+    return {'cgpa_edges': cgpa_edges, 'package_edges': package_edges, 'bins': bins}
+
+
+def _allocate(sizes, total):
+    """Split `total` sample slots across strata proportionally (largest remainder, >=1 each while slots last)."""
+    population = sum(sizes)
+    quotas = [total * n / population for n in sizes]
+    alloc = [min(n, max(1, int(q))) if n else 0 for n, q in zip(sizes, quotas)]
+    # The one-slot floor can overshoot when strata are many; take it back from the largest
+    while sum(alloc) > total:
+        alloc[max(range(len(alloc)), key=lambda i: (alloc[i], -quotas[i]))] -= 1
+    by_remainder = sorted(range(len(sizes)), key=lambda i: quotas[i] - int(quotas[i]), reverse=True)
+    for i in by_remainder:
+        if sum(alloc) >= total:
+            break
+        if alloc[i] < sizes[i]:
+            alloc[i] += 1
+    return alloc
+
+
+def _sampled_cgpa_vs_package(db, max_points):
+    """
+    At most ~max_points scatter rows, stratified by the salary-distribution
+    package bands so sparse high packages stay visible. Strata counts come from
+    the (status, package) index; only sampled rows are joined to students.
+    """
+    boundaries = _SALARY_BOUNDARIES
+    strata = [{'$lt': boundaries[1]}]
+    strata += [{'$gte': lo, '$lt': hi} for lo, hi in zip(boundaries[1:-2], boundaries[2:-1])]
+    strata.append({'$gte': boundaries[-2]})
+
+    sizes = [db.placements.count_documents({'status': 'confirmed', 'package': band}) for band in strata]
+    total = sum(sizes)
+    if total <= max_points:
+        return list(db.placements.aggregate([_CONFIRMED_MATCH] + _CGPA_PACKAGE_PIPELINE)), total
+
+    results = []
+    for band, size in zip(strata, _allocate(sizes, max_points)):
+        if not size:
+            continue
+        results.extend(db.placements.aggregate([
+            {'$match': {'status': 'confirmed', 'package': band}},
+            {'$sample': {'size': size}}
+        ] + _CGPA_PACKAGE_PIPELINE))
+    return results, total
 
 
 @analytics_bp.route('/api/analytics/cgpa-vs-package', methods=['GET'])
+@cached_response('placements', 'students')
 def cgpa_vs_package():
+    """
+    Raw scatter rows by default. `mode=binned` (with `cgpa_bins`, `package_bins`,
+    `by_branch=true`) returns a 2D histogram; `max_points=N` a stratified sample.
+    """
     db = get_db()
-    
-    pipeline = [
-        {'$match': {'status': 'confirmed'}},
-        {
-            '$lookup': {
-                'from': 'students',
-                'localField': 'student_id',
-                'foreignField': '_id',
-                'as': 'student'
-            }
-        },
-        {'$unwind': '$student'},
-        {
-            '$project': {
-                '_id': 0,
-                'cgpa': '$student.cgpa',
-                'package': '$package',
-                'branch': '$student.branch'
-            }
-        }
-    ]
-    
-    results = list(db.placements.aggregate(pipeline))
+    mode = request.args.get('mode', 'points')
+    max_points = request.args.get('max_points', type=int)
+
+    if mode == 'binned':
+        cgpa_bins = request.args.get('cgpa_bins', 20, type=int)
+        package_bins = request.args.get('package_bins', 20, type=int)
+        by_branch = request.args.get('by_branch', 'false').lower() == 'true'
+        if not (1 <= cgpa_bins <= 200 and 1 <= package_bins <= 200):
+            return jsonify({'error': 'cgpa_bins and package_bins must be between 1 and 200'}), 400
+        return jsonify(_binned_cgpa_vs_package(db, cgpa_bins, package_bins, by_branch))
+
+    if mode != 'points':
+        return jsonify({'error': "mode must be 'points' or 'binned'"}), 400
+
+    if max_points is not None:
+        if max_points <= 0:
+            return jsonify({'error': 'max_points must be a positive integer'}), 400
+        results, total = _sampled_cgpa_vs_package(db, max_points)
+        response = jsonify(results)
+        response.headers['X-Total-Points'] = str(total)
+        return response
+
+    results = list(db.placements.aggregate([_CONFIRMED_MATCH] + _CGPA_PACKAGE_PIPELINE))
     return jsonify(results)
 
 
-@analytics_bp.route('/api/analytics/top-skills', methods=['GET'])
-def top_skills():
-    db = get_db()
-    
-    pipeline = [
-        {'$match': {'placed': True}},
-        {'$unwind': '$skills'},
-        {
-            '$group': {
-                '_id': '$skills',
-                'count': {'$sum': 1}
-            }
-        },
-        {'$sort': {'count': -1}},
-        {'$limit': 15}
-    ]
-    
-    results = db.students.aggregate(pipeline)
-    
+# Grouped by canonical skill id, so 'Node', 'node.js' and 'nodejs' count once
+_TOP_SKILLS_PIPELINE = [
+    {'$match': {'placed': True}},
+    {'$unwind': '$skill_ids'},
+    {
+        '$group': {
+            '_id': '$skill_ids',
+            'count': {'$sum': 1}
+        }
+    },
+    {'$sort': {'count': -1}},
+    {'$limit': 15}
+]
+
+
+def _labels_values_payload(results, default_label=None):
     labels = []
     values = []
     for r in results:
-        labels.append(r['_id'])
+        label = r['_id']
+        if default_label is not None:
+            label = label or default_label
+        labels.append(label)
         values.append(r['count'])
         
-    return jsonify({
+    return {
         'labels': labels,
         'values': values
-    })
+    }
+
+
+def _top_skills_payload(results):
+    names = get_registry(get_db()).names
+    return _labels_values_payload({'_id': names.get(r['_id'], str(r['_id'])), 'count': r['count']} for r in results)
+
+
+@analytics_bp.route('/api/analytics/top-skills', methods=['GET'])
+@cached_response('students')
+def top_skills():
+    db = get_db()
+    results = db.students.aggregate(_TOP_SKILLS_PIPELINE)
+    return jsonify(_top_skills_payload(results))
+
+
+def _parse_period_bound(value, inclusive_end=False):
+    """'YYYY-MM' or 'YYYY-MM-DD' -> datetime; an inclusive end is moved past the period."""
+    if len(value) == 7:
+        start = datetime.strptime(value, '%Y-%m')
+        if inclusive_end:
+            return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+        return start
+    day = datetime.strptime(value, '%Y-%m-%d')
+    return day + timedelta(days=1) if inclusive_end else day
 
 
 @analytics_bp.route('/api/analytics/monthly-trends', methods=['GET'])
+@cached_response('placements', 'students')
 def monthly_trends():
+    """
+    Without parameters: the historical Jan-Dec payload. With `from`, `to`
+    (inclusive, YYYY-MM or YYYY-MM-DD), `granularity=week|month|quarter` and an
+    optional `branch` or `company_id`: a year-aware series with cumulative totals.
+    """
     db = get_db()
-    
-    pipeline = [
-        {'$match': {'status': 'confirmed'}},
-        {
-            '$group': {
-                '_id': {'$month': '$placement_date'},
-                'count': {'$sum': 1},
-                'avg_package': {'$avg': '$package'}
-            }
-        },
-        {'$sort': {'_id': 1}}
-    ]
-    
-    results = db.placements.aggregate(pipeline)
-    
-    months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-              'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-              
-    labels = []
-    placements = []
-    avg_packages = []
-    
-    for r in results:
-        if r['_id']:
-            month_idx = r['_id'] - 1
-            if 0 <= month_idx < 12:
-                labels.append(months[month_idx])
-                placements.append(r['count'])
-                avg_packages.append(round(r['avg_package'], 2))
-    
+    params = ('from', 'to', 'granularity', 'branch', 'company_id')
+    if not any(p in request.args for p in params):
+        return jsonify(month_of_year_trends(db))
+
+    granularity = request.args.get('granularity', 'month')
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': f"granularity must be one of: {', '.join(GRANULARITIES)}"}), 400
+
+    try:
+        start = _parse_period_bound(request.args['from']) if request.args.get('from') else None
+        end = _parse_period_bound(request.args['to'], inclusive_end=True) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({'error': 'from/to must be formatted as YYYY-MM or YYYY-MM-DD'}), 400
+
+    branch = request.args.get('branch')
+    company_id = request.args.get('company_id')
+    if branch and company_id:
+        return jsonify({'error': 'Filter by either branch or company_id, not both'}), 400
+    if company_id and not ObjectId.is_valid(company_id):
+        return jsonify({'error': 'Invalid company ID format'}), 400
+
+    dim, key = 'all', None
+    if branch:
+        dim, key = 'branch', branch
+    elif company_id:
+        dim, key = 'company', ObjectId(company_id)
+
+    return jsonify(query_timeseries(db, start, end, granularity, dim, key))
+
+
+@analytics_bp.route('/api/analytics/package-percentiles', methods=['GET'])
+@cached_response('placements', 'students', 'companies')
+def package_percentiles():
+    """
+    Package percentiles (default p50/p90/p99, override with `q=0.25,0.75`)
+    globally, per branch and per company, from the stored quantile sketches.
+    """
+    db = get_db()
+    quantiles = DEFAULT_QUANTILES
+    if request.args.get('q'):
+        try:
+            quantiles = [float(q) for q in request.args['q'].split(',') if q.strip()]
+        except ValueError:
+            return jsonify({'error': 'q must be a comma-separated list of numbers'}), 400
+        if not quantiles or any(not 0 <= q <= 1 for q in quantiles):
+            return jsonify({'error': 'Each q must be between 0 and 1'}), 400
+
+    result = get_package_percentiles(db, quantiles)
+
+    company_ids = [row['company_id'] for row in result['companies']]
+    names = {c['_id']: c.get('name') for c in db.companies.find({'_id': {'$in': company_ids}}, {'name': 1})}
+    for row in result['companies']:
+        row['company'] = names.get(row['company_id'])
+        row['company_id'] = str(row['company_id'])
+
+    return jsonify(result)
+
+
+@analytics_bp.route('/api/analytics/query', methods=['GET'])
+@cached_response('students', 'placements')
+def cube_query():
+    """
+    Grouped counts and means from the in-memory cube, e.g.
+    `?group_by=branch,gender&placed=true&cgpa_min=7&cgpa_band_width=0.5`.
+    Dimensions: branch, gender, placed, cgpa_band. Filters: branch and gender
+    (comma-separated), placed, cgpa_min, cgpa_max.
+    """
+    if not analytics_cube.NUMPY_AVAILABLE:
+        return jsonify({'error': 'NumPy is not installed on this server'}), 503
+
+    group_by = [d.strip() for d in request.args.get('group_by', '').split(',') if d.strip()]
+    unknown = [d for d in group_by if d not in analytics_cube.DIMENSIONS]
+    if unknown or len(set(group_by)) != len(group_by):
+        return jsonify({
+            'error': 'group_by must list distinct dimensions',
+            'available': list(analytics_cube.DIMENSIONS)
+        }), 400
+
+    filters = {}
+    for dimension in ('branch', 'gender'):
+        if request.args.get(dimension):
+            filters[dimension] = [v.strip() for v in request.args[dimension].split(',')]
+    placed = request.args.get('placed')
+    if placed is not None and placed != '':
+        filters['placed'] = placed.lower() == 'true'
+    for bound in ('cgpa_min', 'cgpa_max'):
+        value = request.args.get(bound, type=float)
+        if value is not None:
+            filters[bound] = value
+
+    band_width = request.args.get('cgpa_band_width', 1.0, type=float)
+    if not math.isfinite(band_width) or band_width < analytics_cube.MIN_CGPA_BAND_WIDTH:
+        return jsonify({'error': f'cgpa_band_width must be at least {analytics_cube.MIN_CGPA_BAND_WIDTH:g}'}), 400
+
+    db = get_db()
+    cube = analytics_cube.get_cube(db)
+    started = time.perf_counter()
+    rows = cube.query(group_by, filters, band_width)
+    elapsed_us = round((time.perf_counter() - started) * 1e6, 1)
+
     return jsonify({
-        'labels': labels,
-        'placements': placements,
-        'avg_packages': avg_packages
+        'group_by': group_by,
+        'rows': rows,
+        'elapsed_us': elapsed_us,
+        'cube': {'rows': cube.size, 'built_at': cube.built_at.isoformat()}
     })
 
 
+@analytics_bp.route('/api/analytics/cube', methods=['GET'])
+def cube_info():
+    """Size and per-column memory of the in-memory analytics cube."""
+    if not analytics_cube.NUMPY_AVAILABLE:
+        return jsonify({'error': 'NumPy is not installed on this server'}), 503
+    cube = analytics_cube.get_cube(get_db())
+    return jsonify({'built_at': cube.built_at.isoformat(), **cube.memory()})
+
+
+_GENDER_PIPELINE = [
+    {
+        '$group': {
+            '_id': '$gender',
+            'count': {'$sum': 1}
+        }
+    }
+]
+
+
 @analytics_bp.route('/api/analytics/gender-distribution', methods=['GET'])
+@cached_response('students')
 def gender_distribution():
     db = get_db()
-    
-    pipeline = [
-        {
-            '$group': {
-                '_id': '$gender',
-                'count': {'$sum': 1}
-            }
+    results = db.students.aggregate(_GENDER_PIPELINE)
+    return jsonify(_labels_values_payload(results, default_label='Other'))
+
+
+# ─── Combined dashboard ───────────────────────────────────────────────────────
+
+# section -> (collection, $facet branch, payload formatter)
+_DASHBOARD_FACETS = {
+    'placement_overview': ('students', _PLACED_GROUP_PIPELINE, _placement_overview_payload),
+    'salary_distribution': ('placements', _SALARY_PIPELINE, _salary_payload),
+    'top_companies': ('placements', _TOP_COMPANIES_PIPELINE, _top_companies_payload),
+    'cgpa_vs_package': ('placements', _CGPA_PACKAGE_PIPELINE, list),
+    'top_skills': ('students', _TOP_SKILLS_PIPELINE, _top_skills_payload),
+    'gender_distribution': ('students', _GENDER_PIPELINE,
+                            lambda results: _labels_values_payload(results, default_label='Other')),
+}
+
+DASHBOARD_SECTIONS = ['stats', 'branch_stats', 'monthly_trends'] + list(_DASHBOARD_FACETS)
+
+
+@analytics_bp.route('/api/analytics/dashboard', methods=['GET'])
+@cached_response('students', 'placements', 'companies')
+def dashboard():
+    """
+    Every dashboard chart in one response: the stats snapshot and the branch
+    and time-series rollups, plus one $facet pass over students and one over
+    confirmed placements.
+    `?sections=stats,branch_stats` limits the work to what the client renders.
+    """
+    db = get_db()
+
+    sections_arg = request.args.get('sections')
+    if sections_arg:
+        sections = [s.strip().replace('-', '_') for s in sections_arg.split(',') if s.strip()]
+        unknown = [s for s in sections if s not in DASHBOARD_SECTIONS]
+        if unknown:
+            return jsonify({
+                'error': f"Unknown sections: {', '.join(unknown)}",
+                'available': DASHBOARD_SECTIONS
+            }), 400
+    else:
+        sections = DASHBOARD_SECTIONS
+
+    data = {}
+    if 'stats' in sections:
+        data['stats'] = snapshot_to_stats(get_snapshot(db))
+    if 'branch_stats' in sections:
+        data['branch_stats'] = get_branch_stats(db)
+    if 'monthly_trends' in sections:
+        data['monthly_trends'] = month_of_year_trends(db)
+
+    for collection in ('students', 'placements'):
+        facets = {
+            name: pipeline
+            for name, (source, pipeline, _) in _DASHBOARD_FACETS.items()
+            if source == collection and name in sections
         }
-    ]
-    
-    results = db.students.aggregate(pipeline)
-    
-    labels = []
-    values = []
-    for r in results:
-        labels.append(r['_id'] or 'Other')
-        values.append(r['count'])
-        
-    return jsonify({
-        'labels': labels,
-        'values': values
-    })
+        if not facets:
+            continue
+
+        pipeline = [{'$facet': facets}]
+        if collection == 'placements':
+            pipeline.insert(0, _CONFIRMED_MATCH)
+
+        result = next(db[collection].aggregate(pipeline), {})
+        for name in facets:
+            formatter = _DASHBOARD_FACETS[name][2]
+            data[name] = formatter(result.get(name, []))
+
+    return jsonify(data)
@@ -1,29 +1,67 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
 from db import get_db
 from models import Company
 from bson import ObjectId
+from pymongo import UpdateOne
 from datetime import datetime
+from analytics_snapshot import apply_company_created, apply_company_deleted
+from branch_rollup import refresh_branches
+from response_cache import bump_generation
+from placement_timeseries import apply_placements_removed
+from package_sketches import remove_packages
+from company_catalog import get_catalog, bump_catalog_version
+from placement_names import fan_out_companies
+from candidate_ranking import rank_candidates, DEFAULT_K, MAX_K
+from skill_registry import get_registry, intern_skills, intern_skill_ids, skill_ids
+import json
+import re
 
 companies_bp = Blueprint('companies', __name__)
 
+UPDATABLE_FIELDS = ['name', 'industry', 'min_package', 'max_package', 'requirements', 'website']
+
+MAX_BULK_ITEMS = 1000
+
+
+def _update_doc(data):
+    """Whitelisted $set fields from a request payload, packages coerced to float."""
+    update_doc = {}
+    for field in UPDATABLE_FIELDS:
+        if field in data:
+            # Type conversion for packages
+            val = data[field]
+            if field in ['min_package', 'max_package']:
+                val = float(val) if val is not None else 0
+            update_doc[field] = val
+    return update_doc
+
+
+def _catalog_response(catalog, body, key):
+    """Serve pre-serialized catalog JSON with the catalog version as ETag."""
+    response = Response(body, mimetype='application/json')
+    response.set_etag(catalog.etag(key))
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 
 @companies_bp.route('/api/companies', methods=['GET'])
 def get_companies():
     db = get_db()
-    industry = request.args.get('industry')
+    industry = request.args.get('industry') or None
     search = request.args.get('search')
-    
-    query = {}
-    
-    if industry:
-        query['industry'] = industry
-    if search:
-        query['name'] = {'$regex': search, '$options': 'i'}
-        
-    cursor = db.companies.find(query).sort('name', 1)
-    companies_list = [Company.to_dict(doc) for doc in cursor]
-    
-    return jsonify(companies_list)
+
+    catalog = get_catalog(db)
+    if not search:
+        return _catalog_response(catalog, catalog.payload(industry), f'list|{industry}')
+
+    # Searches are filtered from the in-memory catalog instead of a regex scan
+    pattern = re.compile(re.escape(search), re.IGNORECASE)
+    companies_list = [
+        Company.to_dict(dict(doc)) for doc in catalog.docs
+        if pattern.search(doc.get('name') or '') and (industry is None or doc.get('industry') == industry)
+    ]
+    body = json.dumps(companies_list, sort_keys=True, separators=(',', ':')).encode() + b'\n'
+    return _catalog_response(catalog, body, f'search|{industry}|{search}')
 
 
 @companies_bp.route('/api/companies/<company_id>', methods=['GET'])
@@ -33,11 +71,38 @@ def get_company(company_id):
         if not ObjectId.is_valid(company_id):
             return jsonify({'error': 'Invalid company ID format'}), 400
             
-        company = db.companies.find_one({'_id': ObjectId(company_id)})
+        company = get_catalog(db).by_id.get(ObjectId(company_id))
         if not company:
             return jsonify({'error': 'Company not found'}), 404
             
-        return jsonify(Company.to_dict(company))
+        return jsonify(Company.to_dict(dict(company)))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@companies_bp.route('/api/companies/<company_id>/candidates', methods=['GET'])
+def get_candidates(company_id):
+    """Best-fitting students for a company (?k=50&branch=&min_cgpa=)."""
+    db = get_db()
+    try:
+        if not ObjectId.is_valid(company_id):
+            return jsonify({'error': 'Invalid company ID format'}), 400
+
+        company = get_catalog(db).by_id.get(ObjectId(company_id))
+        if not company:
+            return jsonify({'error': 'Company not found'}), 404
+
+        k = min(max(request.args.get('k', DEFAULT_K, type=int), 1), MAX_K)
+        branch = request.args.get('branch') or None
+        min_cgpa = request.args.get('min_cgpa', type=float)
+
+        candidates = rank_candidates(db, company, get_registry(db).names, k=k, branch=branch, min_cgpa=min_cgpa)
+        return jsonify({
+            'company_id': company_id,
+            'company': company.get('name'),
+            'requirements': company.get('requirements', []),
+            'candidates': candidates
+        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -56,9 +121,13 @@ def create_company():
         'website': data.get('website', ''),
         'created_at': datetime.utcnow()
     }
+    company_doc['requirement_ids'] = intern_skill_ids(db, company_doc['requirements'])
     
     result = db.companies.insert_one(company_doc)
     company_doc['_id'] = result.inserted_id
+    apply_company_created(db)
+    bump_catalog_version(db)
+    bump_generation('companies')
     
     return jsonify(Company.to_dict(company_doc)), 201
 
@@ -71,21 +140,12 @@ def update_company(company_id):
             return jsonify({'error': 'Invalid company ID format'}), 400
             
         data = request.get_json()
-        update_doc = {}
-        
-        # Build update document dynamically
-        updatable_fields = ['name', 'industry', 'min_package', 'max_package', 'requirements', 'website']
-        
-        for field in updatable_fields:
-            if field in data:
-                # Type conversion for packages
-                val = data[field]
-                if field in ['min_package', 'max_package']:
-                    val = float(val) if val is not None else 0
-                update_doc[field] = val
+        update_doc = _update_doc(data)
                 
         if not update_doc:
             return jsonify({'error': 'No fields to update'}), 400
+        if 'requirements' in update_doc:
+            update_doc['requirement_ids'] = intern_skill_ids(db, update_doc['requirements'])
             
         result = db.companies.update_one(
             {'_id': ObjectId(company_id)},
@@ -95,6 +155,10 @@ def update_company(company_id):
         if result.matched_count == 0:
             return jsonify({'error': 'Company not found'}), 404
             
+        if 'name' in update_doc:
+            fan_out_companies(db, [(ObjectId(company_id), update_doc['name'])])
+        bump_catalog_version(db)
+        bump_generation('companies', 'placements')
         updated_company = db.companies.find_one({'_id': ObjectId(company_id)})
         return jsonify(Company.to_dict(updated_company))
         
@@ -102,6 +166,69 @@ def update_company(company_id):
         return jsonify({'error': str(e)}), 500
 
 
+@companies_bp.route('/api/companies/bulk', methods=['PATCH'])
+def bulk_update_companies():
+    """Apply [{id, fields}] updates in one bulk_write without re-reading the documents."""
+    db = get_db()
+    try:
+        data = request.get_json() or {}
+        items = data.get('items') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'Expected a non-empty list of {id, fields}'}), 400
+        if len(items) > MAX_BULK_ITEMS:
+            return jsonify({'error': f'At most {MAX_BULK_ITEMS} items per request'}), 400
+
+        results = [None] * len(items)
+        valid = []
+        for i, item in enumerate(items):
+            item_id = item.get('id') if isinstance(item, dict) else None
+            if not item_id or not ObjectId.is_valid(str(item_id)):
+                results[i] = {'id': item_id, 'status': 'invalid', 'error': 'Invalid company ID format'}
+                continue
+            try:
+                fields = _update_doc(item.get('fields') or {})
+            except (TypeError, ValueError) as e:
+                results[i] = {'id': item_id, 'status': 'invalid', 'error': str(e)}
+                continue
+            if not fields:
+                results[i] = {'id': item_id, 'status': 'invalid', 'error': 'No fields to update'}
+                continue
+            valid.append((i, ObjectId(str(item_id)), fields))
+
+        # An _id-only read (served from the _id index) tells missing ids apart
+        existing = {
+            c['_id'] for c in db.companies.find({'_id': {'$in': [oid for _, oid, _ in valid]}}, {'_id': 1})
+        }
+        mapping = intern_skills(db, [r for _, _, fields in valid for r in fields.get('requirements') or []])
+        ops, renames = [], []
+        for i, oid, fields in valid:
+            if oid not in existing:
+                results[i] = {'id': str(oid), 'status': 'not_found'}
+                continue
+            if 'requirements' in fields:
+                fields['requirement_ids'] = skill_ids(mapping, fields['requirements'])
+            ops.append(UpdateOne({'_id': oid}, {'$set': fields}))
+            if 'name' in fields:
+                renames.append((oid, fields['name']))
+            results[i] = {'id': str(oid), 'status': 'updated'}
+
+        modified = 0
+        if ops:
+            modified = db.companies.bulk_write(ops, ordered=False).modified_count
+            fan_out_companies(db, renames)
+            bump_catalog_version(db)
+            bump_generation('companies', 'placements')
+
+        return jsonify({
+            'matched': len(ops),
+            'modified': modified,
+            'results': results
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @companies_bp.route('/api/companies/<company_id>', methods=['DELETE'])
 def delete_company(company_id):
     db = get_db()
@@ -115,7 +242,20 @@ def delete_company(company_id):
             return jsonify({'error': 'Company not found'}), 404
             
         # Optional: handle cascade delete logic
+        placements = list(db.placements.find(
+            {'company_id': ObjectId(company_id)},
+            {'student_id': 1, 'company_id': 1, 'status': 1, 'package': 1, 'placement_date': 1, 'student_branch': 1}
+        ))
         db.placements.delete_many({'company_id': ObjectId(company_id)})
+        apply_company_deleted(db, placements)
+        if placements:
+            # Branches are denormalized onto placements, so no students read is needed
+            branch_by_student = {p['student_id']: p.get('student_branch') for p in placements}
+            refresh_branches(db, set(branch_by_student.values()))
+            apply_placements_removed(db, placements, branch_by_student)
+            remove_packages(db, placements, branch_by_student)
+        bump_catalog_version(db)
+        bump_generation('companies', 'placements')
         
         return jsonify({'message': 'Company deleted successfully'})
         
@@ -126,5 +266,5 @@ def delete_company(company_id):
 @companies_bp.route('/api/companies/industries', methods=['GET'])
 def get_industries():
     db = get_db()
-    industries = db.companies.distinct('industry')
-    return jsonify(industries)
+    catalog = get_catalog(db)
+    return _catalog_response(catalog, catalog.industries_payload, 'industries')
@@ -1,8 +1,11 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from db import get_db
 from models import Student, Company, Placement
 from bson import ObjectId
-import random
+from company_catalog import get_catalog
+from skill_matcher import cached_recommend, student_fingerprint
+from recommendation_batch import stored_matches
+from skill_registry import get_registry
 
 jobs_bp = Blueprint('jobs', __name__)
 
@@ -18,49 +21,20 @@ def get_recommendations(student_id):
         if not student_doc:
             return jsonify({'error': 'Student not found'}), 404
             
-        student_skills = set([s.lower() for s in student_doc.get('skills', [])])
-        student_cgpa = student_doc.get('cgpa', 7.0)
+        # Served from the last batch run while the student and catalog are
+        # unchanged, else scored against every company by the cached skill
+        # matrix; deterministic either way, so a repeat poll is answered with 304
+        catalog = get_catalog(db)
+        matches = stored_matches(db, catalog, student_doc)
+        if matches is None:
+            matches = cached_recommend(catalog, student_doc, get_registry(db).names)
         
-        companies = list(db.companies.find({}))
-        matches = []
-        
-        for company in companies:
-            # Need to default to empty list if none
-            reqs = company.get('requirements', [])
-            if not reqs:
-                reqs = []
-            company_reqs = set([r.lower() for r in reqs])
-            
-            # Calculate skill overlap
-            overlap = student_skills.intersection(company_reqs)
-            match_score = 0
-            if company_reqs:
-                match_score = int((len(overlap) / len(company_reqs)) * 100)
-            else:
-                match_score = random.randint(40, 70) # Fallback heuristic
-                
-            # Add some randomness/variety + bonus for CGPA
-            if student_cgpa > 8.5:
-                match_score += 10
-                
-            match_score = min(98, max(30, match_score + random.randint(-5, 5)))
-            
-            matches.append({
-                'company': company.get('name'),
-                'industry': company.get('industry'),
-                'role': random.choice(['Software Engineer', 'Data Analyst', 'Product Intern', 'UI/UX Developer', 'Backend Dev']),
-                'package': random.uniform(company.get('min_package', 0), company.get('max_package', 0)),
-                'match_score': match_score,
-                'matched_skills': list(overlap) if overlap else list(company_reqs)[:2],
-                'reason': f"Strong overlap in {', '.join(list(overlap)[:3]) if overlap else 'core requirements'} and alignment with {company.get('industry')} standards."
-            })
-            
-        # Sort by match score descending
-        matches.sort(key=lambda x: x['match_score'], reverse=True)
-        
-        return jsonify({
+        response = jsonify({
             'student_id': str(student_id),
-            'matches': matches[:5] # Return top 5
+            'matches': matches # Top 5
         })
+        response.set_etag(catalog.etag(f'recommendations|{student_id}|{student_fingerprint(student_doc)}'))
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,76 +1,83 @@
-from flask import Blueprint, request, jsonify
-from db import get_db
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
+from db import get_db, supports_transactions
 from models import Placement
 from bson import ObjectId
 from datetime import datetime
+from analytics_snapshot import apply_placement_created, apply_placements_created, apply_placements_deleted, apply_student_marked_placed
+from branch_rollup import refresh_branches
+from response_cache import bump_generation
+from placement_timeseries import apply_placement, apply_placements_added
+from package_sketches import record_package, record_packages
+from pagination import encode_cursor, decode_cursor, keyset_filter, InvalidCursor
+from company_catalog import get_catalog
+from placement_names import placement_name_fields, NAME_FIELDS
 
 placements_bp = Blueprint('placements', __name__)
 
+# Newest first with _id as the tie-breaker, so keyset pages are stable
+PLACEMENT_SORT = [('placement_date', -1), ('_id', -1)]
+
+NDJSON = 'application/x-ndjson'
+
+MAX_BULK_ITEMS = 1000
+
 
 @placements_bp.route('/api/placements', methods=['GET'])
 def get_placements():
+    """
+    Placements newest first, read with an index-backed find() and no joins:
+    names are denormalized onto each placement. ?cursor= switches to keyset
+    pages; Accept: application/x-ndjson streams every matching row straight
+    from the cursor.
+    """
     db = get_db()
     status = request.args.get('status')
-    
-    pipeline = []
-    
+    per_page = request.args.get('per_page', 50, type=int)
+    paged = 'cursor' in request.args
+    stream = request.accept_mimetypes.best_match(['application/json', NDJSON]) == NDJSON
+
+    query = {}
     if status:
-        pipeline.append({'$match': {'status': status}})
-        
-    # Join with students collection
-    pipeline.extend([
-        {
-            '$lookup': {
-                'from': 'students',
-                'localField': 'student_id',
-                'foreignField': '_id',
-                'as': 'student'
-            }
-        },
-        {
-            '$lookup': {
-                'from': 'companies',
-                'localField': 'company_id',
-                'foreignField': '_id',
-                'as': 'company'
-            }
-        },
-        {
-            '$unwind': {
-                'path': '$student',
-                'preserveNullAndEmptyArrays': True
-            }
-        },
-        {
-            '$unwind': {
-                'path': '$company',
-                'preserveNullAndEmptyArrays': True
-            }
-        },
-        {
-            '$sort': {'placement_date': -1}
-        }
-    ])
-    
-    cursor = db.placements.aggregate(pipeline)
-    placements_list = []
-    
-    for doc in cursor:
-        student_name = doc.get('student', {}).get('name') if doc.get('student') else None
-        company_name = doc.get('company', {}).get('name') if doc.get('company') else None
-        
-        # Clean up populated fields for the to_dict method
-        if 'student' in doc:
-            del doc['student']
-        if 'company' in doc:
-            del doc['company']
-            
+        query['status'] = status
+
+    token = request.args.get('cursor')
+    if token:
+        try:
+            after = decode_cursor(token, PLACEMENT_SORT)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        query = {'$and': [query, keyset_filter(PLACEMENT_SORT, after)]} if query else keyset_filter(PLACEMENT_SORT, after)
+
+    cursor = db.placements.find(query).sort(PLACEMENT_SORT).batch_size(500)
+    if paged and not stream:
+        per_page = max(1, min(per_page, 500))
+        cursor = cursor.limit(per_page + 1)
+
+    def format_row(doc):
+        sort_key = {field: doc.get(field) for field, _ in PLACEMENT_SORT}
         formatted_doc = Placement.to_dict(doc)
-        formatted_doc['student_name'] = student_name
-        formatted_doc['company_name'] = company_name
-        placements_list.append(formatted_doc)
+        for field in NAME_FIELDS:
+            formatted_doc.setdefault(field, None)
+        return formatted_doc, sort_key
 
-    return jsonify(placements_list)
+    if stream:
+        def generate():
+            for doc in cursor:
+                yield current_app.json.dumps(format_row(doc)[0]) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype=NDJSON)
+
+    rows = [format_row(doc) for doc in cursor]
+    if not paged:
+        return jsonify([row for row, _ in rows])
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    return jsonify({
+        'placements': [row for row, _ in rows],
+        'next_cursor': encode_cursor(rows[-1][1], PLACEMENT_SORT) if has_more else None,
+        'per_page': per_page
+    })
 
 
 @placements_bp.route('/api/placements/<placement_id>', methods=['GET'])
@@ -85,13 +92,8 @@ def get_placement(placement_id):
             return jsonify({'error': 'Placement not found'}), 404
             
         formatted_doc = Placement.to_dict(placement)
-        
-        # Manually fetch names
-        student = db.students.find_one({'_id': ObjectId(formatted_doc['student_id'])})
-        company = db.companies.find_one({'_id': ObjectId(formatted_doc['company_id'])})
-        
-        formatted_doc['student_name'] = student.get('name') if student else None
-        formatted_doc['company_name'] = company.get('name') if company else None
+        for field in NAME_FIELDS:
+            formatted_doc.setdefault(field, None)
             
         return jsonify(formatted_doc)
     except Exception as e:
@@ -107,38 +109,140 @@ def create_placement():
         student_id = ObjectId(data['student_id'])
         company_id = ObjectId(data['company_id'])
         
+        student = db.students.find_one({'_id': student_id}, {'name': 1, 'branch': 1})
+        company = get_catalog(db).by_id.get(company_id)
+        
         placement_doc = {
             'student_id': student_id,
             'company_id': company_id,
             'role': data['role'],
             'package': float(data['package']),
             'status': data.get('status', 'confirmed'),
-            'placement_date': datetime.utcnow()
+            'placement_date': datetime.utcnow(),
+            **placement_name_fields(student, company)
         }
         
         result = db.placements.insert_one(placement_doc)
         placement_doc['_id'] = result.inserted_id
         
+        apply_placement_created(db, placement_doc)
+        
         # Mark student as placed
-        db.students.update_one(
-            {'_id': student_id},
+        marked = db.students.update_one(
+            {'_id': student_id, 'placed': {'$ne': True}},
             {'$set': {'placed': True}}
         )
+        if marked.modified_count:
+            apply_student_marked_placed(db)
         
-        # Fetch names for response
-        student = db.students.find_one({'_id': student_id})
-        company = db.companies.find_one({'_id': company_id})
-        
-        formatted_doc = Placement.to_dict(placement_doc)
-        formatted_doc['student_name'] = student.get('name') if student else None
-        formatted_doc['company_name'] = company.get('name') if company else None
+        branch = student.get('branch') if student else None
+        if student:
+            refresh_branches(db, [branch])
+        apply_placement(db, placement_doc, branch)
+        record_package(db, placement_doc, branch)
+        bump_generation('placements', 'students')
         
-        return jsonify(formatted_doc), 201
+        return jsonify(Placement.to_dict(placement_doc)), 201
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@placements_bp.route('/api/placements/bulk', methods=['POST'])
+def create_placements_bulk():
+    """
+    Create many placements at once: one $in read for the students, company
+    names from the catalog, one insert_many and one update_many marking the
+    students placed, inside a multi-document transaction when the deployment
+    supports one. Any invalid item rejects the whole batch.
+    """
+    db = get_db()
+    try:
+        data = request.get_json() or {}
+        items = data.get('items') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'Expected a non-empty list of placements'}), 400
+        if len(items) > MAX_BULK_ITEMS:
+            return jsonify({'error': f'At most {MAX_BULK_ITEMS} items per request'}), 400
+
+        errors = []
+        parsed = []
+        for i, item in enumerate(items):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError('Expected an object')
+                if not ObjectId.is_valid(str(item.get('student_id'))) or not ObjectId.is_valid(str(item.get('company_id'))):
+                    raise ValueError('Invalid student or company ID format')
+                if not item.get('role'):
+                    raise ValueError('role is required')
+                parsed.append((i, ObjectId(str(item['student_id'])), ObjectId(str(item['company_id'])),
+                               item['role'], float(item['package']), item.get('status', 'confirmed')))
+            except (KeyError, TypeError, ValueError) as e:
+                errors.append({'index': i, 'error': str(e)})
+
+        students = {
+            s['_id']: s for s in db.students.find(
+                {'_id': {'$in': list({p[1] for p in parsed})}}, {'name': 1, 'branch': 1}
+            )
+        }
+        companies = get_catalog(db).by_id
+
+        now = datetime.utcnow()
+        placement_docs = []
+        for i, student_id, company_id, role, package, status in parsed:
+            if student_id not in students:
+                errors.append({'index': i, 'error': 'Student not found'})
+                continue
+            if company_id not in companies:
+                errors.append({'index': i, 'error': 'Company not found'})
+                continue
+            placement_docs.append({
+                'student_id': student_id,
+                'company_id': company_id,
+                'role': role,
+                'package': package,
+                'status': status,
+                'placement_date': now,
+                **placement_name_fields(students[student_id], companies[company_id])
+            })
+        if errors:
+            errors.sort(key=lambda e: e['index'])
+            return jsonify({'error': 'Invalid placements, nothing was created', 'errors': errors}), 400
+
+        student_ids = list({p['student_id'] for p in placement_docs})
+
+        def write(session=None):
+            db.placements.insert_many(placement_docs, session=session)
+            marked = db.students.update_many(
+                {'_id': {'$in': student_ids}, 'placed': {'$ne': True}},
+                {'$set': {'placed': True}},
+                session=session
+            )
+            return marked.modified_count
+
+        if supports_transactions(db.client):
+            with db.client.start_session() as session:
+                marked_count = session.with_transaction(write)
+        else:
+            marked_count = write()
+
+        apply_placements_created(db, placement_docs)
+        apply_student_marked_placed(db, marked_count)
+        branch_by_student = {sid: students[sid].get('branch') for sid in student_ids}
+        refresh_branches(db, set(branch_by_student.values()))
+        apply_placements_added(db, placement_docs, branch_by_student)
+        record_packages(db, placement_docs, branch_by_student)
+        bump_generation('placements', 'students')
+
+        return jsonify({
+            'created': len(placement_docs),
+            'placements': [Placement.to_dict(doc) for doc in placement_docs]
+        }), 201
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @placements_bp.route('/api/placements/<placement_id>', methods=['DELETE'])
 def delete_placement(placement_id):
     db = get_db()
@@ -149,11 +253,22 @@ def delete_placement(placement_id):
         # Optional: Can check if this was the only placement and mark student as not placed
         # but leaving simple for now
             
-        result = db.placements.delete_one({'_id': ObjectId(placement_id)})
+        placement = db.placements.find_one_and_delete({'_id': ObjectId(placement_id)})
         
-        if result.deleted_count == 0:
+        if placement is None:
             return jsonify({'error': 'Placement not found'}), 404
             
+        apply_placements_deleted(db, [placement])
+        if 'student_branch' in placement:
+            branch = placement['student_branch']
+        else:
+            student = db.students.find_one({'_id': placement['student_id']}, {'branch': 1})
+            branch = student.get('branch') if student else None
+        refresh_branches(db, [branch])
+        apply_placement(db, placement, branch, sign=-1)
+        record_package(db, placement, branch, sign=-1)
+        bump_generation('placements')
+            
         return jsonify({'message': 'Placement deleted successfully'})
         
     except Exception as e:
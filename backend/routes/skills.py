@@ -0,0 +1,18 @@
+from flask import Blueprint, request, jsonify
+from db import get_db
+from skill_registry import get_registry, MAX_SUGGESTIONS
+
+skills_bp = Blueprint('skills', __name__)
+
+
+@skills_bp.route('/api/skills/autocomplete', methods=['GET'])
+def autocomplete_skills():
+    """Canonical skills whose name or an alias starts with ?q=, most used first."""
+    db = get_db()
+    try:
+        q = request.args.get('q', '')
+        limit = max(1, min(request.args.get('limit', 10, type=int), MAX_SUGGESTIONS))
+        return jsonify(get_registry(db).autocomplete(q, limit))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
@@ -1,12 +1,47 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from db import get_db
 from models import Student
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from analytics_snapshot import apply_student_created, apply_student_updated, apply_student_deleted, apply_students_batch
+from branch_rollup import refresh_branches
+from response_cache import bump_generation
+from placement_timeseries import apply_placements_removed, move_student_branch
+from package_sketches import remove_packages, move_branch_packages
+from placement_names import fan_out_students
+from pagination import encode_cursor, decode_cursor, keyset_filter, InvalidCursor
+from student_search import search_filter, search_tokens, autocomplete
+from skill_matcher import invalidate_students
+from skill_registry import intern_skills, intern_skill_ids, skill_ids
+from student_import import (
+    import_students, read_rows, detect_format, coerce_field, MultipartUpload, RowError, BATCH_SIZE, MAX_BATCH_SIZE
+)
 from datetime import datetime
-import re
+import io
+import json
 
 students_bp = Blueprint('students', __name__)
 
+# Name order with _id as the tie-breaker, so keyset pages are stable
+STUDENT_SORT = [('name', 1), ('_id', 1)]
+
+UPDATABLE_FIELDS = ['name', 'email', 'branch', 'cgpa', 'skills',
+                    'projects', 'internships', 'placed', 'resume_text', 'gender']
+
+MAX_BULK_ITEMS = 1000
+
+
+def _update_doc(data, allow_null=False):
+    """
+    Whitelisted, type-coerced $set fields from a request payload; raises ValueError.
+    With allow_null a null is kept and clears the field, as the single PUT
+    always has; otherwise it is rejected.
+    """
+    return {
+        field: None if allow_null and data[field] is None else coerce_field(field, data[field])
+        for field in UPDATABLE_FIELDS if field in data
+    }
+
 
 @students_bp.route('/api/students', methods=['GET'])
 def get_students():
@@ -25,23 +60,49 @@ def get_students():
         query['placed'] = (placed.lower() == 'true')
         
     if search:
-        # Case-insensitive regex search in MongoDB
-        search_regex = re.compile(search, re.IGNORECASE)
-        query['$or'] = [
-            {'name': search_regex},
-            {'email': search_regex}
-        ]
-
-    total = db.students.count_documents(query)
+        # Escaped, anchored prefix match on the indexed name/email tokens
+        query.update(search_filter(search))
+
+    include_total = request.args.get('include_total', 'false' if 'cursor' in request.args else 'true').lower() == 'true'
+    total = None
+    if include_total:
+        # Unfiltered totals come from collection metadata instead of a count scan
+        total = db.students.count_documents(query) if query else db.students.estimated_document_count()
+
+    if 'cursor' in request.args:
+        # Keyset pagination: an opaque (name, _id) token replaces skip()
+        per_page = max(1, min(per_page, 500))
+        token = request.args.get('cursor')
+        find_query = query
+        if token:
+            try:
+                after = decode_cursor(token, STUDENT_SORT)
+            except InvalidCursor as e:
+                return jsonify({'error': str(e)}), 400
+            find_query = {'$and': [query, keyset_filter(STUDENT_SORT, after)]} if query else keyset_filter(STUDENT_SORT, after)
+
+        docs = list(db.students.find(find_query).sort(STUDENT_SORT).limit(per_page + 1))
+        has_more = len(docs) > per_page
+        docs = docs[:per_page]
+        next_cursor = encode_cursor(docs[-1], STUDENT_SORT) if has_more else None
+
+        return jsonify({
+            'students': [Student.to_dict(doc) for doc in docs],
+            'next_cursor': next_cursor,
+            'per_page': per_page,
+            'total': total
+        })
     
     # Pagination calculation
     skip = (page - 1) * per_page
     
     # Execute query, sort by name ascending
-    cursor = db.students.find(query).sort('name', 1).skip(skip).limit(per_page)
+    cursor = db.students.find(query).sort(STUDENT_SORT).skip(skip).limit(per_page)
     
     students_list = [Student.to_dict(doc) for doc in cursor]
-    pages = (total + per_page - 1) // per_page if per_page > 0 else 1
+    pages = None
+    if total is not None:
+        pages = (total + per_page - 1) // per_page if per_page > 0 else 1
 
     return jsonify({
         'students': students_list,
@@ -51,6 +112,17 @@ def get_students():
     })
 
 
+@students_bp.route('/api/students/autocomplete', methods=['GET'])
+def autocomplete_students():
+    db = get_db()
+    try:
+        q = request.args.get('q', '')
+        limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+        return jsonify(autocomplete(db, q, limit))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @students_bp.route('/api/students/<student_id>', methods=['GET'])
 def get_student(student_id):
     db = get_db()
@@ -84,13 +156,51 @@ def create_student():
         'gender': data.get('gender', 'Other'),
         'created_at': datetime.utcnow()
     }
+    student_doc['search_tokens'] = search_tokens(student_doc)
+    student_doc['skill_ids'] = intern_skill_ids(db, student_doc['skills'])
     
     result = db.students.insert_one(student_doc)
     student_doc['_id'] = result.inserted_id
+    apply_student_created(db, student_doc)
+    refresh_branches(db, [student_doc['branch']])
+    bump_generation('students')
     
     return jsonify(Student.to_dict(student_doc)), 201
 
 
+@students_bp.route('/api/students/import', methods=['POST'])
+def import_students_upload():
+    """
+    Bulk upsert-by-email from a CSV or JSONL upload (multipart 'file' or the raw
+    body). Both are read incrementally; streams NDJSON progress events, one per
+    batch, then a 'done' event.
+    """
+    db = get_db()
+    filename, mimetype, stream = None, request.mimetype, request.stream
+    if request.mimetype == 'multipart/form-data':
+        boundary = request.mimetype_params.get('boundary')
+        if not boundary:
+            return jsonify({'error': 'Multipart upload without a boundary'}), 400
+        try:
+            upload = MultipartUpload(request.stream, boundary.encode())
+        except RowError as e:
+            return jsonify({'error': str(e)}), 400
+        filename, mimetype, stream = upload.filename, upload.mimetype, io.BufferedReader(upload)
+    fmt = detect_format(request.args.get('format'), filename, mimetype)
+    if fmt is None:
+        return jsonify({'error': 'Unknown format, use ?format=csv or ?format=jsonl'}), 400
+    batch_size = max(1, min(request.args.get('batch_size', BATCH_SIZE, type=int), MAX_BATCH_SIZE))
+
+    def generate():
+        try:
+            for event in import_students(db, read_rows(stream, fmt), batch_size):
+                yield json.dumps(event) + '\n'
+        except Exception as e:
+            yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 @students_bp.route('/api/students/<student_id>', methods=['PUT'])
 def update_student(student_id):
     db = get_db()
@@ -99,34 +209,130 @@ def update_student(student_id):
             return jsonify({'error': 'Invalid student ID format'}), 400
             
         data = request.get_json()
-        update_doc = {}
-        
-        # Build update document dynamically
-        updatable_fields = ['name', 'email', 'branch', 'cgpa', 'skills', 
-                           'projects', 'internships', 'placed', 'resume_text', 'gender']
-        
-        for field in updatable_fields:
-            if field in data:
-                update_doc[field] = data[field]
+        try:
+            update_doc = _update_doc(data, allow_null=True)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
                 
         if not update_doc:
             return jsonify({'error': 'No fields to update'}), 400
+        if 'name' in update_doc or 'email' in update_doc:
+            existing = db.students.find_one({'_id': ObjectId(student_id)}, {'name': 1, 'email': 1}) or {}
+            update_doc['search_tokens'] = search_tokens({**existing, **update_doc})
+        if 'skills' in update_doc:
+            update_doc['skill_ids'] = intern_skill_ids(db, update_doc['skills'])
 
-        result = db.students.update_one(
+        # Return the pre-image so the analytics snapshot can apply a delta
+        previous = db.students.find_one_and_update(
             {'_id': ObjectId(student_id)},
-            {'$set': update_doc}
+            {'$set': update_doc},
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        if previous is None:
             return jsonify({'error': 'Student not found'}), 404
             
-        updated_student = db.students.find_one({'_id': ObjectId(student_id)})
+        updated_student = {**previous, **update_doc}
+        apply_student_updated(db, previous, updated_student)
+        if 'branch' in update_doc or 'placed' in update_doc:
+            refresh_branches(db, [previous.get('branch'), updated_student.get('branch')])
+        if 'branch' in update_doc:
+            move_student_branch(db, previous['_id'], previous.get('branch'), updated_student.get('branch'))
+            move_branch_packages(db, previous['_id'], previous.get('branch'), updated_student.get('branch'))
+        if fan_out_students(db, [(previous, updated_student)]):
+            bump_generation('placements')
+        invalidate_students([previous['_id']])
+        bump_generation('students')
         return jsonify(Student.to_dict(updated_student))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@students_bp.route('/api/students/bulk', methods=['PATCH'])
+def bulk_update_students():
+    """
+    Apply [{id, fields}] updates in one bulk_write. Pre-images come from a
+    single $in read (they feed the analytics hooks), nothing is re-read after.
+    """
+    db = get_db()
+    try:
+        data = request.get_json() or {}
+        items = data.get('items') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'Expected a non-empty list of {id, fields}'}), 400
+        if len(items) > MAX_BULK_ITEMS:
+            return jsonify({'error': f'At most {MAX_BULK_ITEMS} items per request'}), 400
+
+        results = [None] * len(items)
+        valid = []
+        for i, item in enumerate(items):
+            item_id = item.get('id') if isinstance(item, dict) else None
+            if not item_id or not ObjectId.is_valid(str(item_id)):
+                results[i] = {'id': item_id, 'status': 'invalid', 'error': 'Invalid student ID format'}
+                continue
+            try:
+                fields = _update_doc(item.get('fields') or {})
+            except ValueError as e:
+                results[i] = {'id': item_id, 'status': 'invalid', 'error': str(e)}
+                continue
+            if not fields:
+                results[i] = {'id': item_id, 'status': 'invalid', 'error': 'No fields to update'}
+                continue
+            valid.append((i, ObjectId(str(item_id)), fields))
+
+        current = {
+            s['_id']: s for s in db.students.find(
+                {'_id': {'$in': list({oid for _, oid, _ in valid})}},
+                {'name': 1, 'email': 1, 'branch': 1, 'cgpa': 1, 'placed': 1}
+            )
+        }
+        mapping = intern_skills(db, [s for _, _, fields in valid for s in fields.get('skills') or []])
+        ops, pairs = [], []
+        for i, oid, fields in valid:
+            before = current.get(oid)
+            if before is None:
+                results[i] = {'id': str(oid), 'status': 'not_found'}
+                continue
+            after = {**before, **fields}
+            change = dict(fields)
+            if 'name' in fields or 'email' in fields:
+                change['search_tokens'] = search_tokens(after)
+            if 'skills' in fields:
+                change['skill_ids'] = skill_ids(mapping, fields['skills'])
+            ops.append(UpdateOne({'_id': oid}, {'$set': change}))
+            pairs.append((before, after))
+            # Repeated ids chain: the next item sees this one's result
+            current[oid] = after
+            results[i] = {'id': str(oid), 'status': 'updated'}
+
+        modified = 0
+        if ops:
+            modified = db.students.bulk_write(ops, ordered=False).modified_count
+            apply_students_batch(db, updated=pairs)
+            branches = set()
+            for before, after in pairs:
+                if before.get('branch') != after.get('branch') or before.get('placed') != after.get('placed'):
+                    branches.update([before.get('branch'), after.get('branch')])
+                if before.get('branch') != after.get('branch'):
+                    move_student_branch(db, before['_id'], before.get('branch'), after.get('branch'))
+                    move_branch_packages(db, before['_id'], before.get('branch'), after.get('branch'))
+            refresh_branches(db, branches)
+            if fan_out_students(db, pairs):
+                bump_generation('placements')
+            invalidate_students([before['_id'] for before, _ in pairs])
+            bump_generation('students')
+
+        return jsonify({
+            'matched': len(ops),
+            'modified': modified,
+            'results': results
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @students_bp.route('/api/students/<student_id>', methods=['DELETE'])
 def delete_student(student_id):
     db = get_db()
@@ -134,13 +340,25 @@ def delete_student(student_id):
         if not ObjectId.is_valid(student_id):
             return jsonify({'error': 'Invalid student ID format'}), 400
             
-        result = db.students.delete_one({'_id': ObjectId(student_id)})
+        student = db.students.find_one_and_delete({'_id': ObjectId(student_id)})
         
-        if result.deleted_count == 0:
+        if student is None:
             return jsonify({'error': 'Student not found'}), 404
             
         # Also clean up placements related to this student
+        placements = list(db.placements.find(
+            {'student_id': ObjectId(student_id)},
+            {'student_id': 1, 'company_id': 1, 'status': 1, 'package': 1, 'placement_date': 1}
+        ))
         db.placements.delete_many({'student_id': ObjectId(student_id)})
+        apply_student_deleted(db, student, placements)
+        refresh_branches(db, [student.get('branch')])
+        branch_by_student = {student['_id']: student.get('branch')}
+        apply_placements_removed(db, placements, branch_by_student)
+        remove_packages(db, placements, branch_by_student)
+        db.recommendations.delete_one({'_id': student['_id']})
+        invalidate_students([student['_id']])
+        bump_generation('students', 'placements')
             
         return jsonify({'message': 'Student deleted successfully'})
         
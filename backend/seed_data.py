@@ -13,6 +13,15 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app
 from db import get_db
+from analytics_snapshot import rebuild_snapshot
+from branch_rollup import rebuild_branch_rollup
+from placement_timeseries import rebuild_timeseries
+from package_sketches import rebuild_package_sketches
+from company_catalog import bump_catalog_version
+from response_cache import bump_generation
+from placement_names import placement_name_fields
+from student_search import search_tokens
+from skill_registry import ensure_builtin_skills, intern_skills, skill_ids
 
 # ─── Data pools ──────────────────────────────────────────────────────────
 
@@ -111,6 +120,10 @@ def seed():
         db.companies.delete_many({})
         db.students.delete_many({})
 
+        # ── Skill registry ──
+        ensure_builtin_skills(db)
+        skill_map = intern_skills(db, {s for pool in SKILLS_POOL.values() for s in pool})
+
         # ── Create Companies ──
         print("Creating companies...")
         companies = []
@@ -120,6 +133,7 @@ def seed():
                 'name': name, 'industry': industry,
                 'min_package': min_pkg, 'max_package': max_pkg,
                 'requirements': req_skills,
+                'requirement_ids': skill_ids(skill_map, req_skills),
                 'website': f"https://www.{name.lower().replace(' ', '').replace(chr(39), '')}.com",
                 'created_at': datetime.utcnow()
             }
@@ -160,6 +174,8 @@ def seed():
                 'resume_text': f"Experienced {branch} student with skills in {', '.join(skills[:3]) if skills else 'various areas'}.",
                 'created_at': datetime.utcnow()
             }
+            student['search_tokens'] = search_tokens(student)
+            student['skill_ids'] = skill_ids(skill_map, skills)
             students.append(student)
 
         result = db.students.insert_many(students)
@@ -198,7 +214,8 @@ def seed():
                     'role': role,
                     'package': pkg,
                     'placement_date': placement_date,
-                    'status': 'confirmed'
+                    'status': 'confirmed',
+                    **placement_name_fields(student, company)
                 }
                 placements.append(placement)
                 
@@ -218,6 +235,15 @@ def seed():
 
         print(f"   Created {len(placements)} placements")
 
+        # ── Analytics ──
+        print("Rebuilding analytics snapshot and rollups...")
+        rebuild_snapshot(db)
+        rebuild_branch_rollup(db)
+        rebuild_timeseries(db)
+        rebuild_package_sketches(db)
+        bump_catalog_version(db)
+        bump_generation('students', 'placements', 'companies')
+
         # ── Summary ──
         total = db.students.count_documents({})
         placed = db.students.count_documents({'placed': True})
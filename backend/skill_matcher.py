@@ -0,0 +1,247 @@
+"""
+Vectorized student-to-company skill matching for job recommendations.
+
+Company requirement ids (see skill_registry.py) are mapped to columns of a
+CSR matrix (column indices + row pointers). Scoring a student against every
+company is one gather of the student's skill bitmap at the column indices
+plus one np.add.reduceat over the row pointers; the top k are then picked with
+np.argpartition instead of sorting every company. The matrix is cached per
+company catalog snapshot (see company_catalog.py), so it is rebuilt only when
+the catalog version changes. Without NumPy the original per-company set
+intersection is used.
+
+Scores are deterministic: the jitter, the fallback score for companies
+without requirements, the role and the package are all derived from a hash of
+(student id, company id), and Config.RECOMMENDATION_JITTER=0 drops the jitter
+entirely. Results are memoized in an LRU keyed by student id and checked
+against the student's skills/CGPA fingerprint; the whole cache is dropped when
+the catalog version moves, and student writes evict their entries with
+invalidate_students().
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from config import Config
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+ROLES = ['Software Engineer', 'Data Analyst', 'Product Intern', 'UI/UX Developer', 'Backend Dev']
+TOP_K = 5
+FALLBACK_SCORE = 55
+
+_MASK = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+
+
+def _requirements(company):
+    return set(company.get('requirement_ids') or [])
+
+
+def id_key(value):
+    """Stable 64-bit key for an id (Python's hash() is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'little')
+
+
+def _mix(student_key, company_key):
+    """splitmix64 finalizer over the pair; mirrors SkillMatrix._mix."""
+    z = (company_key * _GOLDEN + student_key) & _MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK
+    return z ^ (z >> 31)
+
+
+def pair_seed(student_id, company_id):
+    """Seed for a (student, company) pair's jitter, fallback score, role and package."""
+    return _mix(id_key(student_id), id_key(company_id))
+
+
+def match_score(company_reqs, student_skills, cgpa, seed, jitter=True):
+    """One student's score for one company; SkillMatrix.scores computes the same for all companies."""
+    if company_reqs:
+        # Integer floor division, exactly as SkillMatrix.scores (float math rounds 29/50 down to 57)
+        score = len(student_skills & company_reqs) * 100 // len(company_reqs)
+    else:
+        score = 40 + (seed >> 8) % 31 if jitter else FALLBACK_SCORE  # Fallback heuristic
+    if cgpa > 8.5:
+        score += 10
+    if jitter:
+        score += seed % 11 - 5
+    return min(98, max(30, score))
+
+
+class SkillMatrix:
+    def __init__(self, companies):
+        self.companies = companies
+        self.size = len(companies)
+        self.vocabulary = {}
+        indices = []
+        indptr = [0]
+        for company in companies:
+            for skill in _requirements(company):
+                indices.append(self.vocabulary.setdefault(skill, len(self.vocabulary)))
+            indptr.append(len(indices))
+        self.indices = np.array(indices, dtype=np.int32)
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.required = np.diff(self.indptr)
+        self._order = np.arange(self.size - 1, -1, -1, dtype=np.int64)
+        keys = np.array([id_key(c.get('_id')) for c in companies], dtype=np.uint64)
+        self._company_mix = keys * np.uint64(_GOLDEN)
+
+    def overlap_counts(self, skills):
+        """How many of each company's requirements the student has."""
+        bitmap = np.zeros(len(self.vocabulary), dtype=np.int32)
+        known = [self.vocabulary[s] for s in set(skills) if s in self.vocabulary]
+        bitmap[known] = 1
+        # Trailing 0 keeps every row start in range, including empty trailing rows
+        hits = np.append(bitmap[self.indices], 0)
+        counts = np.add.reduceat(hits, self.indptr[:-1]) if self.size else hits[:0]
+        counts[self.required == 0] = 0
+        return counts
+
+    def _mix(self, student_key):
+        z = self._company_mix + np.uint64(student_key)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+    def scores(self, skills, cgpa, student_key, jitter=True):
+        """Match score per company: requirement coverage %, CGPA bonus and seeded jitter, clipped to 30-98."""
+        overlap = self.overlap_counts(skills)
+        seeds = self._mix(student_key)
+        if jitter:
+            fallback = (np.uint64(40) + (seeds >> np.uint64(8)) % np.uint64(31)).astype(np.int64)
+        else:
+            fallback = FALLBACK_SCORE
+        base = np.where(
+            self.required > 0,
+            overlap * 100 // np.maximum(self.required, 1),
+            fallback  # Fallback heuristic
+        )
+        if cgpa > 8.5:
+            base += 10
+        if jitter:
+            base += (seeds % np.uint64(11)).astype(np.int64) - 5
+        return np.clip(base, 30, 98)
+
+    def top_k(self, scores, k=TOP_K):
+        """Indices of the k best scores, ties broken by catalog order like a stable sort."""
+        if self.size == 0:
+            return []
+        key = scores.astype(np.int64) * self.size + self._order
+        if self.size > k:
+            candidates = np.argpartition(-key, k - 1)[:k]
+        else:
+            candidates = np.arange(self.size)
+        return candidates[np.argsort(-key[candidates])].tolist()
+
+
+_lock = threading.Lock()
+_cached = (None, None)
+
+
+def get_matrix(catalog):
+    """The SkillMatrix for a catalog snapshot, built once per snapshot."""
+    global _cached
+    with _lock:
+        if _cached[0] is catalog:
+            return _cached[1]
+    matrix = SkillMatrix(catalog.docs)
+    with _lock:
+        _cached = (catalog, matrix)
+    return matrix
+
+
+def _skill_names(ids, names):
+    return sorted(names.get(i, str(i)) for i in ids)
+
+
+def _match(company, student_skills, score, seed, names):
+    company_reqs = _requirements(company)
+    overlap = _skill_names(student_skills & company_reqs, names)
+    low, high = company.get('min_package', 0), company.get('max_package', 0)
+    return {
+        'company': company.get('name'),
+        'industry': company.get('industry'),
+        'role': ROLES[(seed >> 16) % len(ROLES)],
+        'package': round(low + (high - low) * ((seed >> 11) / (1 << 53)), 2),
+        'match_score': int(score),
+        'matched_skills': overlap if overlap else _skill_names(company_reqs, names)[:2],
+        'reason': f"Strong overlap in {', '.join(overlap[:3]) if overlap else 'core requirements'} and alignment with {company.get('industry')} standards."
+    }
+
+
+def _python_scores(companies, student_skills, cgpa, student_key, jitter=True):
+    return [
+        match_score(_requirements(c), student_skills, cgpa, _mix(student_key, id_key(c.get('_id'))), jitter)
+        for c in companies
+    ]
+
+
+def recommend(catalog, student, names, k=TOP_K, jitter=None):
+    """
+    Top-k company matches for a student document; the same inputs always give
+    the same list. `names` maps skill ids to their canonical display names.
+    """
+    jitter = Config.RECOMMENDATION_JITTER if jitter is None else jitter
+    student_skills = set(student.get('skill_ids') or [])
+    cgpa = student.get('cgpa', 7.0)
+    student_key = id_key(student.get('_id'))
+
+    if not NUMPY_AVAILABLE:
+        companies = catalog.docs
+        scores = _python_scores(companies, student_skills, cgpa, student_key, jitter)
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:k]
+    else:
+        matrix = get_matrix(catalog)
+        companies = matrix.companies
+        scores = matrix.scores(student_skills, cgpa, student_key, jitter)
+        ranked = matrix.top_k(scores, k)
+    return [
+        _match(companies[i], student_skills, scores[i], _mix(student_key, id_key(companies[i].get('_id'))), names)
+        for i in ranked
+    ]
+
+
+# ─── Memoized results ─────────────────────────────────────────────────────────
+_results = OrderedDict()
+_results_version = None
+
+
+def student_fingerprint(student):
+    """The inputs a student contributes to their scores."""
+    return (tuple(sorted(set(student.get('skill_ids') or []))), student.get('cgpa', 7.0))
+
+
+def cached_recommend(catalog, student, names):
+    """recommend() through the per-process LRU (Config.RECOMMENDATION_CACHE_SIZE entries)."""
+    global _results_version
+    student_id = student.get('_id')
+    fingerprint = student_fingerprint(student)
+    with _lock:
+        if _results_version != catalog.version:
+            _results.clear()
+            _results_version = catalog.version
+        entry = _results.get(student_id)
+        if entry is not None and entry[0] == fingerprint:
+            _results.move_to_end(student_id)
+            return entry[1]
+
+    matches = recommend(catalog, student, names)
+    with _lock:
+        if _results_version == catalog.version and Config.RECOMMENDATION_CACHE_SIZE > 0:
+            _results[student_id] = (fingerprint, matches)
+            _results.move_to_end(student_id)
+            while len(_results) > Config.RECOMMENDATION_CACHE_SIZE:
+                _results.popitem(last=False)
+    return matches
+
+
+def invalidate_students(student_ids):
+    """Evict memoized results; call after writes to students' skills or CGPA."""
+    with _lock:
+        for student_id in student_ids:
+            _results.pop(student_id, None)
@@ -0,0 +1,440 @@
+"""
+Interned skill vocabulary shared by every skill consumer.
+
+The `skills` collection holds one document per canonical skill: an integer
+_id, the display name and `keys`, the normalized spellings (the canonical
+name's own key plus aliases) that resolve to it. skill_key() folds case and
+accents and drops spaces, dots, hyphens and underscores, so 'Node.js' and
+'nodejs' share a key, and BUILTIN_SKILLS adds aliases such as 'node' on top.
+Students store the distinct `skill_ids` of their `skills`, and companies
+store the `requirement_ids` of their `requirements`. Matching, candidate
+ranking, the AI fallbacks and the top-skills chart all compare ids and never
+re-lowercase strings.
+
+The registry is loaded once per process and versioned like the company
+catalog. intern_skills() creates unknown skills and bumps the version in
+`catalog_versions`, which other processes pick up within CHECK_INTERVAL.
+Usage counts (students plus companies per skill) rank the autocomplete trie.
+They start empty and are computed on a background thread, then recomputed
+once they are older than USAGE_REFRESH.
+"""
+import re
+import threading
+import time
+import unicodedata
+from datetime import datetime
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from company_catalog import bump_catalog_version
+from response_cache import bump_generation
+from indexes import ensure_collection_indexes
+
+VERSION_ID = 'skills'
+COUNTER_ID = 'skill_ids'
+CHECK_INTERVAL = 1.0
+USAGE_REFRESH = 300.0
+MAX_SUGGESTIONS = 20
+
+# Canonical name -> aliases seeded into a fresh registry
+BUILTIN_SKILLS = {
+    'Python': ['python3', 'py'],
+    'Java': ['core java'],
+    'JavaScript': ['js', 'ecmascript', 'es6'],
+    'TypeScript': ['ts'],
+    'C++': ['cpp'],
+    'C#': ['csharp', 'c sharp'],
+    'C': ['c language'],
+    'React': ['reactjs', 'react js'],
+    'Angular': ['angularjs', 'angular js'],
+    'Node.js': ['node', 'node js'],
+    'Flask': [],
+    'Django': [],
+    'HTML': ['html5'],
+    'CSS': ['css3'],
+    'PHP': [],
+    'SQL': ['structured query language'],
+    'MongoDB': ['mongo'],
+    'PostgreSQL': ['postgres', 'psql'],
+    'MySQL': [],
+    'Redis': [],
+    'GraphQL': [],
+    'REST APIs': ['rest api', 'restful apis', 'restful api'],
+    'Git': ['github', 'version control'],
+    'Docker': [],
+    'Kubernetes': ['k8s'],
+    'AWS': ['amazon web services'],
+    'Cloud Computing': [],
+    'DevOps': [],
+    'CI/CD': ['cicd', 'continuous integration'],
+    'Linux': ['unix'],
+    'Machine Learning': ['ml'],
+    'Deep Learning': ['dl'],
+    'TensorFlow': ['tf'],
+    'Data Structures and Algorithms': ['dsa', 'data structures', 'algorithms'],
+    'System Design': [],
+    'Statistics': ['stats'],
+    'Pandas': [],
+    'Terraform': [],
+    'Cybersecurity': ['cyber security', 'information security'],
+    'Networking': ['computer networks'],
+    'IoT': ['internet of things'],
+    'MATLAB': [],
+    'Embedded C': [],
+    'VLSI': [],
+    'AutoCAD': [],
+    'SolidWorks': [],
+    'ANSYS': [],
+    'FEA': ['finite element analysis'],
+    'CFD': ['computational fluid dynamics'],
+    'BIM': ['building information modeling'],
+    'GIS': ['geographic information systems'],
+}
+
+_DROP = re.compile(r'[\s.\-_]+')
+# '/' separates words so 'Python/Django' and 'C/C++' are two mentions each
+_WORD = re.compile(r'[0-9a-z+#.&]+', re.IGNORECASE)
+_LIST_SEPARATORS = ',;/|()[]'
+MAX_PHRASE_WORDS = 4
+# Shorter alphanumeric keys ('c', 'ts', 'ml') are ordinary words in prose
+MIN_PROSE_KEY_LENGTH = 3
+
+
+def skill_key(text):
+    """Normalized spelling used for lookups: 'Node.js', 'node js' -> 'nodejs'."""
+    decomposed = unicodedata.normalize('NFKD', str(text or '')).casefold()
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return _DROP.sub('', stripped)
+
+
+def _build_trie(keys_by_id, rank):
+    """Nested dicts keyed by character; node[''] holds its best MAX_SUGGESTIONS ids."""
+    root = {'': set()}
+    for skill_id, keys in keys_by_id.items():
+        for key in keys:
+            node = root
+            node[''].add(skill_id)
+            for ch in key:
+                node = node.setdefault(ch, {'': set()})
+                node[''].add(skill_id)
+
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        node[''] = sorted(node[''], key=rank)[:MAX_SUGGESTIONS]
+        stack.extend(child for ch, child in node.items() if ch)
+    return root
+
+
+def _in_list(text, start, end):
+    """True when text[start:end] sits next to a list separator such as ',' or '/'."""
+    before = text[:start].rstrip()[-1:]
+    after = text[end:].lstrip()[:1]
+    return bool(before) and before in _LIST_SEPARATORS or bool(after) and after in _LIST_SEPARATORS
+
+
+class SkillRegistry:
+    def __init__(self, docs, version, usage):
+        self.version = version
+        self.usage = usage
+        self.names = {doc['_id']: doc['name'] for doc in docs}
+        self.by_key = {}
+        for doc in docs:
+            for key in doc.get('keys') or []:
+                self.by_key.setdefault(key, doc['_id'])
+        keys_by_id = {doc['_id']: doc.get('keys') or [] for doc in docs}
+        self.trie = _build_trie(keys_by_id, lambda i: (-usage.get(i, 0), self.names[i].lower()))
+
+    def lookup(self, text):
+        """Skill id for any known spelling, or None."""
+        return self.by_key.get(skill_key(text))
+
+    def identity(self, text):
+        """Something equal for two spellings of one skill: its id, else its key."""
+        key = skill_key(text)
+        return self.by_key.get(key, key)
+
+    def name(self, skill_id, default=None):
+        return self.names.get(skill_id, default)
+
+    def canonical(self, text):
+        """Canonical display name, or the text itself for an unknown skill."""
+        skill_id = self.lookup(text)
+        return self.names[skill_id] if skill_id is not None else text
+
+    def find_in_text(self, text):
+        """
+        Canonical names of skills mentioned in free text, in order of first mention.
+        Short alphanumeric spellings count only when written in capitals inside a
+        list, so 'C, C++' and 'ML/DL' match but 'grade C' and 'ts files' do not.
+        """
+        text = str(text or '')
+        words = []
+        for match in _WORD.finditer(text):
+            word = match.group().lstrip('.')
+            start = match.end() - len(word)
+            word = word.rstrip('.')
+            if word:
+                words.append((word, start, start + len(word)))
+
+        found = []
+        i = 0
+        while i < len(words):
+            # Longest phrase first, so 'machine learning' beats 'machine'
+            for size in range(min(MAX_PHRASE_WORDS, len(words) - i), 0, -1):
+                start, end = words[i][1], words[i + size - 1][2]
+                key = skill_key(''.join(word for word, _, _ in words[i:i + size]))
+                skill_id = self.by_key.get(key)
+                if skill_id is None:
+                    continue
+                if len(key) < MIN_PROSE_KEY_LENGTH and key.isalnum() and not (
+                        text[start:end].isupper() and _in_list(text, start, end)):
+                    continue
+                if self.names[skill_id] not in found:
+                    found.append(self.names[skill_id])
+                i += size
+                break
+            else:
+                i += 1
+        return found
+
+    def autocomplete(self, q, limit=10):
+        """Skills whose name or an alias starts with q, most used first."""
+        node = self.trie
+        for ch in skill_key(q):
+            node = node.get(ch)
+            if node is None:
+                return []
+        return [
+            {'id': skill_id, 'name': self.names[skill_id], 'usage': self.usage.get(skill_id, 0)}
+            for skill_id in node[''][:limit]
+        ]
+
+
+_lock = threading.Lock()
+_registry = None
+_checked_at = 0.0
+_local_bumps = 0
+_usage = {}
+_usage_at = None
+_usage_refreshing = False
+_indexed = False
+
+
+def current_version(db):
+    doc = db.catalog_versions.find_one({'_id': VERSION_ID})
+    return doc['version'] if doc else 0
+
+
+def bump_registry_version(db):
+    """Mark the registry stale in every process; call after any skills write."""
+    global _registry, _local_bumps
+    db.catalog_versions.update_one({'_id': VERSION_ID}, {'$inc': {'version': 1}}, upsert=True)
+    with _lock:
+        _registry = None
+        _local_bumps += 1
+
+
+def count_usage(db):
+    """Students plus companies per skill id."""
+    usage = {}
+    for collection, field in (('students', 'skill_ids'), ('companies', 'requirement_ids')):
+        for row in db[collection].aggregate([
+            {'$project': {'ids': {'$ifNull': [f'${field}', []]}}},
+            {'$unwind': '$ids'},
+            {'$group': {'_id': '$ids', 'count': {'$sum': 1}}}
+        ]):
+            usage[row['_id']] = usage.get(row['_id'], 0) + row['count']
+    return usage
+
+
+def _refresh_usage(db):
+    global _registry, _usage, _usage_at, _usage_refreshing
+    try:
+        usage = count_usage(db)
+        with _lock:
+            _usage, _usage_at = usage, time.monotonic()
+            # Rebuilt with the new counts on the next get_registry()
+            _registry = None
+    except Exception as e:
+        print(f"Skill usage refresh failed: {str(e)}")
+        with _lock:
+            # Keep the old counts and retry after USAGE_REFRESH rather than on every read
+            _usage_at = time.monotonic()
+    finally:
+        with _lock:
+            _usage_refreshing = False
+
+
+def get_registry(db):
+    """The current registry, rebuilt when the stored version moves on."""
+    global _registry, _checked_at, _usage_refreshing
+    now = time.monotonic()
+    with _lock:
+        registry = _registry
+        bumps = _local_bumps
+        usage = _usage
+        # Counting scans every student and company, so it never runs on the request path
+        if (_usage_at is None or now - _usage_at > USAGE_REFRESH) and not _usage_refreshing:
+            _usage_refreshing = True
+            threading.Thread(target=_refresh_usage, args=(db,), name='skill-usage', daemon=True).start()
+        if registry is not None and now - _checked_at < CHECK_INTERVAL:
+            return registry
+
+    version = current_version(db)
+    if registry is None or registry.version != version:
+        # Read the version before the documents so a concurrent write is caught next check
+        registry = SkillRegistry(list(db.skills.find({})), version, usage)
+
+    with _lock:
+        # A write in this process while we were building forces a recheck next time
+        _registry = registry
+        _checked_at = now if bumps == _local_bumps else 0.0
+    return registry
+
+
+# ─── Writes ───────────────────────────────────────────────────────────────────
+
+def _ensure_unique_keys(db):
+    """Build the unique skills.keys index before the first write relies on it."""
+    global _indexed
+    if not _indexed:
+        ensure_collection_indexes(db, 'skills')
+        _indexed = True
+
+
+def _insert_skills(db, entries):
+    """Insert (name, keys) entries under freshly allocated ids. Returns how many were new."""
+    _ensure_unique_keys(db)
+    counter = db.catalog_versions.find_one_and_update(
+        {'_id': COUNTER_ID},
+        {'$inc': {'last_id': len(entries)}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    first = counter['last_id'] - len(entries) + 1
+    now = datetime.utcnow()
+    created = 0
+    for skill_id, (name, keys) in enumerate(entries, start=first):
+        try:
+            db.skills.insert_one({'_id': skill_id, 'name': name, 'keys': keys, 'created_at': now})
+            created += 1
+        except DuplicateKeyError:
+            # Another writer registered one of the keys first; its entry wins
+            pass
+    # Bumped even if nothing was new, so this process reloads the winners' entries
+    bump_registry_version(db)
+    return created
+
+
+def intern_skills(db, names):
+    """{name: skill id} for display names, registering skills not seen before."""
+    registry = get_registry(db)
+    mapping = {}
+    missing = {}
+    for name in names:
+        if not isinstance(name, str) or name in mapping:
+            continue
+        skill_id = registry.lookup(name)
+        if skill_id is not None:
+            mapping[name] = skill_id
+        elif skill_key(name):
+            missing.setdefault(skill_key(name), name.strip())
+
+    if missing:
+        _insert_skills(db, [(name, [key]) for key, name in missing.items()])
+        registry = get_registry(db)
+        for name in names:
+            if isinstance(name, str) and name not in mapping and registry.lookup(name) is not None:
+                mapping[name] = registry.lookup(name)
+    return mapping
+
+
+def skill_ids(mapping, names):
+    """Distinct ids for a list of names, in order of first mention."""
+    ids = []
+    for name in names or []:
+        skill_id = mapping.get(name) if isinstance(name, str) else None
+        if skill_id is not None and skill_id not in ids:
+            ids.append(skill_id)
+    return ids
+
+
+def intern_skill_ids(db, names):
+    """skill_ids(intern_skills(db, names), names) for a single document."""
+    return skill_ids(intern_skills(db, names or []), names)
+
+
+def ensure_builtin_skills(db):
+    """Register BUILTIN_SKILLS, adding any of their aliases that are still free."""
+    _ensure_unique_keys(db)
+    registry = get_registry(db)
+    new = []
+    for name, aliases in BUILTIN_SKILLS.items():
+        keys = list(dict.fromkeys(skill_key(k) for k in [name, *aliases]))
+        skill_id = registry.by_key.get(keys[0])
+        if skill_id is None:
+            free = [k for k in keys if k not in registry.by_key]
+            new.append((name, free))
+        else:
+            free = [k for k in keys if k not in registry.by_key]
+            if free:
+                db.skills.update_one({'_id': skill_id}, {'$addToSet': {'keys': {'$each': free}}})
+                bump_registry_version(db)
+    if new:
+        _insert_skills(db, new)
+    return len(new)
+
+
+def migrate_skills(db, batch_size=1000):
+    """
+    Fill skill_ids/requirement_ids on documents written before the registry
+    existed. Returns (students, companies) updated.
+    """
+    global _registry, _usage_at
+    ensure_builtin_skills(db)
+    counts = []
+    for collection, source, target in (('students', 'skills', 'skill_ids'),
+                                       ('companies', 'requirements', 'requirement_ids')):
+        updated = 0
+        batch = []
+
+        def flush():
+            mapping = intern_skills(db, [n for doc in batch for n in doc.get(source) or []])
+            ops = [UpdateOne({'_id': doc['_id']}, {
+                '$set': {target: skill_ids(mapping, doc.get(source))},
+                '$unset': {'skill_keys': ''}
+            }) for doc in batch]
+            batch.clear()
+            return db[collection].bulk_write(ops, ordered=False).modified_count if ops else 0
+
+        for doc in db[collection].find({target: {'$exists': False}}, {source: 1}):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                updated += flush()
+        updated += flush()
+        counts.append(updated)
+
+    students, companies = counts
+    if companies:
+        bump_catalog_version(db)
+    if students or companies:
+        with _lock:
+            # Usage is recounted in the background from the next get_registry()
+            _registry, _usage_at = None, None
+        bump_generation('students', 'companies')
+    return students, companies
+
+
+def start_background_skill_migration(db):
+    """Run migrate_skills() on a daemon thread at startup."""
+    def migrate():
+        try:
+            students, companies = migrate_skills(db)
+            if students or companies:
+                print(f"Canonicalized skills on {students} students and {companies} companies")
+        except Exception as e:
+            print(f"Skill migration failed: {str(e)}")
+
+    thread = threading.Thread(target=migrate, name='skill-migration', daemon=True)
+    thread.start()
+    return thread
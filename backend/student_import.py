@@ -0,0 +1,347 @@
+"""
+Streaming bulk import of students from CSV or JSONL.
+
+Rows are read lazily from the upload and validated against the fields
+create_student accepts. They are written in batches with upsert-by-email
+semantics: one $in lookup per batch finds the emails that already exist, new
+students go through insert_many(ordered=False) and existing ones through a
+single bulk_write. import_students() yields one progress event per batch so
+the route can stream them back while the upload is still being read.
+"""
+import csv
+import io
+import json
+import math
+import re
+import time
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from werkzeug.sansio.multipart import MultipartDecoder, File, Data, Epilogue, NEED_DATA
+from analytics_snapshot import apply_students_batch
+from branch_rollup import refresh_branches
+from placement_timeseries import move_student_branch
+from package_sketches import move_branch_packages
+from response_cache import bump_generation
+from student_search import search_tokens
+from placement_names import fan_out_students
+from skill_matcher import invalidate_students
+from skill_registry import intern_skills, skill_ids
+
+BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 5000
+READ_CHUNK = 64 * 1024
+FORMATS = ('csv', 'jsonl')
+
+REQUIRED_FIELDS = ('name', 'email', 'branch')
+
+# Defaults for fields a new row leaves out, as in create_student
+DEFAULTS = {
+    'cgpa': 0,
+    'skills': [],
+    'projects': 0,
+    'internships': 0,
+    'placed': False,
+    'resume_text': '',
+    'gender': 'Other'
+}
+
+
+class RowError(ValueError):
+    pass
+
+
+# ─── Field validation ─────────────────────────────────────────────────────────
+
+def _text(value):
+    text = str(value).strip()
+    if not text:
+        raise RowError('must not be empty')
+    return text
+
+
+def _cgpa(value):
+    try:
+        cgpa = float(value)
+    except (TypeError, ValueError):
+        raise RowError(f'invalid number {value!r}')
+    if not math.isfinite(cgpa) or not 0 <= cgpa <= 10:
+        raise RowError('must be between 0 and 10')
+    return cgpa
+
+
+def _count(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise RowError(f'invalid integer {value!r}')
+    if not number.is_integer() or number < 0:
+        raise RowError('must be a non-negative integer')
+    return int(number)
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ('true', 'yes', 'y', '1'):
+        return True
+    if text in ('false', 'no', 'n', '0'):
+        return False
+    raise RowError(f'invalid boolean {value!r}')
+
+
+def _skills(value):
+    # CSV cells use the admin export's "a, b, c" form; ';' is accepted too
+    if isinstance(value, str):
+        items = re.split(r'[;,]', value)
+    elif isinstance(value, list):
+        items = value
+    else:
+        raise RowError('must be a list or a comma separated string')
+    return [str(s).strip() for s in items if str(s).strip()]
+
+
+FIELDS = {
+    'name': _text,
+    'email': _text,
+    'branch': _text,
+    'cgpa': _cgpa,
+    'skills': _skills,
+    'projects': _count,
+    'internships': _count,
+    'placed': _boolean,
+    'resume_text': str,
+    'gender': _text
+}
+
+
+def coerce_field(field, value):
+    """Validate one student field value; raises RowError."""
+    if value is None:
+        raise RowError(f'{field}: must not be null')
+    try:
+        return FIELDS[field](value)
+    except RowError as e:
+        raise RowError(f'{field}: {e}')
+
+
+def clean_row(raw):
+    """Validated fields present in one input row; unknown columns are ignored."""
+    if not isinstance(raw, dict):
+        raise RowError('row must be an object')
+    fields = {}
+    for key, value in raw.items():
+        if key is None:
+            continue
+        field = str(key).strip().lower().replace(' ', '_')
+        if field not in FIELDS or value is None or (isinstance(value, str) and not value.strip()):
+            continue
+        fields[field] = coerce_field(field, value)
+    missing = [f for f in REQUIRED_FIELDS if f not in fields]
+    if missing:
+        raise RowError(f"missing {', '.join(missing)}")
+    return fields
+
+
+# ─── Input parsing ────────────────────────────────────────────────────────────
+
+def detect_format(explicit=None, filename=None, mimetype=None):
+    """'csv', 'jsonl' or None from ?format=, the upload filename or its content type."""
+    if explicit:
+        explicit = explicit.lower()
+        return explicit if explicit in FORMATS else None
+    name = (filename or '').lower()
+    if name.endswith('.csv') or mimetype == 'text/csv':
+        return 'csv'
+    if name.endswith(('.jsonl', '.ndjson')) or mimetype in ('application/x-ndjson', 'application/jsonl'):
+        return 'jsonl'
+    return None
+
+
+class MultipartUpload(io.RawIOBase):
+    """
+    The `field` file part of a multipart/form-data body, decoded incrementally
+    from the request stream so the upload is never parsed or spooled whole
+    (request.files would read all of it before the first row).
+    """
+
+    def __init__(self, stream, boundary, field='file'):
+        self._stream = stream
+        self._decoder = MultipartDecoder(boundary)
+        self._eof = False
+        self._pending = b''
+        self._more = True
+        while True:
+            event = self._next_event()
+            if isinstance(event, File) and event.name == field:
+                self.filename = event.filename
+                self.mimetype = event.headers.get('Content-Type')
+                return
+            if isinstance(event, Epilogue):
+                raise RowError(f"multipart body has no '{field}' file part")
+
+    def _next_event(self):
+        while True:
+            event = self._decoder.next_event()
+            if event is not NEED_DATA:
+                return event
+            if self._eof:
+                raise RowError('multipart body ended early')
+            chunk = self._stream.read(READ_CHUNK)
+            self._eof = not chunk
+            self._decoder.receive_data(chunk or None)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending and self._more:
+            event = self._next_event()
+            if not isinstance(event, Data):
+                break
+            self._pending, self._more = event.data, event.more_data
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict or RowError) lazily from a binary stream."""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as e:
+            yield line_no, RowError(f'invalid JSON: {e}')
+
+
+# ─── Writes ───────────────────────────────────────────────────────────────────
+
+def _bulk_errors(error):
+    return {e['index']: e.get('errmsg', 'write failed') for e in error.details.get('writeErrors', [])}
+
+
+def _write_batch(db, batch):
+    """Upsert one batch by email. Returns (inserted, updated, errors, touched branches)."""
+    by_email = {}
+    for line_no, fields in batch:
+        # A later row for the same email in this batch wins, field by field
+        previous = by_email.get(fields['email'], (None, {}))[1]
+        by_email[fields['email']] = (line_no, {**previous, **fields})
+
+    existing = {}
+    for student in db.students.find(
+        {'email': {'$in': list(by_email)}},
+        {'name': 1, 'email': 1, 'branch': 1, 'cgpa': 1, 'placed': 1}
+    ):
+        existing.setdefault(student['email'], student)
+
+    # Every skill in the batch is interned in one pass
+    mapping = intern_skills(db, [s for _, fields in by_email.values() for s in fields.get('skills') or []])
+
+    now = datetime.utcnow()
+    new_docs, new_lines = [], []
+    updates, update_pairs, update_lines = [], [], []
+    for email, (line_no, fields) in by_email.items():
+        before = existing.get(email)
+        if before is None:
+            doc = {**DEFAULTS, **fields, 'created_at': now}
+            doc['skills'] = list(doc['skills'])
+            doc['search_tokens'] = search_tokens(doc)
+            doc['skill_ids'] = skill_ids(mapping, doc['skills'])
+            new_docs.append(doc)
+            new_lines.append(line_no)
+        else:
+            change = dict(fields)
+            if 'name' in fields:
+                change['search_tokens'] = search_tokens({**before, **fields})
+            if 'skills' in fields:
+                change['skill_ids'] = skill_ids(mapping, fields['skills'])
+            updates.append(UpdateOne({'_id': before['_id']}, {'$set': change}))
+            update_pairs.append((before, {**before, **fields}))
+            update_lines.append(line_no)
+
+    errors = []
+    failed = {}
+    if new_docs:
+        try:
+            db.students.insert_many(new_docs, ordered=False)
+        except BulkWriteError as e:
+            failed = _bulk_errors(e)
+    created = [doc for i, doc in enumerate(new_docs) if i not in failed]
+    errors.extend({'row': new_lines[i], 'error': message} for i, message in failed.items())
+
+    failed = {}
+    if updates:
+        try:
+            db.students.bulk_write(updates, ordered=False)
+        except BulkWriteError as e:
+            failed = _bulk_errors(e)
+    changed = [pair for i, pair in enumerate(update_pairs) if i not in failed]
+    errors.extend({'row': update_lines[i], 'error': message} for i, message in failed.items())
+
+    apply_students_batch(db, created, changed)
+    fan_out_students(db, changed)
+    invalidate_students([before['_id'] for before, _ in changed])
+    branches = {doc.get('branch') for doc in created}
+    for before, after in changed:
+        if before.get('branch') != after.get('branch') or before.get('placed') != after.get('placed'):
+            branches.update([before.get('branch'), after.get('branch')])
+        if before.get('branch') != after.get('branch'):
+            move_student_branch(db, before['_id'], before.get('branch'), after.get('branch'))
+            move_branch_packages(db, before['_id'], before.get('branch'), after.get('branch'))
+
+    return len(created), len(changed), errors, branches
+
+
+def import_students(db, rows, batch_size=BATCH_SIZE):
+    """
+    Validate and upsert (line number, row) pairs in batches, yielding a
+    'progress' event per batch and a final 'done' event with the totals.
+    """
+    started = time.time()
+    totals = {'rows': 0, 'inserted': 0, 'updated': 0, 'failed': 0}
+    branches = set()
+    batch = []
+    errors = []
+
+    def flush():
+        inserted, updated, write_errors, touched = _write_batch(db, batch) if batch else (0, 0, [], set())
+        batch.clear()
+        branches.update(touched)
+        batch_errors = errors + write_errors
+        errors.clear()
+        totals['inserted'] += inserted
+        totals['updated'] += updated
+        totals['failed'] += len(batch_errors)
+        return {'type': 'progress', **totals, 'errors': batch_errors}
+
+    try:
+        for line_no, raw in rows:
+            totals['rows'] += 1
+            try:
+                if isinstance(raw, RowError):
+                    raise raw
+                batch.append((line_no, clean_row(raw)))
+            except RowError as e:
+                errors.append({'row': line_no, 'error': str(e)})
+            if len(batch) >= batch_size:
+                yield flush()
+        if batch or errors:
+            yield flush()
+    finally:
+        # Rollups and caches are settled even if the client goes away mid-stream
+        if totals['inserted'] or totals['updated']:
+            refresh_branches(db, branches)
+            bump_generation('students', 'placements')
+
+    yield {'type': 'done', **totals, 'elapsed_ms': round((time.time() - started) * 1000)}
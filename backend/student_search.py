@@ -0,0 +1,131 @@
+"""
+Index-backed student name/email search.
+
+Each student carries `search_tokens`: case-folded, accent-stripped words of
+the name and email plus the full email. Words are runs of letters, digits and
+combining marks in any script, so Devanagari, Tamil or CJK names are
+searchable too. A query is split into terms the same way (a whole email stays
+one term) and every term must be a prefix of some token; terms are
+regex-escaped and anchored (^term), which MongoDB serves as a range scan on
+the multikey search_tokens index instead of a collection scan.
+"""
+import re
+import threading
+import unicodedata
+from itertools import groupby
+from pymongo import UpdateOne
+
+MAX_QUERY_LENGTH = 100
+MAX_TERMS = 5
+# Bump when search_tokens() changes; the startup backfill then re-tokenizes everyone
+TOKENIZER_VERSION = 2
+TOKENIZER_VERSION_ID = 'search_tokens'
+
+
+
+def normalize(text):
+    """Lowercase and strip accents so 'Ánanya' and 'ananya' share tokens."""
+    decomposed = unicodedata.normalize('NFKD', str(text or '')).casefold()
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def search_tokens(student):
+    """Tokens stored on a student document for prefix search."""
+    tokens = set()
+    name = normalize(student.get('name'))
+    email = normalize(student.get('email')).strip()
+    tokens.update(_words(name))
+    if email:
+        tokens.add(email)
+        tokens.update(_words(email))
+    return sorted(tokens)
+
+
+def _is_word_char(c):
+    # Letters and digits of any script plus combining marks: Indic vowel signs
+    # are marks, and splitting on \W alone would cut words apart at them
+    return c.isalnum() or unicodedata.category(c).startswith('M')
+
+
+def _words(text):
+    """Runs of word characters in any script ('Jean-Luc' -> jean, luc; '王小明' stays whole)."""
+    return [''.join(run) for is_word, run in groupby(text, _is_word_char) if is_word]
+
+
+def query_terms(q):
+    """Normalized terms of a user query, split like the stored tokens (bounded)."""
+    terms = []
+    for part in normalize(q)[:MAX_QUERY_LENGTH].split():
+        # An email (or its start) is matched against the stored full-email token
+        terms.extend([part] if '@' in part else _words(part))
+    return terms[:MAX_TERMS]
+
+
+def search_filter(q):
+    """Mongo filter matching students whose tokens start with every query term."""
+    terms = query_terms(q)
+    if not terms:
+        return {}
+    clauses = [{'search_tokens': {'$regex': '^' + re.escape(term)}} for term in terms]
+    return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+
+def autocomplete(db, q, limit=10):
+    """Top `limit` students for a partial query, name-prefix matches first."""
+    query = search_filter(q)
+    if not query:
+        return []
+    candidates = list(db.students.find(
+        query, {'name': 1, 'email': 1, 'branch': 1}
+    ).limit(limit * 5))
+
+    full = ' '.join(query_terms(q))
+    candidates.sort(key=lambda s: (
+        not ' '.join(_words(normalize(s.get('name')))).startswith(full), s.get('name') or ''
+    ))
+    return [{
+        'id': str(s['_id']),
+        'name': s.get('name'),
+        'email': s.get('email'),
+        'branch': s.get('branch')
+    } for s in candidates[:limit]]
+
+
+def backfill_search_tokens(db, batch_size=1000):
+    """
+    Add search_tokens to students written before search indexing existed, or
+    re-tokenize every student once after TOKENIZER_VERSION changes.
+    """
+    stored = db.catalog_versions.find_one({'_id': TOKENIZER_VERSION_ID}) or {}
+    retokenize = stored.get('version', 1) != TOKENIZER_VERSION
+    query = {} if retokenize else {'search_tokens': {'$exists': False}}
+
+    updated = 0
+    ops = []
+    for student in db.students.find(query, {'name': 1, 'email': 1}):
+        ops.append(UpdateOne({'_id': student['_id']}, {'$set': {'search_tokens': search_tokens(student)}}))
+        if len(ops) >= batch_size:
+            updated += db.students.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += db.students.bulk_write(ops, ordered=False).modified_count
+    if retokenize:
+        db.catalog_versions.update_one(
+            {'_id': TOKENIZER_VERSION_ID}, {'$set': {'version': TOKENIZER_VERSION}}, upsert=True
+        )
+    return updated
+
+
+def start_background_backfill(db):
+    """Run backfill_search_tokens() on a daemon thread at startup."""
+    def backfill():
+        try:
+            updated = backfill_search_tokens(db)
+            if updated:
+                print(f"Indexed {updated} students for search")
+        except Exception as e:
+            print(f"Search token backfill failed: {str(e)}")
+
+    thread = threading.Thread(target=backfill, name='search-backfill', daemon=True)
+    thread.start()
+    return thread
@@ -43,7 +43,7 @@ export default function StudentManager() {
         if (!form.name || !form.email || !form.cgpa) return toast.error('Name, email and CGPA are required.');
         setSaving(true);
         const payload = {
-            ...form, cgpa: parseFloat(form.cgpa), projects: parseInt(form.projects), internships: parseInt(form.internships),
+            ...form, cgpa: parseFloat(form.cgpa), projects: parseInt(form.projects) || 0, internships: parseInt(form.internships) || 0,
             skills: form.skills.split(',').map(s => s.trim()).filter(Boolean),
             package: form.package ? parseFloat(form.package) : undefined
         };
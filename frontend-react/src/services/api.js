@@ -45,19 +45,38 @@ const api = {
     getTopSkills: () => api.request('/api/analytics/top-skills'),
     getMonthlyTrends: () => api.request('/api/analytics/monthly-trends'),
     getGenderDistribution: () => api.request('/api/analytics/gender-distribution'),
+    getDashboard: (sections = []) => api.request(`/api/analytics/dashboard${sections.length ? `?sections=${sections.join(',')}` : ''}`),
 
     // Students
     getStudents: (p = {}) => api.request(`/api/students?${new URLSearchParams(p)}`),
+    autocompleteStudents: (q, limit = 10) => api.request(`/api/students/autocomplete?${new URLSearchParams({ q, limit })}`),
+    // Streams NDJSON progress events; the caller reads res.body
+    importStudents: (file, format) => {
+        const body = new FormData();
+        body.append('file', file);
+        const token = api.getToken();
+        return fetch(`${API_BASE}/api/students/import${format ? `?format=${format}` : ''}`, {
+            method: 'POST',
+            body,
+            headers: token ? { Authorization: `Bearer ${token}` } : {},
+        });
+    },
     getStudent: (id) => api.request(`/api/students/${id}`),
     addStudent: (d) => api.request('/api/students', { method: 'POST', body: JSON.stringify(d) }),
     updateStudent: (id, d) => api.request(`/api/students/${id}`, { method: 'PUT', body: JSON.stringify(d) }),
+    bulkUpdateStudents: (items) => api.request('/api/students/bulk', { method: 'PATCH', body: JSON.stringify({ items }) }),
     deleteStudent: (id) => api.request(`/api/students/${id}`, { method: 'DELETE' }),
 
     // Companies
     getCompanies: (p = {}) => api.request(`/api/companies?${new URLSearchParams(p)}`),
     addCompany: (d) => api.request('/api/companies', { method: 'POST', body: JSON.stringify(d) }),
     updateCompany: (id, d) => api.request(`/api/companies/${id}`, { method: 'PUT', body: JSON.stringify(d) }),
+    bulkUpdateCompanies: (items) => api.request('/api/companies/bulk', { method: 'PATCH', body: JSON.stringify({ items }) }),
     deleteCompany: (id) => api.request(`/api/companies/${id}`, { method: 'DELETE' }),
+    getCompanyCandidates: (id, p = {}) => api.request(`/api/companies/${id}/candidates?${new URLSearchParams(p)}`),
+
+    // Skills
+    autocompleteSkills: (q, limit = 10) => api.request(`/api/skills/autocomplete?${new URLSearchParams({ q, limit })}`),
 
     // AI
     analyzeResume: (d) => api.request('/api/ai/analyze-resume', { method: 'POST', body: JSON.stringify(d) }),